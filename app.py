@@ -9,6 +9,8 @@ from modules.app_common import (
 )
 from modules.csv_parser import CSVParser
 from modules.data_enrichment import DataEnrichment
+from modules.ingest_manifest import hash_file
+from modules.ingest_pipeline import IngestPipeline
 import traceback
 
 # Initialize page configuration
@@ -102,16 +104,41 @@ if uploaded_file is not None:
                 
                 st.success("✅ BigQuery client initialized")
                 
+                # Skip files whose exact contents were already uploaded
+                file_hash = hash_file(uploaded_file)
+                if uploader.manifest and uploader.manifest.has_file(file_hash):
+                    st.info("ℹ️ This file has already been uploaded. Nothing to do.")
+                    st.stop()
+                
                 with st.spinner("Creating table if needed..."):
                     uploader.create_table_if_not_exists()
                 
                 st.success("✅ Table ready")
                 
                 with st.spinner("Uploading data to BigQuery..."):
-                    result = uploader.upload_dataframe(df)
+                    # Parse, enrich and upload the file in overlapping chunks
+                    pipeline = IngestPipeline(
+                        CSVParser(csv_schema),
+                        uploader,
+                        DataEnrichment(config_loader.get_exercise_mapping())
+                    )
+                    result = pipeline.run(uploaded_file)
                 
                 if result['success']:
+                    if uploader.manifest:
+                        uploader.manifest.record_file(file_hash, uploaded_file.name,
+                                                      result['rows_uploaded'])
+                    
                     st.success(f"🎉 Successfully uploaded {result['rows_uploaded']} rows!")
+                    if result.get('rows_skipped'):
+                        st.info(f"ℹ️ Skipped {result['rows_skipped']} rows "
+                                "that were already uploaded")
+                    unmapped = result.get('unmapped_exercises')
+                    if unmapped:
+                        label = f"⚠️ {len(unmapped)} exercises without a muscle group mapping"
+                        with st.expander(label):
+                            for exercise in unmapped:
+                                st.write(f"- {exercise}")
                     
                     col1, col2, col3 = st.columns(3)
                     with col1:
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""Benchmark DataEnrichment.enrich_dataframe against the original per-row apply."""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.data_enrichment import DataEnrichment  # noqa: E402
+
+
+class PerRowEnrichment:
+    """Frozen copy of the original DataEnrichment mapping, kept as the baseline.
+
+    Exact names come from a dict, fuzzy rules are scanned linearly, and the
+    unbounded cache is keyed on the raw exercise name.
+    """
+
+    def __init__(self, mapping_config: Dict[str, Any]):
+        self.config = mapping_config
+        self.unmapped_exercises: List[str] = []
+        self.exercise_cache: Dict[str, Tuple[str, str]] = {}
+        self.exercise_lookup: Dict[str, Tuple[str, str]] = {}
+        for exercise_def in mapping_config.get('exercises', []):
+            for name in exercise_def.get('names', []):
+                self.exercise_lookup[self._normalize_name(name)] = (
+                    exercise_def['level1'], exercise_def['level2']
+                )
+
+    def _normalize_name(self, name: str) -> str:
+        return ' '.join(name.lower().strip().split())
+
+    def enrich_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Three Python-level passes over every row."""
+        self.unmapped_exercises = []
+        muscle_mappings = df['exercise_name'].apply(self._map_exercise_to_muscles)
+        df['muscle_group_level1'] = muscle_mappings.apply(lambda x: x[0])
+        df['muscle_group_level2'] = muscle_mappings.apply(lambda x: x[1])
+        return df
+
+    def _map_exercise_to_muscles(self, exercise_name: str) -> Tuple[str, str]:
+        if pd.isna(exercise_name) or exercise_name == '':
+            return ('unknown', 'unknown')
+        if exercise_name in self.exercise_cache:
+            return self.exercise_cache[exercise_name]
+
+        normalized = self._normalize_name(str(exercise_name))
+        result = self.exercise_lookup.get(normalized) or self._fuzzy_match(normalized)
+        if not result:
+            default = self.config.get('default_mapping', {})
+            result = (default.get('level1', 'upper'), default.get('level2', 'unknown'))
+            self.unmapped_exercises.append(exercise_name)
+        self.exercise_cache[exercise_name] = result
+        return result
+
+    def _fuzzy_match(self, normalized_name: str) -> Optional[Tuple[str, str]]:
+        for rule in self.config.get('fuzzy_rules', []):
+            if rule['keyword'].lower() in normalized_name:
+                excluded = any(term.lower() in normalized_name for term in rule.get('exclude', []))
+                if not excluded:
+                    return (rule['level1'], rule['level2'])
+        return None
+
+
+def build_frame(mapping_config, rows: int) -> pd.DataFrame:
+    """Build a frame of exercise names drawn from the mapping config."""
+    names = [name for exercise in mapping_config['exercises'] for name in exercise['names']]
+    names += ['Incline Bench Press', 'Mystery Machine', '', None]
+    rng = np.random.default_rng(42)
+    picks = rng.integers(0, len(names), size=rows)
+    return pd.DataFrame({'exercise_name': [names[i] for i in picks]})
+
+
+def time_it(enrichment, df) -> float:
+    start = time.perf_counter()
+    enrichment.enrich_dataframe(df.copy())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with open('config/exercise_mapping.yaml') as f:
+        mapping_config = yaml.safe_load(f)
+
+    df = build_frame(mapping_config, args.rows)
+
+    # Separate instances so both start with a cold exercise cache
+    baseline = time_it(PerRowEnrichment(mapping_config), df)
+    vectorized = time_it(DataEnrichment(mapping_config), df)
+
+    expected = PerRowEnrichment(mapping_config).enrich_dataframe(df.copy())
+    actual = DataEnrichment(mapping_config).enrich_dataframe(df.copy())
+    pd.testing.assert_frame_equal(actual, expected)
+
+    print(f"rows: {args.rows:,}")
+    print(f"per-row apply: {args.rows / baseline:>14,.0f} rows/sec ({baseline:.2f}s)")
+    print(f"vectorized:    {args.rows / vectorized:>14,.0f} rows/sec ({vectorized:.2f}s)")
+    print(f"speedup:       {baseline / vectorized:>14.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Benchmark REST row decoding against the Arrow fast path for query results."""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from google.cloud import bigquery
+from google.cloud.bigquery.table import RowIterator
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from modules.query_executor import arrow_to_dataframe  # noqa: E402
+
+SCHEMA = [
+    bigquery.SchemaField('date', 'TIMESTAMP'),
+    bigquery.SchemaField('workout_name', 'STRING'),
+    bigquery.SchemaField('exercise_name', 'STRING'),
+    bigquery.SchemaField('set_order', 'INT64'),
+    bigquery.SchemaField('weight_kg', 'FLOAT64'),
+    bigquery.SchemaField('reps', 'INT64'),
+]
+
+REST_PAGE_ROWS = 100_000
+
+
+def build_table(rows: int) -> pa.Table:
+    """Build a workouts-shaped result as an Arrow table."""
+    rng = np.random.default_rng(42)
+    start = np.datetime64('2015-01-01T00:00:00', 'us')
+    names = np.array(['Squat', 'Bench Press', 'Deadlift', 'Overhead Press', 'Barbell Row'])
+    return pa.table({
+        'date': pa.array(start + rng.integers(0, 10 * 365 * 86400, rows).astype('timedelta64[s]'),
+                         pa.timestamp('us', tz='UTC')),
+        'workout_name': pa.array(np.where(rng.random(rows) < 0.5, 'Push Day', 'Pull Day')),
+        'exercise_name': pa.array(names[rng.integers(0, len(names), rows)]),
+        'set_order': pa.array(rng.integers(1, 6, rows)),
+        'weight_kg': pa.array(rng.integers(20, 200, rows) * 2.5),
+        'reps': pa.array(rng.integers(1, 13, rows)),
+    })
+
+
+def to_rest_rows(table: pa.Table) -> list:
+    """Encode a table the way tabledata.list returns it: every value as a string."""
+    micros = table['date'].cast(pa.int64())
+    columns = [micros.to_pylist()] + [table[name].to_pylist() for name in table.column_names[1:]]
+    return [{'f': [{'v': str(value)} for value in row]} for row in zip(*columns)]
+
+
+def rest_to_dataframe(rest_rows: list) -> pd.DataFrame:
+    """Default path: page JSON rows through the client library's REST decoder."""
+    def api_request(method, path, query_params=None, **kwargs):
+        offset = int((query_params or {}).get('pageToken', 0))
+        response = {'rows': rest_rows[offset:offset + REST_PAGE_ROWS],
+                    'totalRows': str(len(rest_rows))}
+        if offset + REST_PAGE_ROWS < len(rest_rows):
+            response['pageToken'] = str(offset + REST_PAGE_ROWS)
+        return response
+
+    rows = RowIterator(client=None, api_request=api_request, path='/rows', schema=SCHEMA)
+    return rows.to_dataframe(create_bqstorage_client=False)
+
+
+def to_ipc_stream(table: pa.Table) -> bytes:
+    """Serialize a table as the record batch stream the Storage Read API delivers."""
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=REST_PAGE_ROWS):
+            writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def arrow_stream_to_dataframe(stream: bytes) -> pd.DataFrame:
+    """Fast path: read record batches and convert them with arrow_to_dataframe."""
+    return arrow_to_dataframe(pa.ipc.open_stream(stream).read_all())
+
+
+def time_it(fn, payload) -> tuple:
+    start = time.perf_counter()
+    result = fn(payload)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    table = build_table(args.rows)
+    rest_rows = to_rest_rows(table)
+    stream = to_ipc_stream(table)
+
+    rest_seconds, rest_df = time_it(rest_to_dataframe, rest_rows)
+    arrow_seconds, arrow_df = time_it(arrow_stream_to_dataframe, stream)
+
+    assert len(rest_df) == len(arrow_df) == args.rows
+    assert (rest_df['reps'].to_numpy() == arrow_df['reps'].to_numpy()).all()
+    assert (rest_df['exercise_name'].to_numpy() == arrow_df['exercise_name'].to_numpy()).all()
+
+    print(f"rows: {args.rows:,}")
+    print(f"REST rows:     {args.rows / rest_seconds:>14,.0f} rows/sec ({rest_seconds:.2f}s)")
+    print(f"Arrow batches: {args.rows / arrow_seconds:>14,.0f} rows/sec ({arrow_seconds:.2f}s)")
+    print(f"speedup:       {rest_seconds / arrow_seconds:>14.1f}x")
+    dtypes = ", ".join(f"{name}={dtype}" for name, dtype in arrow_df.dtypes.items())
+    print(f"arrow dtypes: {dtypes}")
+
+
+if __name__ == '__main__':
+    main()
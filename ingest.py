@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Batch ingest workout CSV files into BigQuery."""
+
+import argparse
+import os
+import sys
+
+from modules.batch_ingest import BatchIngestor, discover_files
+from modules.cli_common import create_uploader
+from modules.config_loader import ConfigLoader
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Batch ingest workout CSV files into BigQuery.")
+    parser.add_argument('paths', nargs='+', help="Directories, CSV files or glob patterns")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Parser processes (default: CPU count)")
+    parser.add_argument('--coalesce-rows', type=int, default=500_000,
+                        help="Rows buffered per BigQuery load job (default: 500000)")
+    parser.add_argument('--state-file', default='.ingest_state.json',
+                        help="Resume state file (default: .ingest_state.json)")
+    parser.add_argument('--dry-run', action='store_true', help="Parse and enrich without uploading")
+    return parser.parse_args()
+
+
+def print_file_result(result):
+    """Print per-file parse statistics."""
+    name = os.path.basename(result['path'])
+    if result['errors']:
+        print(f"❌ {name}: {'; '.join(result['errors'])}")
+        return
+
+    seconds = result['seconds']
+    rate = result['rows'] / seconds if seconds else 0.0
+    print(f"✅ {name}: {result['rows']:,} rows, {result['bytes'] / 1e6:.1f} MB "
+          f"in {seconds:.2f}s ({rate:,.0f} rows/s)")
+
+
+def print_upload_result(result):
+    """Print the outcome of a coalesced load job."""
+    if result.get('success'):
+        print(f"☁️  Loaded {result['rows_uploaded']:,} rows in {result['duration_seconds']:.2f}s")
+    else:
+        print(f"❌ Load job failed: {result.get('error', 'Unknown error')}")
+
+
+def main():
+    """Batch ingest CSV files into BigQuery."""
+    args = parse_args()
+
+    print("🏋️  Batch ingesting workout CSV files...")
+    print("-" * 50)
+
+    try:
+        config_loader = ConfigLoader()
+        csv_schema = config_loader.get_csv_schema()
+        mapping_config = config_loader.get_exercise_mapping()
+
+        files = discover_files(args.paths)
+        if not files:
+            print("❌ No CSV files found")
+            sys.exit(1)
+        print(f"📁 Found {len(files)} CSV files")
+
+        uploader = None if args.dry_run else create_uploader(config_loader)
+
+        ingestor = BatchIngestor(
+            uploader=uploader,
+            csv_schema=csv_schema,
+            mapping_config=mapping_config,
+            state_path=args.state_file,
+            workers=args.workers,
+            coalesce_rows=args.coalesce_rows
+        )
+        summary = ingestor.run(files, on_file=print_file_result, on_upload=print_upload_result)
+
+    except FileNotFoundError as e:
+        print(f"❌ Configuration file not found: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+    print()
+    print("-" * 50)
+    print(f"📊 Files: {summary['files_parsed']} parsed, {summary['files_skipped']} skipped "
+          f"(already ingested), {len(summary['files_failed'])} failed")
+    print(f"📊 Rows: {summary['rows_parsed']:,} parsed, {summary['rows_uploaded']:,} uploaded "
+          f"in {summary['load_jobs']} load jobs")
+    print(f"⏱️  {summary['duration_seconds']:.2f}s total, {summary['rows_per_second']:,.0f} rows/s, "
+          f"{summary['mb_per_second']:.1f} MB/s")
+
+    if not summary['success']:
+        sys.exit(1)
+
+    print()
+    print("🎉 Done!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Rewrite the workouts table with the configured partitioning and clustering."""
+
+import argparse
+import sys
+
+from modules.cli_common import create_uploader
+from modules.config_loader import ConfigLoader
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Migrate an existing workouts table to the partitioning/clustering "
+                    "in bigquery_config.yaml."
+    )
+    parser.add_argument('--drop-backup', action='store_true',
+                        help="Drop the original table after a successful migration")
+    return parser.parse_args()
+
+
+def main():
+    """Migrate the workouts table layout in place."""
+    args = parse_args()
+
+    print("🏋️  Migrating Workouts Table Layout...")
+    print("-" * 50)
+
+    try:
+        uploader = create_uploader(ConfigLoader())
+        layout = uploader._table_layout()
+        partition = layout['partition_type'] or 'none'
+        print(f"🗂️  Partition: {partition} on {layout['partition_field'] or '-'}")
+        print(f"🗂️  Clustering: {', '.join(layout['clustering_fields']) or 'none'}")
+        print()
+
+        print("⚠️  Pause ingest until this finishes; "
+              "rows appended meanwhile roll the migration back")
+        print("☁️  Rewriting table...")
+        result = uploader.migrate_table_layout(keep_backup=not args.drop_backup)
+
+        if not result.get('success'):
+            print("❌ Migration failed!")
+            print(f"Error: {result.get('error', 'Unknown error')}")
+            sys.exit(1)
+
+        if not result.get('migrated'):
+            print("✅ Table already has the configured layout, nothing to do")
+        else:
+            print("✅ Migration successful!")
+            print(f"📊 Rows copied: {result['rows_copied']:,}")
+            if result.get('backup_table'):
+                print(f"💾 Original table kept as: {result['backup_table']}")
+
+    except FileNotFoundError as e:
+        print(f"❌ Configuration file not found: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+    print()
+    print("🎉 Done!")
+
+if __name__ == "__main__":
+    main()
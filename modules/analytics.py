@@ -1,52 +1,128 @@
 """Analytics module for workout data analysis."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+
 import pandas as pd
 import streamlit as st
 from google.cloud import bigquery
-from typing import Optional, Dict, Any
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from modules.analytics_backends import AnalyticsBackend, BigQueryBackend, current_utc_date
+from modules.exercise_series import SERIES_COLUMNS, ExerciseSeriesStore
+from modules.result_cache import ResultCache
+from modules.single_flight import SingleFlight
+
+
+def _copy_result(value: Any) -> Any:
+    """Copy cached results so callers cannot mutate the cached objects."""
+    if isinstance(value, pd.DataFrame):
+        return value.copy()
+    if isinstance(value, dict):
+        return {key: _copy_result(item) for key, item in value.items()}
+    return value
 
 
 class WorkoutAnalytics:
-    """Analytics functions for workout data stored in BigQuery."""
+    """Analytics functions for workout data stored in BigQuery or a local mirror.
+    
+    Results are cached in memory per method and arguments, tagged with the
+    backend's data version. An entry is reused for as long as the version is
+    unchanged (no TTL); results relative to today, like rest days, are also
+    keyed on the date. Once the version changes, the stale entry is still
+    served immediately while a background thread refreshes it
+    (stale-while-revalidate). Concurrent fetches and refreshes of the same
+    entry are coalesced into one backend call.
+    """
     
-    def __init__(self, client: bigquery.Client, project_id: str, dataset_id: str):
+    def __init__(self, client: Optional[bigquery.Client], project_id: str, dataset_id: str,
+                 backend: Optional[AnalyticsBackend] = None,
+                 result_cache: Optional[ResultCache] = None,
+                 stale_while_revalidate: bool = True,
+                 series_store: Optional[ExerciseSeriesStore] = None):
         """Initialize analytics with BigQuery client.
         
         Args:
-            client: BigQuery client instance
+            client: BigQuery client instance (may be None with a local backend)
             project_id: GCP project ID
             dataset_id: BigQuery dataset ID
+            backend: Query backend; defaults to BigQueryBackend over the workouts table
+            result_cache: Optional on-disk result cache shared with other processes
+            stale_while_revalidate: Serve stale results while refreshing in the background
+            series_store: Optional precomputed per-exercise series for the performance chart
         """
         self.client = client
         self.project_id = project_id
         self.dataset_id = dataset_id
         self.table_id = "workouts"
+        self.backend = backend or BigQueryBackend(
+            client, project_id, dataset_id, self.table_id, result_cache=result_cache
+        )
+        self.stale_while_revalidate = stale_while_revalidate
+        self.series_store = series_store
+        self._cache: Dict[Tuple, Tuple[str, Any]] = {}
+        self._cache_lock = threading.Lock()
+        self._refreshes = SingleFlight()
     
-    @st.cache_data(ttl=300)  # Cache for 5 minutes
-    def get_workout_overview(_self) -> Dict[str, Any]:
-        """Get overview statistics of all workouts.
+    def _cached(self, name: str, args: Tuple, fetch: Callable[[], Any]) -> Any:
+        """Return a cached result for the current data version, fetching it if needed.
         
+        Args:
+            name: Method name
+            args: Method arguments
+            fetch: Callable computing the result from the backend
+            
         Returns:
-            Dictionary with overview metrics
+            Result (a copy of the cached value)
         """
-        query = f"""
-        SELECT 
-            COUNT(DISTINCT DATE(date)) as total_workouts,
-            COUNT(*) as total_exercises,
-            SUM(weight_kg * reps) as total_volume_kg,
-            COUNT(DISTINCT exercise_name) as unique_exercises
-        FROM `{_self.project_id}.{_self.dataset_id}.{_self.table_id}`
+        version = self.backend.get_data_version()
+        key = (name, args)
+        
+        with self._cache_lock:
+            entry = self._cache.get(key)
+        if version is not None and entry is not None:
+            if entry[0] == version:
+                return _copy_result(entry[1])
+            if self.stale_while_revalidate:
+                self._refreshes.do_background(key, lambda: self._refresh(key, version, fetch))
+                return _copy_result(entry[1])
+        
+        return _copy_result(self._refreshes.do(key, lambda: self._refresh(key, version, fetch)))
+    
+    def _refresh(self, key: Tuple, version: Optional[str], fetch: Callable[[], Any]) -> Any:
+        """Fetch a result and store it under the data version it was requested for.
+        
+        Args:
+            key: Cache key (method name, arguments)
+            version: Data version observed before fetching
+            fetch: Callable computing the result from the backend
+            
+        Returns:
+            Fetched result
         """
+        result = fetch()
+        if version is not None:
+            with self._cache_lock:
+                self._cache[key] = (version, result)
+        return result
+    
+    def get_refresh_stats(self) -> Dict[str, int]:
+        """Get counts of backend fetches, coalesced calls and background refreshes."""
+        return dict(self._refreshes.stats)
+    
+    def clear_cache(self):
+        """Drop all in-memory cached results."""
+        with self._cache_lock:
+            self._cache.clear()
+    
+    def get_workout_overview(self) -> Dict[str, Any]:
+        """Get overview statistics of all workouts.
         
+        Returns:
+            Dictionary with overview metrics
+        """
         try:
-            result = _self.client.query(query).result()
-            row = next(result)
-            
-            return {
-                'total_workouts': row.total_workouts or 0,
-                'total_exercises': row.total_exercises or 0,
-                'total_volume_kg': row.total_volume_kg or 0,
-                'unique_exercises': row.unique_exercises or 0
-            }
+            return self._cached('workout_overview', (), self.backend.get_workout_overview)
         except Exception as e:
             st.error(f"Error fetching workout overview: {e}")
             return {
@@ -55,58 +131,34 @@ class WorkoutAnalytics:
                 'total_volume_kg': 0,
                 'unique_exercises': 0
             }
-    
-    @st.cache_data(ttl=300)
-    def get_workout_frequency_by_date(_self) -> pd.DataFrame:
+
+    def get_workout_frequency_by_date(self) -> pd.DataFrame:
         """Get workout frequency by date.
         
         Returns:
             DataFrame with date and workout_count columns
         """
-        query = f"""
-        SELECT 
-            DATE(date) as date,
-            COUNT(DISTINCT workout_name) as workout_count
-        FROM `{_self.project_id}.{_self.dataset_id}.{_self.table_id}`
-        GROUP BY date
-        ORDER BY date
-        """
-        
         try:
-            return _self.client.query(query).to_dataframe()
+            return self._cached('workout_frequency_by_date', (),
+                                self.backend.get_workout_frequency_by_date)
         except Exception as e:
             st.error(f"Error fetching workout frequency: {e}")
             return pd.DataFrame(columns=['date', 'workout_count'])
-    
-    @st.cache_data(ttl=300)
-    def get_muscle_group_distribution(_self) -> pd.DataFrame:
+
+    def get_muscle_group_distribution(self) -> pd.DataFrame:
         """Get distribution of exercises by muscle group.
         
         Returns:
             DataFrame with muscle_group, level, and exercise_count
         """
-        query = f"""
-        SELECT 'level1' as level, muscle_group_level1 as muscle_group, COUNT(*) as exercise_count
-        FROM `{_self.project_id}.{_self.dataset_id}.{_self.table_id}`
-        GROUP BY muscle_group_level1
-        
-        UNION ALL
-        
-        SELECT 'level2' as level, muscle_group_level2 as muscle_group, COUNT(*) as exercise_count
-        FROM `{_self.project_id}.{_self.dataset_id}.{_self.table_id}`
-        GROUP BY muscle_group_level2
-        
-        ORDER BY level, exercise_count DESC
-        """
-        
         try:
-            return _self.client.query(query).to_dataframe()
+            return self._cached('muscle_group_distribution', (),
+                                self.backend.get_muscle_group_distribution)
         except Exception as e:
             st.error(f"Error fetching muscle group distribution: {e}")
             return pd.DataFrame(columns=['level', 'muscle_group', 'exercise_count'])
-    
-    @st.cache_data(ttl=300)
-    def get_top_exercises(_self, limit: int = 10) -> pd.DataFrame:
+
+    def get_top_exercises(self, limit: int = 10) -> pd.DataFrame:
         """Get most performed exercises.
         
         Args:
@@ -115,46 +167,26 @@ class WorkoutAnalytics:
         Returns:
             DataFrame with exercise statistics
         """
-        query = f"""
-        SELECT 
-            exercise_name,
-            COUNT(*) as total_sets,
-            AVG(weight_kg) as avg_weight,
-            MAX(weight_kg) as max_weight,
-            SUM(weight_kg * reps) as total_volume
-        FROM `{_self.project_id}.{_self.dataset_id}.{_self.table_id}`
-        GROUP BY exercise_name
-        ORDER BY total_sets DESC
-        LIMIT {limit}
-        """
-        
         try:
-            return _self.client.query(query).to_dataframe()
+            return self._cached('top_exercises', (limit,),
+                                lambda: self.backend.get_top_exercises(limit))
         except Exception as e:
             st.error(f"Error fetching top exercises: {e}")
             return pd.DataFrame(columns=['exercise_name', 'total_sets', 'avg_weight', 'max_weight', 'total_volume'])
-    
-    @st.cache_data(ttl=300)
-    def get_all_exercises(_self) -> pd.DataFrame:
+
+    def get_all_exercises(self) -> pd.DataFrame:
         """Get list of all unique exercises.
         
         Returns:
             DataFrame with exercise names
         """
-        query = f"""
-        SELECT DISTINCT exercise_name
-        FROM `{_self.project_id}.{_self.dataset_id}.{_self.table_id}`
-        ORDER BY exercise_name
-        """
-        
         try:
-            return _self.client.query(query).to_dataframe()
+            return self._cached('all_exercises', (), self.backend.get_all_exercises)
         except Exception as e:
             st.error(f"Error fetching exercises: {e}")
             return pd.DataFrame(columns=['exercise_name'])
-    
-    @st.cache_data(ttl=300)
-    def get_exercise_performance(_self, exercise_name: str) -> pd.DataFrame:
+
+    def get_exercise_performance(self, exercise_name: str) -> pd.DataFrame:
         """Get performance data for a specific exercise over time.
         
         Args:
@@ -163,33 +195,37 @@ class WorkoutAnalytics:
         Returns:
             DataFrame with performance metrics by date
         """
-        query = f"""
-        SELECT 
-            DATE(date) as date,
-            MAX(weight_kg) as max_weight,
-            AVG(weight_kg) as avg_weight,
-            SUM(weight_kg * reps) as total_volume,
-            COUNT(*) as total_sets
-        FROM `{_self.project_id}.{_self.dataset_id}.{_self.table_id}`
-        WHERE exercise_name = @exercise_name
-        GROUP BY date
-        ORDER BY date
-        """
-        
-        job_config = bigquery.QueryJobConfig(
-            query_parameters=[
-                bigquery.ScalarQueryParameter("exercise_name", "STRING", exercise_name)
-            ]
-        )
-        
         try:
-            return _self.client.query(query, job_config=job_config).to_dataframe()
+            return self._cached(
+                'exercise_performance', (exercise_name,),
+                lambda: self.backend.get_exercise_performance(exercise_name)
+            )
         except Exception as e:
             st.error(f"Error fetching exercise performance for {exercise_name}: {e}")
             return pd.DataFrame(columns=['date', 'max_weight', 'avg_weight', 'total_volume', 'total_sets'])
-    
-    @st.cache_data(ttl=300)
-    def get_rest_days(_self, days: int = 30) -> pd.DataFrame:
+
+    def get_exercise_series(self, exercise_name: str, x_axis: str = 'index') -> pd.DataFrame:
+        """Get the precomputed performance series for an exercise.
+        
+        Args:
+            exercise_name: Name of the exercise
+            x_axis: Chart x-axis mode; 'week', 'month' and 'year' return one
+                pre-aggregated row per bucket instead of one row per session
+            
+        Returns:
+            DataFrame shaped like the exercise_performance_metrics view (or
+            its buckets), as expected by create_exercise_performance_chart
+        """
+        if self.series_store is None:
+            return pd.DataFrame(columns=SERIES_COLUMNS)
+        try:
+            data_version = self.backend.get_data_version()
+            return self.series_store.get_series(exercise_name, x_axis, data_version)
+        except Exception as e:
+            st.error(f"Error fetching exercise series for {exercise_name}: {e}")
+            return pd.DataFrame(columns=SERIES_COLUMNS)
+
+    def get_rest_days(self, days: int = 30) -> pd.DataFrame:
         """Get rest days analysis for the last N days.
         
         Args:
@@ -198,39 +234,95 @@ class WorkoutAnalytics:
         Returns:
             DataFrame with rest day information
         """
-        query = f"""
-        WITH date_series AS (
-            SELECT DATE_SUB(CURRENT_DATE(), INTERVAL day DAY) as date
-            FROM UNNEST(GENERATE_ARRAY(0, {days - 1})) as day
-        ),
-        workout_dates AS (
-            SELECT DISTINCT DATE(date) as date
-            FROM `{_self.project_id}.{_self.dataset_id}.{_self.table_id}`
-            WHERE DATE(date) >= DATE_SUB(CURRENT_DATE(), INTERVAL {days} DAY)
-        )
-        SELECT 
-            ds.date,
-            CASE WHEN wd.date IS NOT NULL THEN 'Workout' ELSE 'Rest' END as day_type
-        FROM date_series ds
-        LEFT JOIN workout_dates wd ON ds.date = wd.date
-        ORDER BY ds.date DESC
-        """
-        
         try:
-            return _self.client.query(query).to_dataframe()
+            # Relative to today, so a new day is a new entry even if the data is unchanged
+            return self._cached('rest_days', (days, current_utc_date()),
+                                lambda: self.backend.get_rest_days(days))
         except Exception as e:
             st.error(f"Error fetching rest days: {e}")
             return pd.DataFrame(columns=['date', 'day_type'])
-    
-    def check_table_exists(_self) -> bool:
+
+    def get_dashboard_bundle(self, limit: int = 10) -> Dict[str, Any]:
+        """Get all dashboard overview data from a single table scan.
+        
+        Args:
+            limit: Maximum number of top exercises
+            
+        Returns:
+            Dictionary with 'overview', 'frequency', 'distribution', 'top_exercises'
+            and 'all_exercises', shaped like the corresponding individual methods
+        """
+        try:
+            return self._cached('dashboard_bundle', (limit,),
+                                lambda: self.backend.get_dashboard_bundle(limit))
+        except Exception as e:
+            st.error(f"Error fetching dashboard data: {e}")
+            return {
+                'overview': {
+                    'total_workouts': 0,
+                    'total_exercises': 0,
+                    'total_volume_kg': 0,
+                    'unique_exercises': 0
+                },
+                'frequency': pd.DataFrame(columns=['date', 'workout_count']),
+                'distribution': pd.DataFrame(columns=['level', 'muscle_group', 'exercise_count']),
+                'top_exercises': pd.DataFrame(columns=['exercise_name', 'total_sets', 'avg_weight',
+                                                       'max_weight', 'total_volume']),
+                'all_exercises': pd.DataFrame(columns=['exercise_name'])
+            }
+
+    def fetch_many(self, requests: Iterable[Union[str, Tuple[str, Dict[str, Any]]]],
+                   max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """Run several analytics methods concurrently and wait for all of them.
+        
+        Each request names a getter without its 'get_' prefix, optionally with
+        keyword arguments, e.g. ['workout_overview', ('top_exercises', {'limit': 5})].
+        The BigQuery jobs run side by side, so the total latency is roughly
+        that of the slowest query rather than the sum.
+        
+        Args:
+            requests: Method names or (method name, kwargs) tuples
+            max_workers: Maximum concurrent queries (defaults to one per request)
+            
+        Returns:
+            Results keyed by method name, shaped like the individual methods
+            
+        Raises:
+            ValueError: If a name is unknown or requested twice
+        """
+        calls: Dict[str, Callable[[], Any]] = {}
+        for request in requests:
+            name, kwargs = (request, {}) if isinstance(request, str) else request
+            method = getattr(self, f"get_{name}", None)
+            if name == 'refresh_stats' or not callable(method):
+                raise ValueError(f"Unknown analytics method: {name}")
+            if name in calls:
+                raise ValueError(f"Analytics method requested twice: {name}")
+            calls[name] = lambda method=method, kwargs=kwargs: method(**kwargs)
+        
+        if not calls:
+            return {}
+        
+        # Let worker threads report errors into the calling Streamlit session
+        ctx = get_script_run_ctx(suppress_warning=True)
+        
+        def run(call: Callable[[], Any]) -> Any:
+            if ctx is not None:
+                add_script_run_ctx(threading.current_thread(), ctx)
+            return call()
+        
+        with ThreadPoolExecutor(max_workers=max_workers or len(calls),
+                                thread_name_prefix='analytics-fetch') as pool:
+            futures = {name: pool.submit(run, call) for name, call in calls.items()}
+            return {name: future.result() for name, future in futures.items()}
+
+    def check_table_exists(self) -> bool:
         """Check if the workouts table exists and has data.
         
         Returns:
             True if table exists and has data, False otherwise
         """
         try:
-            table_ref = f"{_self.project_id}.{_self.dataset_id}.{_self.table_id}"
-            table = _self.client.get_table(table_ref)
-            return table.num_rows > 0
+            return self.backend.check_table_exists()
         except Exception:
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,639 @@
+"""Query backends for WorkoutAnalytics: BigQuery and a local Parquet engine."""
+import hashlib
+import logging
+import threading
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+from google.cloud import bigquery
+
+from modules.daily_summary import SUMMARY_TABLE_ID
+from modules.data_version import DataVersionTracker
+from modules.query_executor import QueryBudgetExceeded, get_query_executor
+from modules.result_cache import ResultCache, make_cache_key
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds for caller-supplied query parameters
+MAX_REST_DAYS = 366
+MAX_TOP_EXERCISES = 100
+
+
+def clamp_parameter(value: Any, upper: int) -> int:
+    """Clamp a caller-supplied count (days, limit) to 1..upper.
+
+    Every backend applies the same bounds, so they return the same
+    shapes for the same arguments.
+    """
+    return max(1, min(int(value), upper))
+
+
+def current_utc_date():
+    """Today's date in UTC, the date BigQuery's CURRENT_DATE() returns."""
+    return datetime.now(timezone.utc).date()
+
+
+class AnalyticsBackend(ABC):
+    """Interface for the queries behind WorkoutAnalytics.
+
+    Implementations return the same column names, order and dtypes, and raise
+    on failure; WorkoutAnalytics handles errors and empty defaults.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def get_workout_overview(self) -> Dict[str, Any]:
+        """Get overview statistics of all workouts."""
+
+    @abstractmethod
+    def get_workout_frequency_by_date(self) -> pd.DataFrame:
+        """Get distinct workouts per date (date, workout_count)."""
+
+    @abstractmethod
+    def get_muscle_group_distribution(self) -> pd.DataFrame:
+        """Get exercise counts per muscle group (level, muscle_group, exercise_count)."""
+
+    @abstractmethod
+    def get_top_exercises(self, limit: int = 10) -> pd.DataFrame:
+        """Get most performed exercises."""
+
+    @abstractmethod
+    def get_all_exercises(self) -> pd.DataFrame:
+        """Get sorted unique exercise names (exercise_name)."""
+
+    @abstractmethod
+    def get_exercise_performance(self, exercise_name: str) -> pd.DataFrame:
+        """Get per-date performance metrics for one exercise."""
+
+    @abstractmethod
+    def get_rest_days(self, days: int = 30) -> pd.DataFrame:
+        """Get workout/rest classification for the last N days (date, day_type)."""
+
+    @abstractmethod
+    def check_table_exists(self) -> bool:
+        """Check whether the workouts data exists and has rows."""
+
+    def get_data_version(self) -> Optional[str]:
+        """Get a string that changes whenever the underlying data changes.
+
+        Returns:
+            Version string, or None if the backend cannot tell (disables caching)
+        """
+        return None
+
+    def get_dashboard_bundle(self, limit: int = 10) -> Dict[str, Any]:
+        """Get overview, frequency, distribution and exercise lists together.
+
+        Backends with per-query cost override this to answer all parts from a
+        single scan; the default simply calls the individual methods.
+
+        Args:
+            limit: Maximum number of top exercises
+
+        Returns:
+            Dictionary with overview, frequency, distribution, top_exercises
+            and all_exercises in the shapes of the individual methods
+        """
+        return {
+            'overview': self.get_workout_overview(),
+            'frequency': self.get_workout_frequency_by_date(),
+            'distribution': self.get_muscle_group_distribution(),
+            'top_exercises': self.get_top_exercises(limit),
+            'all_exercises': self.get_all_exercises()
+        }
+
+
+class BigQueryBackend(AnalyticsBackend):
+    """Run analytics queries against the BigQuery workouts table.
+
+    Every query is prechecked with a dry run when the executor has a
+    dry_run_max_bytes budget. Over-budget queries raise QueryBudgetExceeded,
+    except where a cheaper variant exists: rest days fall back to the
+    daily_workout_summary table and top exercises to a TABLESAMPLE estimate.
+
+    With a ResultCache, results are stored on disk keyed on query text,
+    parameter values and the table's data version, so every process sharing
+    the cache directory reuses them until the table changes. Queries relative
+    to CURRENT_DATE() are keyed on the date as well, and downgraded results
+    are not stored, since other processes may have a larger budget.
+    """
+
+    name = "bigquery"
+
+    def __init__(self, client: bigquery.Client, project_id: str, dataset_id: str,
+                 table_id: str = "workouts", sample_percent: float = 10.0,
+                 result_cache: Optional[ResultCache] = None, version_check_seconds: float = 30.0):
+        """Initialize the backend with a BigQuery client.
+
+        Args:
+            client: BigQuery client instance
+            project_id: GCP project ID
+            dataset_id: BigQuery dataset ID
+            table_id: Workouts table ID
+            sample_percent: Table sample used by downgraded top-exercise queries
+            result_cache: Optional shared on-disk result cache
+            version_check_seconds: Minimum seconds between table metadata reads
+        """
+        self.client = client
+        self.project_id = project_id
+        self.dataset_id = dataset_id
+        self.table_id = table_id
+        self.sample_percent = sample_percent
+        self.result_cache = result_cache
+        self.executor = get_query_executor(client)
+        self.version_tracker = DataVersionTracker(client, self.table_ref, version_check_seconds)
+
+    @property
+    def table_ref(self) -> str:
+        """Fully qualified workouts table reference."""
+        return f"{self.project_id}.{self.dataset_id}.{self.table_id}"
+
+    def get_data_version(self) -> str:
+        return self.version_tracker.current()
+
+    @staticmethod
+    def _parameter_values(job_config: Optional[bigquery.QueryJobConfig]) -> Dict[str, Any]:
+        """Get query parameter values by name for cache keys."""
+        if job_config is None:
+            return {}
+        return {
+            param.name: param.value if hasattr(param, 'value') else param.values
+            for param in job_config.query_parameters
+        }
+
+    def _query(self, query: str, label: str, job_config: Optional[bigquery.QueryJobConfig] = None,
+               fallback: Optional[str] = None, date_relative: bool = False) -> pd.DataFrame:
+        """Run a prechecked query through the result cache.
+
+        Args:
+            query: Query text
+            label: Query label for the executor's stats
+            job_config: Optional job config (parameters)
+            fallback: Optional cheaper query with the same parameters and columns
+            date_relative: The query depends on CURRENT_DATE()
+
+        Returns:
+            Query result DataFrame
+        """
+        if self.result_cache is None:
+            return self._run_query(query, label, job_config, fallback)[0]
+
+        params = self._parameter_values(job_config)
+        if date_relative:
+            params['current_date'] = current_utc_date()
+        cache_key = make_cache_key(query, params, self.get_data_version())
+        df = self.result_cache.get(cache_key)
+        if df is None:
+            df, downgraded = self._run_query(query, label, job_config, fallback)
+            if not downgraded:
+                self.result_cache.set(cache_key, df)
+        return df
+
+    def _run_query(self, query: str, label: str,
+                   job_config: Optional[bigquery.QueryJobConfig] = None,
+                   fallback: Optional[str] = None) -> Tuple[pd.DataFrame, bool]:
+        """Run a prechecked query, downgrading to a cheaper variant if over budget.
+
+        Args:
+            query: Query text
+            label: Query label for the executor's stats
+            job_config: Optional job config (parameters)
+            fallback: Optional cheaper query with the same parameters and columns
+
+        Returns:
+            Tuple of the query result DataFrame and whether the fallback ran
+        """
+        try:
+            df = self.executor.to_dataframe(query, job_config=job_config, label=label,
+                                            precheck=True)
+            return df, False
+        except QueryBudgetExceeded as e:
+            if fallback is None:
+                raise
+            logger.warning(f"{e}; downgrading '{label}' to a cheaper variant")
+            df = self.executor.to_dataframe(
+                fallback, job_config=job_config, label=f"{label}:downgraded", precheck=True
+            )
+            return df, True
+
+    def get_workout_overview(self) -> Dict[str, Any]:
+        query = f"""
+        SELECT
+            COUNT(DISTINCT DATE(date)) as total_workouts,
+            COUNT(*) as total_exercises,
+            SUM(weight_kg * reps) as total_volume_kg,
+            COUNT(DISTINCT exercise_name) as unique_exercises
+        FROM `{self.table_ref}`
+        """
+        row = self._query(query, 'workout_overview').iloc[0]
+        return {
+            'total_workouts': int(row['total_workouts']) if pd.notna(row['total_workouts']) else 0,
+            'total_exercises': (int(row['total_exercises'])
+                                if pd.notna(row['total_exercises']) else 0),
+            'total_volume_kg': (float(row['total_volume_kg'])
+                                if pd.notna(row['total_volume_kg']) else 0),
+            'unique_exercises': (int(row['unique_exercises'])
+                                 if pd.notna(row['unique_exercises']) else 0)
+        }
+
+    def get_workout_frequency_by_date(self) -> pd.DataFrame:
+        query = f"""
+        SELECT
+            DATE(date) as date,
+            COUNT(DISTINCT workout_name) as workout_count
+        FROM `{self.table_ref}`
+        GROUP BY date
+        ORDER BY date
+        """
+        return self._query(query, 'workout_frequency_by_date')
+
+    def get_muscle_group_distribution(self) -> pd.DataFrame:
+        query = f"""
+        SELECT 'level1' as level, muscle_group_level1 as muscle_group, COUNT(*) as exercise_count
+        FROM `{self.table_ref}`
+        GROUP BY muscle_group_level1
+
+        UNION ALL
+
+        SELECT 'level2' as level, muscle_group_level2 as muscle_group, COUNT(*) as exercise_count
+        FROM `{self.table_ref}`
+        GROUP BY muscle_group_level2
+
+        ORDER BY level, exercise_count DESC
+        """
+        return self._query(query, 'muscle_group_distribution')
+
+    def get_top_exercises(self, limit: int = 10) -> pd.DataFrame:
+        query = f"""
+        SELECT
+            exercise_name,
+            COUNT(*) as total_sets,
+            AVG(weight_kg) as avg_weight,
+            MAX(weight_kg) as max_weight,
+            SUM(weight_kg * reps) as total_volume
+        FROM `{self.table_ref}`
+        GROUP BY exercise_name
+        ORDER BY total_sets DESC
+        LIMIT @limit
+        """
+        # Sampled variant: counts and volume scaled up from a block sample
+        scale = 100.0 / self.sample_percent
+        sampled_query = f"""
+        SELECT
+            exercise_name,
+            CAST(ROUND(COUNT(*) * {scale}) AS INT64) as total_sets,
+            AVG(weight_kg) as avg_weight,
+            MAX(weight_kg) as max_weight,
+            SUM(weight_kg * reps) * {scale} as total_volume
+        FROM `{self.table_ref}` TABLESAMPLE SYSTEM ({float(self.sample_percent)} PERCENT)
+        GROUP BY exercise_name
+        ORDER BY total_sets DESC
+        LIMIT @limit
+        """
+        limit = clamp_parameter(limit, MAX_TOP_EXERCISES)
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ScalarQueryParameter("limit", "INT64", limit)]
+        )
+        return self._query(query, 'top_exercises', job_config, fallback=sampled_query)
+
+    def get_all_exercises(self) -> pd.DataFrame:
+        query = f"""
+        SELECT DISTINCT exercise_name
+        FROM `{self.table_ref}`
+        ORDER BY exercise_name
+        """
+        return self._query(query, 'all_exercises')
+
+    def get_exercise_performance(self, exercise_name: str) -> pd.DataFrame:
+        query = f"""
+        SELECT
+            DATE(date) as date,
+            MAX(weight_kg) as max_weight,
+            AVG(weight_kg) as avg_weight,
+            SUM(weight_kg * reps) as total_volume,
+            COUNT(*) as total_sets
+        FROM `{self.table_ref}`
+        WHERE exercise_name = @exercise_name
+        GROUP BY date
+        ORDER BY date
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("exercise_name", "STRING", exercise_name)
+            ]
+        )
+        return self._query(query, 'exercise_performance', job_config)
+
+    def get_rest_days(self, days: int = 30) -> pd.DataFrame:
+        days = clamp_parameter(days, MAX_REST_DAYS)
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ScalarQueryParameter("days", "INT64", days)]
+        )
+        workout_dates = f"""
+            SELECT DISTINCT DATE(date) as date
+            FROM `{self.table_ref}`
+            WHERE DATE(date) >= DATE_SUB(CURRENT_DATE(), INTERVAL @days DAY)
+        """
+        # Aggregate variant: the daily summary has one row per workout date and category
+        summary_dates = f"""
+            SELECT DISTINCT workout_date as date
+            FROM `{self.project_id}.{self.dataset_id}.{SUMMARY_TABLE_ID}`
+            WHERE workout_date >= DATE_SUB(CURRENT_DATE(), INTERVAL @days DAY)
+        """
+        return self._query(
+            self._rest_days_query(workout_dates), 'rest_days', job_config,
+            fallback=self._rest_days_query(summary_dates), date_relative=True
+        )
+
+    @staticmethod
+    def _rest_days_query(workout_dates: str) -> str:
+        """Build the rest-days query around a subquery of distinct workout dates."""
+        return f"""
+        WITH date_series AS (
+            SELECT DATE_SUB(CURRENT_DATE(), INTERVAL day DAY) as date
+            FROM UNNEST(GENERATE_ARRAY(0, @days - 1)) as day
+        ),
+        workout_dates AS ({workout_dates})
+        SELECT
+            ds.date,
+            CASE WHEN wd.date IS NOT NULL THEN 'Workout' ELSE 'Rest' END as day_type
+        FROM date_series ds
+        LEFT JOIN workout_dates wd ON ds.date = wd.date
+        ORDER BY ds.date DESC
+        """
+
+    def check_table_exists(self) -> bool:
+        table = self.client.get_table(self.table_ref)
+        return table.num_rows > 0
+
+    def get_dashboard_bundle(self, limit: int = 10) -> Dict[str, Any]:
+        # One scan with GROUPING SETS replaces five full-table queries
+        query = f"""
+        SELECT
+            CASE
+                WHEN GROUPING(day) = 0 THEN 'date'
+                WHEN GROUPING(exercise_name) = 0 THEN 'exercise'
+                WHEN GROUPING(muscle_group_level1) = 0 THEN 'level1'
+                WHEN GROUPING(muscle_group_level2) = 0 THEN 'level2'
+                ELSE 'total'
+            END as grouping_set,
+            day,
+            exercise_name,
+            muscle_group_level1,
+            muscle_group_level2,
+            COUNT(*) as row_count,
+            COUNT(DISTINCT day) as distinct_days,
+            COUNT(DISTINCT workout_name) as distinct_workouts,
+            COUNT(DISTINCT exercise_name) as distinct_exercises,
+            AVG(weight_kg) as avg_weight,
+            MAX(weight_kg) as max_weight,
+            SUM(weight_kg * reps) as total_volume
+        FROM (
+            SELECT
+                DATE(date) as day,
+                workout_name,
+                exercise_name,
+                muscle_group_level1,
+                muscle_group_level2,
+                weight_kg,
+                reps
+            FROM `{self.table_ref}`
+        )
+        GROUP BY GROUPING SETS (
+            (),
+            (day),
+            (exercise_name),
+            (muscle_group_level1),
+            (muscle_group_level2)
+        )
+        """
+        return self.split_dashboard_bundle(
+            self._query(query, 'dashboard_bundle'), clamp_parameter(limit, MAX_TOP_EXERCISES)
+        )
+
+    @staticmethod
+    def split_dashboard_bundle(df: pd.DataFrame, limit: int = 10) -> Dict[str, Any]:
+        """Split the GROUPING SETS result into the individual method shapes.
+
+        Args:
+            df: Result of the dashboard bundle query
+            limit: Maximum number of top exercises
+
+        Returns:
+            Dictionary with overview, frequency, distribution, top_exercises and all_exercises
+        """
+        sets = {name: group for name, group in df.groupby('grouping_set')}
+        empty = df.iloc[0:0]
+
+        total = sets.get('total', empty)
+        if len(total):
+            row = total.iloc[0]
+            overview = {
+                'total_workouts': int(row['distinct_days'] or 0),
+                'total_exercises': int(row['row_count'] or 0),
+                'total_volume_kg': (float(row['total_volume'])
+                                    if pd.notna(row['total_volume']) else 0),
+                'unique_exercises': int(row['distinct_exercises'] or 0)
+            }
+        else:
+            overview = {'total_workouts': 0, 'total_exercises': 0, 'total_volume_kg': 0,
+                        'unique_exercises': 0}
+
+        frequency = (
+            sets.get('date', empty)[['day', 'distinct_workouts']]
+            .rename(columns={'day': 'date', 'distinct_workouts': 'workout_count'})
+            .sort_values('date')
+            .reset_index(drop=True)
+        )
+
+        levels = []
+        for level in ('level1', 'level2'):
+            group = sets.get(level, empty)
+            levels.append(pd.DataFrame({
+                'level': level,
+                'muscle_group': group[f'muscle_group_{level}'].to_numpy(),
+                'exercise_count': group['row_count'].to_numpy()
+            }))
+        distribution = (
+            pd.concat(levels, ignore_index=True)
+            .sort_values(['level', 'exercise_count'], ascending=[True, False], kind='stable')
+            .reset_index(drop=True)
+            .astype({'exercise_count': 'Int64'})
+        )
+
+        exercises = (
+            sets.get('exercise', empty)[
+                ['exercise_name', 'row_count', 'avg_weight', 'max_weight', 'total_volume']
+            ]
+            .rename(columns={'row_count': 'total_sets'})
+        )
+        top_exercises = (
+            exercises.sort_values('total_sets', ascending=False, kind='stable')
+            .head(limit)
+            .reset_index(drop=True)
+        )
+        all_exercises = (
+            exercises[['exercise_name']]
+            .sort_values('exercise_name', na_position='first')
+            .reset_index(drop=True)
+        )
+
+        return {
+            'overview': overview,
+            'frequency': frequency,
+            'distribution': distribution,
+            'top_exercises': top_exercises,
+            'all_exercises': all_exercises
+        }
+
+
+class LocalParquetBackend(AnalyticsBackend):
+    """Run analytics in-process with pandas over a local Parquet mirror.
+
+    The mirror directory holds a ``workouts`` Parquet file or dataset directory.
+    The data is loaded once and reloaded only when files in the mirror change.
+    """
+
+    name = "local"
+
+    def __init__(self, mirror_dir: str, table_id: str = "workouts"):
+        """Initialize the backend with the mirror location.
+
+        Args:
+            mirror_dir: Directory containing the Parquet mirror
+            table_id: Name of the workouts table inside the mirror
+        """
+        self.mirror_dir = Path(mirror_dir)
+        self.table_id = table_id
+        self._lock = threading.Lock()
+        self._data: Optional[pd.DataFrame] = None
+        self._signature: Optional[Tuple] = None
+
+    @property
+    def table_path(self) -> Path:
+        """Path of the workouts Parquet file or dataset directory."""
+        directory = self.mirror_dir / self.table_id
+        if directory.exists():
+            return directory
+        return self.mirror_dir / f"{self.table_id}.parquet"
+
+    def _file_signature(self) -> Tuple:
+        """Describe mirror files by name, size and mtime to detect changes."""
+        path = self.table_path
+        if not path.exists():
+            raise FileNotFoundError(f"Parquet mirror not found: {path}")
+        files = [path] if path.is_file() else sorted(path.rglob('*.parquet'))
+        return tuple((str(f), f.stat().st_size, f.stat().st_mtime_ns) for f in files)
+
+    def get_data_version(self) -> str:
+        return hashlib.sha256(repr(self._file_signature()).encode('utf-8')).hexdigest()
+
+    def _load(self) -> pd.DataFrame:
+        """Get the workouts frame, reloading it if the mirror changed."""
+        with self._lock:
+            signature = self._file_signature()
+            if self._data is None or signature != self._signature:
+                df = pd.read_parquet(self.table_path)
+                df['date'] = pd.to_datetime(df['date'], utc=True)
+                self._data = df
+                self._signature = signature
+            return self._data
+
+    @staticmethod
+    def _volume(df: pd.DataFrame) -> pd.Series:
+        """Compute weight_kg * reps as float64, matching BigQuery FLOAT64 results."""
+        return (df['weight_kg'] * df['reps']).astype('float64')
+
+    @staticmethod
+    def _to_date(values) -> pd.Series:
+        """Convert timestamps to the dbdate dtype BigQuery returns for DATE()."""
+        return pd.Series(pd.to_datetime(values).date, dtype='dbdate')
+
+    def get_workout_overview(self) -> Dict[str, Any]:
+        df = self._load()
+        total_volume = self._volume(df).sum() if len(df) else 0
+        return {
+            'total_workouts': int(df['date'].dt.date.nunique()),
+            'total_exercises': int(len(df)),
+            'total_volume_kg': float(total_volume) or 0,
+            'unique_exercises': int(df['exercise_name'].nunique())
+        }
+
+    def get_workout_frequency_by_date(self) -> pd.DataFrame:
+        df = self._load()
+        result = (
+            df.groupby(df['date'].dt.date)['workout_name']
+            .nunique()
+            .sort_index()
+        )
+        return pd.DataFrame({
+            'date': self._to_date(result.index),
+            'workout_count': result.to_numpy().astype('int64')
+        }).astype({'workout_count': 'Int64'})
+
+    def get_muscle_group_distribution(self) -> pd.DataFrame:
+        df = self._load()
+        frames = []
+        for level in ('level1', 'level2'):
+            counts = df[f'muscle_group_{level}'].value_counts(dropna=False)
+            frames.append(pd.DataFrame({
+                'level': level,
+                'muscle_group': counts.index,
+                'exercise_count': counts.to_numpy()
+            }))
+        result = pd.concat(frames, ignore_index=True)
+        result = result.sort_values(['level', 'exercise_count'], ascending=[True, False],
+                                    kind='stable')
+        return result.reset_index(drop=True).astype({'exercise_count': 'Int64'})
+
+    def get_top_exercises(self, limit: int = 10) -> pd.DataFrame:
+        limit = clamp_parameter(limit, MAX_TOP_EXERCISES)
+        df = self._load()
+        grouped = df.assign(_volume=self._volume(df)).groupby('exercise_name', dropna=False)
+        result = pd.DataFrame({
+            'total_sets': grouped.size(),
+            'avg_weight': grouped['weight_kg'].mean(),
+            'max_weight': grouped['weight_kg'].max(),
+            'total_volume': grouped['_volume'].sum()
+        })
+        result = result.sort_values('total_sets', ascending=False, kind='stable').head(limit)
+        return result.reset_index().astype({'total_sets': 'Int64'})
+
+    def get_all_exercises(self) -> pd.DataFrame:
+        df = self._load()
+        names = pd.Series(df['exercise_name'].unique()).sort_values(ignore_index=True)
+        return pd.DataFrame({'exercise_name': names})
+
+    def get_exercise_performance(self, exercise_name: str) -> pd.DataFrame:
+        df = self._load()
+        rows = df[df['exercise_name'] == exercise_name]
+        grouped = rows.assign(_volume=self._volume(rows)).groupby(rows['date'].dt.date)
+        result = pd.DataFrame({
+            'max_weight': grouped['weight_kg'].max(),
+            'avg_weight': grouped['weight_kg'].mean(),
+            'total_volume': grouped['_volume'].sum(),
+            'total_sets': grouped.size()
+        }).sort_index()
+        result.insert(0, 'date', self._to_date(result.index).to_numpy())
+        return result.reset_index(drop=True).astype({'date': 'dbdate', 'total_sets': 'Int64'})
+
+    def get_rest_days(self, days: int = 30) -> pd.DataFrame:
+        days = clamp_parameter(days, MAX_REST_DAYS)
+        df = self._load()
+        today = current_utc_date()
+        workout_dates = set(df['date'].dt.date[df['date'].dt.date >= today - timedelta(days=days)])
+        dates = [today - timedelta(days=day) for day in range(days)]
+        return pd.DataFrame({
+            'date': pd.Series(dates, dtype='dbdate'),
+            'day_type': ['Workout' if date in workout_dates else 'Rest' for date in dates]
+        })
+
+    def check_table_exists(self) -> bool:
+        try:
+            return len(self._load()) > 0
+        except (FileNotFoundError, OSError):
+            return False
@@ -1,10 +1,18 @@
 """Common initialization and configuration for all Streamlit pages."""
-import streamlit as st
 from pathlib import Path
+
+import pandas as pd
+import streamlit as st
 from dotenv import load_dotenv
 from google.oauth2 import service_account
-from modules.config_loader import ConfigLoader
+
+from modules.analytics import WorkoutAnalytics
+from modules.analytics_backends import BigQueryBackend, LocalParquetBackend
 from modules.bigquery_uploader import BigQueryUploader
+from modules.config_loader import ConfigLoader
+from modules.exercise_series import ExerciseSeriesStore
+from modules.query_executor import configure_query_executor, get_query_executors
+from modules.result_cache import ResultCache
 
 # Load environment variables from .env file at repository root
 load_dotenv()
@@ -91,6 +99,7 @@ def get_bigquery_uploader(_config_loader: ConfigLoader):
             table_id=table_id,
             credentials=credentials
         )
+        configure_query_executor(uploader.client, bq_config.get('query', {}))
         return uploader
         
     except Exception as e:
@@ -98,6 +107,76 @@ def get_bigquery_uploader(_config_loader: ConfigLoader):
         return None
 
 
+@st.cache_resource
+def get_result_cache(_config_loader: ConfigLoader):
+    """Get the on-disk analytics result cache.
+    
+    Args:
+        _config_loader: ConfigLoader instance (underscore prefix prevents hashing)
+        
+    Returns:
+        ResultCache instance or None if disabled or initialization fails
+    """
+    if not _config_loader:
+        return None
+    
+    try:
+        cache_settings = _config_loader.get_bigquery_config().get('cache', {})
+        if not cache_settings.get('enabled', False):
+            return None
+        return ResultCache(
+            cache_dir=cache_settings.get('cache_dir', '.query_cache'),
+            max_bytes=cache_settings.get('max_bytes', 256 * 1024 * 1024)
+        )
+    except Exception as e:
+        st.warning(f"Result cache disabled: {e}")
+        return None
+
+
+@st.cache_resource
+def get_workout_analytics(_config_loader: ConfigLoader):
+    """Get cached WorkoutAnalytics bound to the uploader's client and the result cache.
+    
+    With mirror.use_for_analytics set and a synced mirror on disk, analytics
+    are computed from the local Parquet mirror instead.
+    
+    Args:
+        _config_loader: ConfigLoader instance (underscore prefix prevents hashing)
+        
+    Returns:
+        WorkoutAnalytics instance or None if BigQuery is not available
+    """
+    uploader = get_bigquery_uploader(_config_loader)
+    if not uploader:
+        return None
+    
+    bq_config = _config_loader.get_bigquery_config()
+    series_store = ExerciseSeriesStore(
+        uploader.client, uploader.project_id, uploader.dataset_id, uploader.table_id,
+        store_dir=bq_config.get('upload', {}).get('series_store_dir', '.series_store')
+    )
+    
+    mirror_settings = bq_config.get('mirror', {})
+    if mirror_settings.get('use_for_analytics', False):
+        mirror_dir = mirror_settings.get('mirror_dir', '.mirror')
+        backend = LocalParquetBackend(mirror_dir, uploader.table_id)
+        if backend.table_path.exists():
+            return WorkoutAnalytics(uploader.client, uploader.project_id, uploader.dataset_id,
+                                    backend=backend, series_store=series_store)
+        st.warning("Parquet mirror not synced yet, using BigQuery for analytics")
+    
+    cache_settings = bq_config.get('cache', {})
+    backend = BigQueryBackend(
+        uploader.client,
+        uploader.project_id,
+        uploader.dataset_id,
+        result_cache=get_result_cache(_config_loader),
+        version_check_seconds=cache_settings.get('version_check_seconds', 30)
+    )
+    return WorkoutAnalytics(uploader.client, uploader.project_id, uploader.dataset_id,
+                            backend=backend, series_store=series_store)
+
+
 def render_sidebar(config_loader: ConfigLoader = None):
     """Render sidebar with app information and status.
     
@@ -140,6 +219,8 @@ def render_sidebar(config_loader: ConfigLoader = None):
         except Exception as e:
             st.sidebar.error(f"Connection test failed: {e}")
 
+    render_query_profiler()
+
     st.sidebar.markdown("---")
     st.sidebar.subheader("About")
     st.sidebar.info(
@@ -151,6 +232,39 @@ def render_sidebar(config_loader: ConfigLoader = None):
     st.sidebar.caption("Version 1.0.0")
 
 
+def render_query_profiler():
+    """Render a sidebar panel with cost and latency of recent BigQuery queries."""
+    executors = get_query_executors()
+    if not executors:
+        return
+
+    totals = {}
+    history = []
+    for executor in executors:
+        for key, value in executor.get_summary().items():
+            totals[key] = totals.get(key, 0) + value
+        history.extend(executor.get_history())
+
+    st.sidebar.markdown("---")
+    with st.sidebar.expander("🔎 Query Profiler"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Queries", f"{totals['queries']:,}")
+            st.metric("Cache Hits", f"{totals['cache_hits']:,}")
+            st.metric("Coalesced", f"{totals['coalesced']:,}")
+        with col2:
+            st.metric("Billed", f"{totals['bytes_billed'] / 1e6:,.1f} MB")
+            st.metric("Query Time", f"{totals['wall_seconds']:.2f}s")
+
+        if history:
+            df = pd.DataFrame(history).sort_values('timestamp', ascending=False)
+            st.dataframe(
+                df[['label', 'wall_seconds', 'bytes_processed', 'bytes_billed', 'cache_hit',
+                    'slot_ms', 'job_id', 'error']],
+                hide_index=True
+            )
+
+
 def check_environment_vars(config_loader: ConfigLoader) -> tuple[bool, list[str]]:
     """Check if required environment variables are set.
     
@@ -0,0 +1,263 @@
+"""Parallel multi-file ingest of workout CSVs into BigQuery."""
+import glob
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from modules.bigquery_uploader import BigQueryUploader
+from modules.csv_parser import CSVParser
+from modules.data_enrichment import DataEnrichment
+
+
+def discover_files(patterns: List[str]) -> List[Path]:
+    """Expand directories and glob patterns into a sorted list of CSV files.
+
+    Args:
+        patterns: Directory paths, file paths or glob patterns
+
+    Returns:
+        Sorted, de-duplicated list of CSV file paths
+    """
+    files = set()
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            files.update(p for p in path.rglob('*.csv') if p.is_file())
+        else:
+            files.update(Path(p) for p in glob.glob(pattern, recursive=True) if Path(p).is_file())
+    return sorted(files)
+
+
+def parse_and_enrich_file(
+    path: str,
+    csv_schema: Dict[str, Any],
+    mapping_config: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Parse, validate and enrich a single CSV file (runs in a worker process).
+
+    Args:
+        path: CSV file path
+        csv_schema: CSV schema configuration
+        mapping_config: Exercise mapping configuration
+
+    Returns:
+        Dictionary with the enriched DataFrame (or None) and per-file statistics
+    """
+    start = time.perf_counter()
+    result = {
+        'path': path,
+        'bytes': os.path.getsize(path),
+        'df': None,
+        'rows': 0,
+        'errors': [],
+        'warnings': []
+    }
+
+    try:
+        parser = CSVParser(csv_schema)
+        df = parser.parse_csv(path)
+        result['errors'] = parser.get_validation_errors()
+        result['warnings'] = parser.get_warnings()
+
+        if not result['errors']:
+            result['df'] = DataEnrichment(mapping_config).enrich_dataframe(df)
+            result['rows'] = len(df)
+    except Exception as e:
+        result['errors'] = [str(e)]
+
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+class BatchIngestor:
+    """Ingest many CSV files with a process pool and coalesced load jobs."""
+
+    def __init__(
+        self,
+        uploader: BigQueryUploader,
+        csv_schema: Dict[str, Any],
+        mapping_config: Dict[str, Any],
+        state_path: str = ".ingest_state.json",
+        workers: Optional[int] = None,
+        coalesce_rows: int = 500_000
+    ):
+        """Initialize the batch ingestor.
+
+        Args:
+            uploader: Initialized BigQueryUploader, or None to parse without uploading
+            csv_schema: CSV schema configuration
+            mapping_config: Exercise mapping configuration
+            state_path: JSON file recording completed files for resuming
+            workers: Number of parser processes (defaults to CPU count)
+            coalesce_rows: Rows buffered before a load job is submitted
+        """
+        self.uploader = uploader
+        self.csv_schema = csv_schema
+        self.mapping_config = mapping_config
+        self.state_path = Path(state_path)
+        self.workers = workers
+        self.coalesce_rows = coalesce_rows
+        self.state = self._load_state()
+
+    def _load_state(self) -> Dict[str, Any]:
+        """Load resume state from disk.
+
+        Returns:
+            State dictionary with a 'completed' mapping of file path to fingerprint
+        """
+        if self.state_path.exists():
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        return {'completed': {}}
+
+    def _save_state(self):
+        """Atomically write resume state to disk."""
+        tmp_path = self.state_path.with_suffix(self.state_path.suffix + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def _file_fingerprint(path: Path) -> Dict[str, Any]:
+        """Describe a file by size and modification time.
+
+        Args:
+            path: File path
+
+        Returns:
+            Dictionary with size and mtime
+        """
+        stat = path.stat()
+        return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def is_completed(self, path: Path) -> bool:
+        """Check whether an unchanged file was already ingested.
+
+        Args:
+            path: File path
+
+        Returns:
+            True if the file was ingested and has not changed since
+        """
+        record = self.state['completed'].get(str(path))
+        if not record:
+            return False
+        fingerprint = self._file_fingerprint(path)
+        return record['size'] == fingerprint['size'] and record['mtime'] == fingerprint['mtime']
+
+    def run(
+        self,
+        files: List[Path],
+        on_file: Optional[Callable[[Dict[str, Any]], None]] = None,
+        on_upload: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """Parse files in parallel and upload them in coalesced batches.
+
+        Args:
+            files: CSV files to ingest
+            on_file: Callback invoked with per-file statistics as each file is parsed
+            on_upload: Callback invoked with the result of each load job
+
+        Returns:
+            Dictionary with aggregate ingest statistics
+        """
+        start = time.perf_counter()
+        pending = [path for path in files if not self.is_completed(path)]
+
+        summary = {
+            'files_total': len(files),
+            'files_skipped': len(files) - len(pending),
+            'files_parsed': 0,
+            'files_failed': [],
+            'files_uploaded': 0,
+            'rows_parsed': 0,
+            'rows_uploaded': 0,
+            'bytes_read': 0,
+            'load_jobs': 0,
+            'upload_errors': []
+        }
+
+        buffer: List[pd.DataFrame] = []
+        buffered_files: List[Dict[str, Any]] = []
+        buffered_rows = 0
+
+        def flush():
+            nonlocal buffer, buffered_files, buffered_rows
+            if not buffer:
+                return
+
+            if self.uploader is not None:
+                result = self.uploader.upload_dataframe(pd.concat(buffer, ignore_index=True))
+                summary['load_jobs'] += 1
+                if on_upload:
+                    on_upload(result)
+
+                if result.get('success'):
+                    summary['rows_uploaded'] += result.get('rows_uploaded', 0)
+                    summary['files_uploaded'] += len(buffered_files)
+                    for record in buffered_files:
+                        self.state['completed'][record['path']] = record['fingerprint']
+                    self._save_state()
+                else:
+                    summary['upload_errors'].append(result.get('error', 'Unknown error'))
+
+            buffer, buffered_files, buffered_rows = [], [], 0
+
+        def collect(result: Dict[str, Any]):
+            nonlocal buffered_rows
+            summary['bytes_read'] += result['bytes']
+
+            df = result.pop('df')
+            if on_file:
+                on_file(result)
+
+            if df is None:
+                summary['files_failed'].append(result['path'])
+                return
+
+            summary['files_parsed'] += 1
+            summary['rows_parsed'] += result['rows']
+            buffer.append(df)
+            buffered_files.append({
+                'path': result['path'],
+                'fingerprint': {
+                    **self._file_fingerprint(Path(result['path'])),
+                    'rows': result['rows']
+                }
+            })
+            buffered_rows += result['rows']
+
+            if buffered_rows >= self.coalesce_rows:
+                flush()
+
+        # Parsed frames wait in the pool until collected, so only keep a few
+        # files per worker in flight instead of submitting every file up front
+        max_in_flight = 2 * (self.workers or os.cpu_count() or 1)
+        queued = iter(pending)
+        in_flight = set()
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            while True:
+                for path in islice(queued, max_in_flight - len(in_flight)):
+                    in_flight.add(pool.submit(parse_and_enrich_file, str(path), self.csv_schema,
+                                              self.mapping_config))
+                if not in_flight:
+                    break
+
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    collect(future.result())
+
+        flush()
+
+        duration = time.perf_counter() - start
+        summary['duration_seconds'] = duration
+        summary['rows_per_second'] = summary['rows_parsed'] / duration if duration else 0.0
+        summary['mb_per_second'] = summary['bytes_read'] / 1e6 / duration if duration else 0.0
+        summary['success'] = not summary['files_failed'] and not summary['upload_errors']
+        return summary
@@ -1,10 +1,70 @@
 """BigQuery uploader module for uploading workout data to Google BigQuery."""
+import io
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 from google.cloud import bigquery
 from google.oauth2 import service_account
-from typing import Dict, Any, Optional
-from datetime import datetime
-import os
+
+from modules.daily_summary import DailySummaryManager, dates_in_dataframe
+from modules.data_version import bump_data_version
+from modules.exercise_series import ExerciseSeriesStore
+from modules.ingest_manifest import IngestManifest, compute_row_fingerprints
+from modules.query_executor import get_query_executor
+
+logger = logging.getLogger(__name__)
+
+# Arrow types used when building Parquet payloads from the configured schema
+BQ_TO_ARROW_TYPES = {
+    'STRING': pa.string(),
+    'INTEGER': pa.int64(),
+    'INT64': pa.int64(),
+    'FLOAT': pa.float64(),
+    'FLOAT64': pa.float64(),
+    'BOOLEAN': pa.bool_(),
+    'BOOL': pa.bool_(),
+    'TIMESTAMP': pa.timestamp('us', tz='UTC'),
+    'DATETIME': pa.timestamp('us'),
+    'DATE': pa.date32(),
+}
+
+# Columns stamped onto every upload by _add_metadata_columns
+METADATA_COLUMNS = ('upload_timestamp', 'data_source')
+
+# Per-row content hash used to skip or merge re-uploaded rows
+FINGERPRINT_COLUMN = 'row_fingerprint'
+
+# Legacy SQL type names reported by table schemas, spelled for DDL statements
+DDL_TYPES = {
+    'INTEGER': 'INT64',
+    'FLOAT': 'FLOAT64',
+    'BOOLEAN': 'BOOL',
+}
+
+
+def _arrow_to_bq_type(arrow_type: pa.DataType) -> str:
+    """Map an Arrow type to a BigQuery column type for unconfigured columns."""
+    if pa.types.is_boolean(arrow_type):
+        return 'BOOLEAN'
+    if pa.types.is_integer(arrow_type):
+        return 'INTEGER'
+    if pa.types.is_floating(arrow_type):
+        return 'FLOAT'
+    if pa.types.is_timestamp(arrow_type):
+        return 'TIMESTAMP' if arrow_type.tz else 'DATETIME'
+    if pa.types.is_date(arrow_type):
+        return 'DATE'
+    return 'STRING'
 
 
 class BigQueryUploader:
@@ -28,6 +88,18 @@ class BigQueryUploader:
         self.table_id: Optional[str] = None
         self.upload_stats: Dict[str, Any] = {}
         
+        # Local manifest of ingested files and row fingerprints for idempotent uploads
+        self.manifest: Optional[IngestManifest] = None
+        if self.upload_settings.get('deduplicate', False):
+            manifest_dir = self.upload_settings.get('manifest_dir', '.ingest_manifest')
+            self.manifest = IngestManifest(manifest_dir)
+        
+        # Created on first use once the client is initialized
+        self.daily_summary: Optional[DailySummaryManager] = None
+        self.exercise_series: Optional[ExerciseSeriesStore] = None
+        # Table version before the first load the series store has not been refreshed for
+        self._series_base_version: Optional[str] = None
+        
     def initialize_client(self, project_id: str, dataset_id: str, table_id: str, credentials=None) -> bool:
         """Initialize BigQuery client with credentials and connection info.
         
@@ -50,7 +122,7 @@ class BigQueryUploader:
                 credentials=credentials,
                 location=self.location
             )
-            self.client.query("SELECT 1").result()
+            get_query_executor(self.client).run("SELECT 1", label='connection_check')
             return True
         except Exception as e:
             raise Exception(f"Failed to initialize BigQuery client: {e}")
@@ -68,12 +140,8 @@ class BigQueryUploader:
         except Exception:
             pass # Table doesn't exist, create it below
         
-        schema = [
-            bigquery.SchemaField(field['name'], field['type'], mode=field.get('mode', 'NULLABLE'), description=field.get('description', ''))
-            for field in self.table_schema_config
-        ]
-        
-        table = bigquery.Table(table_ref, schema=schema)
+        table = bigquery.Table(table_ref, schema=self._bigquery_schema())
+        self._apply_table_layout(table)
         
         try:
             self.client.create_table(table)
@@ -81,25 +149,574 @@ class BigQueryUploader:
         except Exception as e:
             raise Exception(f"Failed to create BigQuery table: {e}")
     
-    def _add_metadata_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _bigquery_schema(self) -> List[bigquery.SchemaField]:
+        """Build BigQuery schema fields from the configured table schema."""
+        return [
+            bigquery.SchemaField(field['name'], field['type'], mode=field.get('mode', 'NULLABLE'),
+                                 description=field.get('description', ''))
+            for field in self.table_schema_config
+        ]
+    
+    def _table_layout(self) -> Dict[str, Any]:
+        """Read partitioning and clustering options from the configured table schema.
+        
+        A field with `partition: DAY|HOUR|MONTH|YEAR` becomes the time-partitioning
+        column; fields with `cluster: <n>` become clustering columns in order of n.
+        
+        Returns:
+            Dictionary with partition_field, partition_type and clustering_fields
+        """
+        partition_field = next((f for f in self.table_schema_config if f.get('partition')), None)
+        clustered = sorted(
+            (f for f in self.table_schema_config if f.get('cluster')),
+            key=lambda f: f['cluster']
+        )
+        return {
+            'partition_field': partition_field['name'] if partition_field else None,
+            'partition_type': (str(partition_field['partition']).upper()
+                               if partition_field else None),
+            'clustering_fields': [f['name'] for f in clustered][:4]  # BigQuery allows at most four
+        }
+    
+    def _apply_table_layout(self, table: bigquery.Table) -> bigquery.Table:
+        """Set the configured time partitioning and clustering on a table definition."""
+        layout = self._table_layout()
+        if layout['partition_field']:
+            table.time_partitioning = bigquery.TimePartitioning(
+                type_=layout['partition_type'],
+                field=layout['partition_field']
+            )
+        if layout['clustering_fields']:
+            table.clustering_fields = layout['clustering_fields']
+        return table
+    
+    def _has_table_layout(self, table: bigquery.Table) -> bool:
+        """Check whether an existing table already matches the configured layout."""
+        layout = self._table_layout()
+        partitioning = table.time_partitioning
+        if layout['partition_field']:
+            if partitioning is None or partitioning.field != layout['partition_field'] \
+                    or partitioning.type_ != layout['partition_type']:
+                return False
+        return list(table.clustering_fields or []) == layout['clustering_fields']
+    
+    def migrate_table_layout(self, keep_backup: bool = True) -> Dict[str, Any]:
+        """Rewrite the existing table with the configured partitioning and clustering.
+        
+        BigQuery cannot change the partitioning of an existing table, so rows are
+        copied into a new table with the target layout (keeping the current schema),
+        row counts are compared, and the tables are swapped by renaming.
+        
+        Ingest must be paused while this runs. Rows appended after the copy are
+        detected by recounting the original table once it is renamed out of the
+        way, and the migration is rolled back rather than losing them. Loads use
+        upload.create_disposition (CREATE_NEVER by default), so one that arrives
+        between the two renames fails instead of recreating the table without
+        the new layout. On any failure before the swap the original table is
+        restored and `<table>_partitioned` is dropped.
+        
+        Args:
+            keep_backup: Keep the original table as `<table>_unpartitioned_backup`
+            
+        Returns:
+            Dictionary with migration statistics
+        """
+        if not all([self.client, self.project_id, self.dataset_id, self.table_id]):
+            raise Exception("BigQuery client and connection info not initialized.")
+        
+        dataset_ref = f"{self.project_id}.{self.dataset_id}"
+        table_ref = f"{dataset_ref}.{self.table_id}"
+        new_id = f"{self.table_id}_partitioned"
+        backup_id = f"{self.table_id}_unpartitioned_backup"
+        timeout = self.upload_settings.get('timeout_seconds', 300)
+        
+        def run(query: str):
+            return get_query_executor(self.client).run(query, label='migrate_table_layout',
+                                                       timeout=timeout)
+        
+        def count_rows(ref: str) -> int:
+            return next(iter(run(f"SELECT COUNT(*) AS row_count FROM `{ref}`")))[0]
+        
+        created = renamed = swapped = False
+        try:
+            existing = self.client.get_table(table_ref)
+            if self._has_table_layout(existing):
+                return {'success': True, 'migrated': False, 'table': table_ref}
+            
+            new_table = self._apply_table_layout(
+                bigquery.Table(f"{dataset_ref}.{new_id}", schema=existing.schema)
+            )
+            self.client.create_table(new_table)
+            created = True
+            
+            columns = ', '.join(f"`{field.name}`" for field in existing.schema)
+            run(f"INSERT INTO `{dataset_ref}.{new_id}` ({columns}) "
+                f"SELECT {columns} FROM `{table_ref}`")
+            
+            source_rows = count_rows(table_ref)
+            copied_rows = count_rows(f"{dataset_ref}.{new_id}")
+            if source_rows != copied_rows:
+                raise Exception(f"Row count mismatch after copy: {source_rows} source "
+                                f"vs {copied_rows} copied")
+            
+            run(f"ALTER TABLE `{table_ref}` RENAME TO `{backup_id}`")
+            renamed = True
+            # Nothing can append to the original any more; anything since the count is a lost row
+            final_rows = count_rows(f"{dataset_ref}.{backup_id}")
+            if final_rows != copied_rows:
+                raise Exception(
+                    f"{final_rows - copied_rows} rows were appended during the migration; "
+                    f"pause ingest and run it again"
+                )
+            run(f"ALTER TABLE `{dataset_ref}.{new_id}` RENAME TO `{self.table_id}`")
+            swapped = True
+            if not keep_backup:
+                run(f"DROP TABLE `{dataset_ref}.{backup_id}`")
+            
+            return {
+                'success': True,
+                'migrated': True,
+                'rows_copied': copied_rows,
+                'table': table_ref,
+                'backup_table': f"{dataset_ref}.{backup_id}" if keep_backup else None,
+                'layout': self._table_layout()
+            }
+        except Exception as e:
+            error = str(e)
+            if not swapped:
+                try:
+                    if renamed:
+                        run(f"ALTER TABLE `{dataset_ref}.{backup_id}` RENAME TO `{self.table_id}`")
+                    if created:
+                        self.client.delete_table(f"{dataset_ref}.{new_id}", not_found_ok=True)
+                except Exception as cleanup_error:
+                    error = f"{error} (rollback failed: {cleanup_error})"
+            return {'success': False, 'error': error, 'table': table_ref}
+    
+    def _add_metadata_columns(self, df: pd.DataFrame,
+                              upload_time: Optional[pd.Timestamp] = None) -> pd.DataFrame:
         """Add metadata columns to dataframe before upload."""
         df = df.copy()
-        df['upload_timestamp'] = pd.Timestamp.now()
+        df['upload_timestamp'] = upload_time if upload_time is not None else pd.Timestamp.now()
         df['data_source'] = 'csv_upload'
         return df
     
+    def _build_arrow_table(self, df: pd.DataFrame, upload_time: pd.Timestamp) -> pa.Table:
+        """Build an Arrow table typed by the configured schema, including metadata columns.
+        
+        Columns are converted one at a time straight from the source frame, so
+        no intermediate copy of the DataFrame is made; numeric columns without
+        nulls are wrapped without copying.
+        
+        Args:
+            df: DataFrame to convert
+            upload_time: Value stamped into the upload_timestamp column
+            
+        Returns:
+            Arrow table with configured columns first, then any extra columns
+            
+        Raises:
+            pa.ArrowInvalid: If a value does not fit its configured type
+        """
+        num_rows = len(df)
+        metadata_values = {
+            'upload_timestamp': pa.array(
+                np.full(num_rows, upload_time.to_datetime64(), dtype='datetime64[us]')
+            ),
+            'data_source': pa.array(
+                np.full(num_rows, 'csv_upload', dtype=object), type=pa.string()
+            ),
+        }
+        
+        fields = []
+        arrays = []
+        configured = set()
+        
+        for field in self.table_schema_config:
+            name = field['name']
+            arrow_type = BQ_TO_ARROW_TYPES.get(field['type'].upper(), pa.string())
+            if name in metadata_values:
+                array = metadata_values[name].cast(arrow_type)
+            elif name in df.columns:
+                # Safe casts raise on truncation or overflow instead of silently corrupting values
+                array = pa.array(df[name], type=arrow_type, from_pandas=True, safe=True)
+            else:
+                continue
+            configured.add(name)
+            fields.append(pa.field(name, arrow_type, nullable=field.get('mode') != 'REQUIRED'))
+            arrays.append(array)
+        
+        for name in df.columns:
+            if name in configured:
+                continue
+            array = pa.array(df[name], from_pandas=True)
+            fields.append(pa.field(name, array.type))
+            arrays.append(array)
+        
+        return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+    
+    def _load_job_schema(self, table: pa.Table) -> List[bigquery.SchemaField]:
+        """Build the explicit load job schema for an Arrow table.
+        
+        Args:
+            table: Arrow table produced by _build_arrow_table
+            
+        Returns:
+            Configured schema fields present in the table plus inferred extra fields
+        """
+        configured = {field.name: field for field in self._bigquery_schema()}
+        return [
+            configured.get(field.name)
+            or bigquery.SchemaField(field.name, _arrow_to_bq_type(field.type))
+            for field in table.schema
+        ]
+    
+    def _serialize_parquet(self, table: pa.Table) -> bytes:
+        """Serialize an Arrow table to compressed Parquet bytes.
+        
+        Args:
+            table: Arrow table to serialize
+            
+        Returns:
+            Parquet file contents
+        """
+        compression = self.upload_settings.get('parquet_compression', 'snappy')
+        if compression in (None, 'none'):
+            compression = None
+        
+        buffer = pa.BufferOutputStream()
+        pq.write_table(table, buffer, compression=compression)
+        return buffer.getvalue().to_pybytes()
+    
     def _validate_schema(self, df: pd.DataFrame) -> bool:
         """Validate that DataFrame matches BigQuery schema."""
         required_fields = [field['name'] for field in self.table_schema_config if field.get('mode') == 'REQUIRED']
-        missing_fields = [field for field in required_fields if field not in df.columns]
+        available = set(df.columns) | set(METADATA_COLUMNS)
+        missing_fields = [field for field in required_fields if field not in available]
         
         if missing_fields:
             raise ValueError(f"DataFrame missing required fields: {', '.join(missing_fields)}")
         
         return True
     
-    def upload_dataframe(self, df: pd.DataFrame) -> Dict[str, Any]:
-        """Upload dataframe to BigQuery."""
+    def _fingerprint_columns(self, df: pd.DataFrame) -> List[str]:
+        """Get the configured data columns that define row identity.
+        
+        Args:
+            df: DataFrame to be uploaded
+            
+        Returns:
+            Configured column names present in df, excluding metadata columns
+        """
+        excluded = set(METADATA_COLUMNS) | {FINGERPRINT_COLUMN}
+        return [
+            field['name'] for field in self.table_schema_config
+            if field['name'] in df.columns and field['name'] not in excluded
+        ]
+    
+    def _load_batch(self, index: int, batch: pd.DataFrame, write_disposition: str,
+                    upload_time: pd.Timestamp, table_ref: str) -> Dict[str, Any]:
+        """Serialize and load one batch, retrying failed load jobs.
+        
+        Args:
+            index: Batch number used in reporting
+            batch: Slice of the DataFrame to load
+            write_disposition: Write disposition for this batch's load job
+            upload_time: Value stamped into the upload_timestamp column
+            table_ref: Fully qualified destination table
+            
+        Returns:
+            Dictionary with batch rows, bytes, duration, retries and outcome
+        """
+        load_format = self.upload_settings.get('load_format', 'dataframe')
+        timeout = self.upload_settings.get('timeout_seconds', 300)
+        max_retries = self.upload_settings.get('max_retries', 3)
+        backoff = self.upload_settings.get('retry_backoff_seconds', 1.0)
+        create_disposition = self.upload_settings.get('create_disposition', 'CREATE_IF_NEEDED')
+        staged = table_ref != f"{self.project_id}.{self.dataset_id}.{self.table_id}"
+        
+        stats = {
+            'batch': index,
+            'rows': len(batch),
+            'bytes': None,
+            'retries': 0,
+            'success': False
+        }
+        start = time.perf_counter()
+        
+        # Serialize once; retries resend the same payload
+        serialize_start = time.perf_counter()
+        if load_format == 'parquet':
+            try:
+                table = self._build_arrow_table(batch, upload_time)
+            except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                # Bad values fail the batch like a rejected load job; retrying cannot help
+                stats['error'] = f"Failed to convert batch to the table schema: {e}"
+                stats['serialize_seconds'] = time.perf_counter() - serialize_start
+                stats['duration_seconds'] = time.perf_counter() - start
+                return stats
+            payload = self._serialize_parquet(table)
+            stats['bytes'] = len(payload)
+        else:
+            batch = self._add_metadata_columns(batch, upload_time)
+        stats['serialize_seconds'] = time.perf_counter() - serialize_start
+        
+        for attempt in range(max_retries + 1):
+            job_config = bigquery.LoadJobConfig(
+                write_disposition=write_disposition,
+                # Staging tables are created by their first load
+                create_disposition='CREATE_IF_NEEDED' if staged else create_disposition
+            )
+            if write_disposition == 'WRITE_APPEND':
+                # Tables created before a column was configured (row_fingerprint, the
+                # enrichment columns) gain it on the first append that carries it
+                job_config.schema_update_options = [
+                    bigquery.SchemaUpdateOption.ALLOW_FIELD_ADDITION
+                ]
+            try:
+                if load_format == 'parquet':
+                    job_config.source_format = bigquery.SourceFormat.PARQUET
+                    job_config.schema = self._load_job_schema(table)
+                    job = self.client.load_table_from_file(io.BytesIO(payload), table_ref,
+                                                           job_config=job_config)
+                else:
+                    job = self.client.load_table_from_dataframe(batch, table_ref,
+                                                                job_config=job_config)
+                
+                job.result(timeout=timeout)
+                stats['job_id'] = getattr(job, 'job_id', None)
+                stats['success'] = True
+                stats.pop('error', None)
+                break
+            except FuturesTimeoutError as e:
+                # The job may still complete server-side; retrying could duplicate rows
+                stats['error'] = f"Load job timed out after {timeout}s: {e}"
+                break
+            except Exception as e:
+                stats['error'] = str(e)
+                if attempt < max_retries:
+                    stats['retries'] += 1
+                    time.sleep(backoff * (2 ** attempt))
+        
+        stats['duration_seconds'] = time.perf_counter() - start
+        return stats
+    
+    def _load_batches(self, df: pd.DataFrame, table_ref: str, write_disposition: str,
+                      upload_time: pd.Timestamp) -> List[Dict[str, Any]]:
+        """Split a frame into batches and load them with bounded concurrency.
+        
+        Args:
+            df: DataFrame to load
+            table_ref: Fully qualified destination table
+            write_disposition: Write disposition for the upload
+            upload_time: Value stamped into the upload_timestamp column
+            
+        Returns:
+            List of per-batch statistics from _load_batch
+        """
+        batch_size = self.upload_settings.get('batch_size') or len(df)
+        max_workers = max(1, self.upload_settings.get('max_concurrent_jobs', 4))
+        batches = [df.iloc[i:i + batch_size] for i in range(0, len(df), batch_size)]
+        batch_results = []
+        
+        # Truncating or write-empty dispositions apply to the first batch only;
+        # it must finish before the remaining batches append to the table
+        if write_disposition != 'WRITE_APPEND':
+            batch_results.append(
+                self._load_batch(0, batches[0], write_disposition, upload_time, table_ref)
+            )
+            if not batch_results[0]['success']:
+                return batch_results
+            remaining = list(enumerate(batches))[1:]
+        else:
+            remaining = list(enumerate(batches))
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(self._load_batch, index, batch, 'WRITE_APPEND', upload_time, table_ref)
+                for index, batch in remaining
+            ]
+            batch_results.extend(future.result() for future in futures)
+        
+        return batch_results
+    
+    def _merge_from_staging(self, staging_ref: str, table_ref: str, columns: List[str]) -> int:
+        """Insert staged rows whose fingerprint is not yet in the target table.
+        
+        Tables created before a column was configured, such as row_fingerprint
+        or the enrichment columns, lack it (only appends add columns), so
+        missing columns are added first with their staged types.
+        
+        Args:
+            staging_ref: Fully qualified staging table
+            table_ref: Fully qualified target table
+            columns: Columns to insert
+            
+        Returns:
+            Number of rows inserted by the MERGE
+        """
+        executor = get_query_executor(self.client)
+        timeout = self.upload_settings.get('timeout_seconds', 300)
+        
+        target_columns = {field.name for field in self.client.get_table(table_ref).schema}
+        missing = [column for column in columns if column not in target_columns]
+        if missing:
+            staged_schema = self.client.get_table(staging_ref).schema
+            staged_types = {field.name: field.field_type for field in staged_schema}
+            additions = ', '.join(
+                f"ADD COLUMN IF NOT EXISTS `{column}` "
+                f"{DDL_TYPES.get(staged_types[column], staged_types[column])}"
+                for column in missing
+            )
+            executor.run_job(
+                f"ALTER TABLE `{table_ref}` {additions}",
+                label='dedup_merge:add_columns', timeout=timeout
+            )
+        
+        column_list = ', '.join(f"`{column}`" for column in columns)
+        source_list = ', '.join(f"S.`{column}`" for column in columns)
+        merge_query = f"""
+        MERGE `{table_ref}` T
+        USING `{staging_ref}` S
+        ON T.{FINGERPRINT_COLUMN} = S.{FINGERPRINT_COLUMN}
+        WHEN NOT MATCHED THEN
+          INSERT ({column_list}) VALUES ({source_list})
+        """
+        job = executor.run_job(merge_query, label='dedup_merge', timeout=timeout)
+        return job.num_dml_affected_rows or 0
+    
+    def _record_fingerprints(self, fingerprints: np.ndarray, batch_results: List[Dict[str, Any]],
+                             batch_size: int, staged: bool, replaces_table: bool):
+        """Record the fingerprints of rows that reached the target table in the manifest.
+        
+        Direct loads record every successful batch even if others failed, so
+        a retry of a partly failed upload skips the rows that already landed.
+        Staged rows only reach the target through the MERGE, so they are
+        recorded all at once, and only if it ran.
+        
+        Args:
+            fingerprints: Fingerprints of the loaded frame, in row order
+            batch_results: Per-batch statistics from _load_batches
+            batch_size: Rows per batch
+            staged: The batches were loaded into a staging table for the MERGE
+            replaces_table: The load replaced the table contents
+        """
+        ok = sorted(result['batch'] for result in batch_results if result['success'])
+        if staged:
+            # The MERGE only runs once every batch is staged
+            if len(ok) < -(-len(fingerprints) // batch_size):
+                return
+            landed = fingerprints
+        elif ok:
+            landed = np.concatenate([fingerprints[i * batch_size:(i + 1) * batch_size] for i in ok])
+        else:
+            return
+        
+        if replaces_table:
+            self.manifest.replace_fingerprints(landed)
+        else:
+            self.manifest.add_fingerprints(landed)
+    
+    def _refresh_daily_summary(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Recompute daily_workout_summary rows for the dates in an uploaded frame.
+        
+        Args:
+            df: Rows that were just uploaded
+            
+        Returns:
+            Refresh statistics from DailySummaryManager
+        """
+        if self.daily_summary is None:
+            self.daily_summary = DailySummaryManager(
+                self.client, self.project_id, self.dataset_id, self.table_id,
+                timeout_seconds=self.upload_settings.get('timeout_seconds', 300)
+            )
+        return self.daily_summary.refresh_dates(dates_in_dataframe(df))
+    
+    def _refresh_exercise_series(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Update the local exercise series store for the exercises in an uploaded frame.
+        
+        Args:
+            df: Rows that were just uploaded
+            
+        Returns:
+            Refresh statistics from ExerciseSeriesStore
+        """
+        base_version, self._series_base_version = self._series_base_version, None
+        return self._exercise_series_store().refresh(df, base_version=base_version)
+    
+    def _exercise_series_store(self) -> ExerciseSeriesStore:
+        """Get the local exercise series store, creating it on first use."""
+        if self.exercise_series is None:
+            self.exercise_series = ExerciseSeriesStore(
+                self.client, self.project_id, self.dataset_id, self.table_id,
+                store_dir=self.upload_settings.get('series_store_dir', '.series_store')
+            )
+        return self.exercise_series
+    
+    def _observe_series_base_version(self):
+        """Record the table version before the first load of a not yet refreshed upload.
+        
+        The series store compares it with the version it is synced to, to tell
+        whether this upload is the only change it has not seen.
+        """
+        if self._series_base_version is not None:
+            return
+        try:
+            tracker = self._exercise_series_store().version_tracker
+            self._series_base_version = tracker.current(force=True)
+        except Exception as e:
+            # Without a base version the refresh just leaves untouched series to rebuild
+            logger.warning(f"Could not read table version before upload: {e}")
+    
+    def refresh_derived_data(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Refresh the derived tables enabled in upload settings for uploaded rows.
+        
+        Args:
+            df: Uploaded rows; only the date and exercise_name columns are read
+            
+        Returns:
+            Dictionary with 'daily_summary' and 'exercise_series' refresh
+            statistics for the refreshes that are enabled
+        """
+        results = {}
+        if self.upload_settings.get('refresh_daily_summary', False):
+            results['daily_summary'] = self._refresh_daily_summary(df)
+        if self.upload_settings.get('refresh_exercise_series', False):
+            results['exercise_series'] = self._refresh_exercise_series(df)
+        return results
+    
+    def upload_dataframe(self, df: pd.DataFrame, write_disposition: Optional[str] = None,
+                         refresh: bool = True) -> Dict[str, Any]:
+        """Upload dataframe to BigQuery in concurrent batched load jobs.
+        
+        The frame is split into upload.batch_size rows per load job, and at most
+        upload.max_concurrent_jobs jobs run at once. A failed batch is retried on
+        its own up to upload.max_retries times.
+        
+        With upload.deduplicate enabled each row gets a content fingerprint.
+        The 'manifest' strategy drops rows already recorded in the local manifest
+        before loading; the 'merge' strategy loads into a staging table and
+        MERGEs only unseen fingerprints into the target table. Deduplication
+        only applies to WRITE_APPEND: a WRITE_TRUNCATE or WRITE_EMPTY load
+        replaces the table contents, so every row is loaded with the configured
+        disposition and the manifest is reset to the loaded fingerprints.
+        
+        With upload.refresh_daily_summary enabled, the daily_workout_summary
+        rows for the uploaded dates are recomputed after a successful load.
+        With upload.refresh_exercise_series enabled, the local per-exercise
+        series store is updated for the uploaded exercises as well.
+        
+        Args:
+            df: Rows to upload
+            write_disposition: Overrides upload.write_disposition for this upload
+            refresh: Run the derived-table refreshes; callers uploading one
+                stream in several calls pass False and call
+                refresh_derived_data once at the end
+            
+        Returns:
+            Dictionary with upload statistics
+        """
         if not self.client:
             raise Exception("BigQuery client not initialized.")
         
@@ -107,7 +724,6 @@ class BigQueryUploader:
             return {'success': False, 'error': 'DataFrame is empty', 'rows_uploaded': 0}
         
         start_time = datetime.now()
-        df = self._add_metadata_columns(df)
         
         try:
             self._validate_schema(df)
@@ -115,30 +731,111 @@ class BigQueryUploader:
             return {'success': False, 'error': str(e), 'rows_uploaded': 0}
         
         table_ref = f"{self.project_id}.{self.dataset_id}.{self.table_id}"
-        
-        job_config = bigquery.LoadJobConfig(
-            write_disposition=self.upload_settings.get('write_disposition', 'WRITE_APPEND'),
-            create_disposition=self.upload_settings.get('create_disposition', 'CREATE_IF_NEEDED')
-        )
+        load_format = self.upload_settings.get('load_format', 'dataframe')
+        write_disposition = (write_disposition
+                             or self.upload_settings.get('write_disposition', 'WRITE_APPEND'))
+        dedup_strategy = (self.upload_settings.get('dedup_strategy', 'manifest')
+                          if self.manifest else None)
+        # Rows already in a table that is about to be replaced are not duplicates
+        replaces_table = write_disposition != 'WRITE_APPEND'
+        upload_time = pd.Timestamp.now()
+        rows_skipped = 0
         
         try:
-            job = self.client.load_table_from_dataframe(df, table_ref, job_config=job_config)
-            timeout = self.upload_settings.get('timeout_seconds', 300)
-            job.result(timeout=timeout)
+            if dedup_strategy:
+                fingerprints = compute_row_fingerprints(df, self._fingerprint_columns(df))
+                df = df.assign(**{FINGERPRINT_COLUMN: fingerprints})
+                if replaces_table:
+                    dedup_strategy = None
+                
+                if dedup_strategy == 'manifest':
+                    new_rows = self.manifest.filter_new(fingerprints)
+                    rows_skipped = int((~new_rows).sum())
+                    df = df[new_rows]
+                    fingerprints = fingerprints[new_rows]
+            
+            if df.empty:
+                self.upload_stats = {
+                    'success': True,
+                    'rows_uploaded': 0,
+                    'rows_skipped': rows_skipped,
+                    'duration_seconds': (datetime.now() - start_time).total_seconds(),
+                    'table': table_ref,
+                    'timestamp': datetime.now().isoformat(),
+                    'batch_count': 0,
+                    'batches': []
+                }
+                return self.upload_stats
+            
+            if self.upload_settings.get('refresh_exercise_series', False):
+                self._observe_series_base_version()
+            
+            staging_ref = None
+            if dedup_strategy == 'merge':
+                # Unique per upload so concurrent uploads never overwrite each other's rows
+                suffix = self.upload_settings.get('staging_suffix', '_staging')
+                staging_ref = f"{table_ref}{suffix}_{uuid.uuid4().hex[:12]}"
+                batch_results = self._load_batches(df, staging_ref, 'WRITE_TRUNCATE', upload_time)
+            else:
+                batch_results = self._load_batches(df, table_ref, write_disposition, upload_time)
+            
+            batch_size = self.upload_settings.get('batch_size') or len(df)
+            batch_count = -(-len(df) // batch_size)
+            failed = [result for result in batch_results if not result['success']]
+            success = not failed and len(batch_results) == batch_count
+            rows_uploaded = sum(result['rows'] for result in batch_results if result['success'])
+            
+            if staging_ref:
+                try:
+                    if success:
+                        columns = list(df.columns) + [
+                            c for c in METADATA_COLUMNS if c not in df.columns
+                        ]
+                        rows_uploaded = self._merge_from_staging(staging_ref, table_ref, columns)
+                        rows_skipped = len(df) - rows_uploaded
+                    else:
+                        rows_uploaded = 0
+                finally:
+                    self.client.delete_table(staging_ref, not_found_ok=True)
+            
+            if self.manifest:
+                self._record_fingerprints(fingerprints, batch_results, batch_size,
+                                          staged=staging_ref is not None,
+                                          replaces_table=replaces_table)
+            
+            if rows_uploaded:
+                # Invalidate analytics caches in this process right away
+                bump_data_version(table_ref)
             
             end_time = datetime.now()
             duration = (end_time - start_time).total_seconds()
+            sent = [result['bytes'] for result in batch_results if result['bytes'] is not None]
             
             self.upload_stats = {
-                'success': True,
-                'rows_uploaded': len(df),
+                'success': success,
+                'rows_uploaded': rows_uploaded,
+                'rows_skipped': rows_skipped,
                 'duration_seconds': duration,
                 'table': table_ref,
-                'timestamp': end_time.isoformat()
+                'timestamp': end_time.isoformat(),
+                'load_format': load_format,
+                'serialize_seconds': sum(result['serialize_seconds'] for result in batch_results),
+                'bytes_sent': sum(sent) if sent else None,
+                'batch_count': batch_count,
+                'retries': sum(result['retries'] for result in batch_results),
+                'batches': batch_results
             }
+            if not success:
+                errors = [f"batch {result['batch']}: {result.get('error')}" for result in failed]
+                self.upload_stats['error'] = '; '.join(errors) or 'Upload incomplete'
+                # Rows that landed may never be refreshed; the store must not assume it saw them
+                self._series_base_version = None
+            elif rows_uploaded and refresh:
+                self.upload_stats.update(self.refresh_derived_data(df))
             return self.upload_stats
             
         except Exception as e:
+            self._series_base_version = None
             self.upload_stats = {'success': False, 'error': str(e), 'rows_uploaded': 0}
             return self.upload_stats
     
@@ -155,7 +852,7 @@ class BigQueryUploader:
             return results
         
         try:
-            self.client.query("SELECT 1").result()
+            get_query_executor(self.client).run("SELECT 1", label='test_connection')
             results['can_query'] = True
         except Exception as e:
             results['query_error'] = str(e)
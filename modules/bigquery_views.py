@@ -5,6 +5,8 @@ from typing import Dict, List, Optional
 import logging
 import os
 
+from modules.query_executor import get_query_executor
+
 logger = logging.getLogger(__name__)
 
 
@@ -23,6 +25,7 @@ class BigQueryViewManager:
         self.project_id = project_id
         self.dataset_id = dataset_id
         self.sql_dir = Path("sql/views")
+        self.executor = get_query_executor(client)
     
     def load_view_sql(self, view_name: str, table_id: str = "workouts") -> str:
         """Load SQL definition from file and substitute placeholders.
@@ -74,8 +77,7 @@ class BigQueryViewManager:
             ddl_query = f"CREATE OR REPLACE VIEW `{view_id}` AS\n{view_sql}"
             
             logger.info(f"Creating/updating view: {view_id}")
-            query_job = self.client.query(ddl_query)
-            query_job.result()  # Wait for completion
+            self.executor.run(ddl_query, label=f"view:{view_name}")
             
             logger.info(f"Successfully created/updated view: {view_name}")
             return True
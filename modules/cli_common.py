@@ -0,0 +1,55 @@
+"""Common initialization for the command line scripts."""
+import os
+import sys
+
+from google.oauth2 import service_account
+
+from modules.bigquery_uploader import BigQueryUploader
+from modules.config_loader import ConfigLoader
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def create_uploader(config_loader: ConfigLoader) -> BigQueryUploader:
+    """Create an initialized BigQuery uploader from environment configuration."""
+    bq_config = config_loader.get_bigquery_config()
+    table_schema = bq_config.get('table_schema', [])
+    upload_settings = bq_config.get('upload', {})
+    location = bq_config.get('connection', {}).get('location', 'europe-north1')
+
+    project_id = os.getenv('GCP_PROJECT_ID')
+    dataset_id = os.getenv('BQ_DATASET_ID', 'workout_data')
+    table_id = os.getenv('BQ_TABLE_ID', 'workouts')
+
+    # Try to use the terraform-generated service account key first
+    creds_file = os.path.join(REPO_ROOT, 'terraform', 'keys', 'service-account-key.json')
+    if not os.path.exists(creds_file):
+        # Fallback to environment variable
+        creds_file = os.getenv('GOOGLE_APPLICATION_CREDENTIALS')
+
+    if not all([project_id, creds_file]):
+        print("❌ Missing required environment variables:")
+        print("  - GCP_PROJECT_ID")
+        print("  - Service account key not found at terraform/keys/service-account-key.json")
+        print("  - GOOGLE_APPLICATION_CREDENTIALS not set")
+        sys.exit(1)
+
+    print(f"📊 Project: {project_id}")
+    print(f"📊 Dataset: {dataset_id}")
+    print(f"📊 Table: {table_id}")
+    print()
+
+    credentials = service_account.Credentials.from_service_account_file(creds_file)
+    uploader = BigQueryUploader(
+        table_schema=table_schema,
+        upload_settings=upload_settings,
+        location=location
+    )
+    uploader.initialize_client(
+        project_id=project_id,
+        dataset_id=dataset_id,
+        table_id=table_id,
+        credentials=credentials
+    )
+    uploader.create_table_if_not_exists()
+    return uploader
@@ -1,9 +1,12 @@
 """CSV parser with flexible column mapping and validation."""
 import io
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 
 import pandas as pd
 
+# Default number of rows per chunk for streaming parsing
+DEFAULT_CHUNKSIZE = 100_000
+
 
 class CSVParser:
     """Parse and validate CSV files based on schema configuration."""
@@ -18,6 +21,40 @@ class CSVParser:
         self.errors: List[str] = []
         self.warnings: List[str] = []
         self.column_mappings: Dict[str, str] = {}
+        # Validation issues keyed on (level, message template) with accumulated counts,
+        # so repeated issues across chunks collapse into a single message
+        self._issues: Dict[Tuple[str, str], Optional[int]] = {}
+
+    def _reset(self):
+        """Clear validation state before parsing a new file."""
+        self.errors = []
+        self.warnings = []
+        self.column_mappings = {}
+        self._issues = {}
+
+    def _add_issue(self, level: str, template: str, count: Optional[int] = None):
+        """Record a validation issue and refresh the error/warning lists.
+        
+        Args:
+            level: 'error' or 'warning'
+            template: Message text; '{count}' is replaced with the accumulated count
+            count: Number of affected values, summed across calls with the same template
+        """
+        key = (level, template)
+        if count is not None:
+            count = int(count) + (self._issues.get(key) or 0)
+        self._issues[key] = count
+
+        self.errors = []
+        self.warnings = []
+        for (issue_level, issue_template), issue_count in self._issues.items():
+            message = issue_template
+            if issue_count is not None:
+                message = message.replace('{count}', str(issue_count))
+            if issue_level == 'error':
+                self.errors.append(message)
+            else:
+                self.warnings.append(message)
 
     def parse_csv(self, file: Union[str, io.BytesIO]) -> pd.DataFrame:
         """Parse and validate a CSV file.
@@ -31,9 +68,7 @@ class CSVParser:
         Raises:
             ValueError: If validation fails critically
         """
-        self.errors = []
-        self.warnings = []
-        self.column_mappings = {}
+        self._reset()
 
         # Read CSV file
         try:
@@ -71,6 +106,74 @@ class CSVParser:
 
         return df
 
+    def iter_parse_csv(
+        self,
+        file: Union[str, io.BytesIO],
+        chunksize: int = DEFAULT_CHUNKSIZE
+    ) -> Iterator[pd.DataFrame]:
+        """Parse and validate a CSV file in chunks.
+        
+        The column mapping is resolved once from the header; each chunk is then
+        converted and validated as it is read, so peak memory is bounded by the
+        chunk size. Errors and warnings accumulate across chunks and are complete
+        once the generator is exhausted.
+        
+        Args:
+            file: File path or file-like object
+            chunksize: Number of rows per chunk
+            
+        Yields:
+            Cleaned and validated pandas DataFrame chunks
+            
+        Raises:
+            ValueError: If validation fails critically
+        """
+        self._reset()
+        strict_mode = self.schema.get('strict_mode', False)
+
+        try:
+            reader = pd.read_csv(file, chunksize=chunksize)
+        except Exception as e:
+            raise ValueError(f"Failed to read CSV file: {e}")
+
+        rename_map: Optional[Dict[str, str]] = None
+        total_rows = 0
+
+        with reader:
+            while True:
+                try:
+                    chunk = next(reader)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    raise ValueError(f"Failed to read CSV file: {e}")
+
+                if rename_map is None:
+                    # Resolve column mapping once from the header
+                    mapped = self._map_columns(self._clean_column_names(chunk))
+                    rename_map = dict(zip(chunk.columns, mapped.columns))
+                    chunk = mapped
+                    self._validate_required_columns(chunk)
+                    chunk = self._add_optional_columns(chunk)
+
+                    if strict_mode and self.errors:
+                        raise ValueError(f"Validation failed: {'; '.join(self.errors)}")
+                else:
+                    chunk = chunk.rename(columns=rename_map)
+                    chunk = self._add_optional_columns(chunk, record_warnings=False)
+
+                chunk = self._validate_data_types(chunk)
+                self._validate_constraints(chunk)
+                total_rows += len(chunk)
+
+                if strict_mode and self.errors:
+                    raise ValueError(f"Validation failed: {'; '.join(self.errors)}")
+
+                yield chunk
+
+        if total_rows == 0:
+            raise ValueError("CSV file is empty")
+
     def _clean_column_names(self, df: pd.DataFrame) -> pd.DataFrame:
         """Clean column names to use lowercase and underscores only.
         
@@ -165,13 +268,14 @@ class CSVParser:
         missing_cols = [col for col in required_cols if col not in df.columns]
 
         if missing_cols:
-            self.errors.append(f"Missing required columns: {', '.join(missing_cols)}")
+            self._add_issue('error', f"Missing required columns: {', '.join(missing_cols)}")
 
-    def _add_optional_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _add_optional_columns(self, df: pd.DataFrame, record_warnings: bool = True) -> pd.DataFrame:
         """Add optional columns with default values if not present.
         
         Args:
             df: DataFrame to process
+            record_warnings: Whether to record a warning for each added column
             
         Returns:
             DataFrame with optional columns added
@@ -182,8 +286,9 @@ class CSVParser:
             if col_name not in df.columns:
                 default_value = config.get('default')
                 df[col_name] = default_value
-                if default_value is not None:
-                    self.warnings.append(f"Added column '{col_name}' with default value: {default_value}")
+                if default_value is not None and record_warnings:
+                    self._add_issue('warning', f"Added column '{col_name}' "
+                                               f"with default value: {default_value}")
 
         return df
 
@@ -212,18 +317,28 @@ class CSVParser:
                     # Check for NaN values after conversion
                     null_count = df[col_name].isna().sum()
                     if null_count > 0:
-                        self.errors.append(f"Column '{col_name}': {null_count} values could not be converted to integer")
+                        self._add_issue(
+                            'error',
+                            f"Column '{col_name}': {{count}} values could not be converted "
+                            "to integer",
+                            null_count
+                        )
                 elif dtype == 'float':
                     df[col_name] = pd.to_numeric(df[col_name], errors='coerce')
                     null_count = df[col_name].isna().sum()
                     if null_count > 0:
-                        self.errors.append(f"Column '{col_name}': {null_count} values could not be converted to float")
+                        self._add_issue(
+                            'error',
+                            f"Column '{col_name}': {{count}} values could not be converted "
+                            "to float",
+                            null_count
+                        )
                 elif dtype == 'string':
                     df[col_name] = df[col_name].astype(str)
                     # Replace 'nan' string with empty string
                     df[col_name] = df[col_name].replace('nan', '')
             except Exception as e:
-                self.errors.append(f"Error converting column '{col_name}' to {dtype}: {e}")
+                self._add_issue('error', f"Error converting column '{col_name}' to {dtype}: {e}")
 
         return df
 
@@ -274,8 +389,10 @@ class CSVParser:
                 min_val = validation['min']
                 below_min = df[df[col_name] < min_val]
                 if not below_min.empty:
-                    self.errors.append(
-                        f"Column '{col_name}': {len(below_min)} values below minimum {min_val}"
+                    self._add_issue(
+                        'error',
+                        f"Column '{col_name}': {{count}} values below minimum {min_val}",
+                        len(below_min)
                     )
 
             # Check max value
@@ -283,24 +400,30 @@ class CSVParser:
                 max_val = validation['max']
                 above_max = df[df[col_name] > max_val]
                 if not above_max.empty:
-                    self.errors.append(
-                        f"Column '{col_name}': {len(above_max)} values above maximum {max_val}"
+                    self._add_issue(
+                        'error',
+                        f"Column '{col_name}': {{count}} values above maximum {max_val}",
+                        len(above_max)
                     )
 
             # Check for null values in required columns
             if col_name in self.schema['required_columns']:
                 null_count = df[col_name].isna().sum()
                 if null_count > 0:
-                    self.errors.append(
-                        f"Column '{col_name}': {null_count} null values found (required field)"
+                    self._add_issue(
+                        'error',
+                        f"Column '{col_name}': {{count}} null values found (required field)",
+                        null_count
                     )
 
         # Validate date is not in the future
         if 'date' in df.columns:
             future_dates = df[df['date'] > pd.Timestamp.now()]
             if not future_dates.empty:
-                self.warnings.append(
-                    f"Found {len(future_dates)} entries with future dates"
+                self._add_issue(
+                    'warning',
+                    "Found {count} entries with future dates",
+                    len(future_dates)
                 )
 
     def get_validation_errors(self) -> List[str]:
@@ -0,0 +1,180 @@
+"""Incrementally maintained daily workout summary table."""
+import logging
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+import pandas as pd
+from google.cloud import bigquery
+
+from modules.query_executor import get_query_executor
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_TABLE_ID = "daily_workout_summary"
+
+
+def dates_in_dataframe(df: pd.DataFrame, date_column: str = "date") -> List[date]:
+    """Get the distinct UTC calendar dates covered by a workout DataFrame.
+
+    BigQuery stores the workout date as a TIMESTAMP and the summary keys on
+    DATE(date), which is evaluated in UTC, so naive values are taken as UTC.
+
+    Args:
+        df: Workout DataFrame
+        date_column: Name of the timestamp column
+
+    Returns:
+        Sorted list of distinct dates
+    """
+    if df.empty or date_column not in df.columns:
+        return []
+
+    timestamps = pd.to_datetime(df[date_column], errors='coerce', utc=True).dropna()
+    return sorted(set(timestamps.dt.date))
+
+
+class DailySummaryManager:
+    """Maintain the daily_workout_summary table behind the KPI view.
+
+    The table holds one row per (workout_date, workout_category) with the
+    exercise count and total volume for that day. After each upload only the
+    dates present in the uploaded rows are recomputed and MERGEd, so the cost
+    of keeping it current does not grow with history.
+    """
+
+    def __init__(self, client: bigquery.Client, project_id: str, dataset_id: str,
+                 table_id: str = "workouts", timeout_seconds: int = 300):
+        """Initialize summary manager.
+
+        Args:
+            client: BigQuery client instance
+            project_id: GCP project ID
+            dataset_id: BigQuery dataset ID
+            table_id: Source workouts table ID
+            timeout_seconds: Maximum seconds to wait for each query
+        """
+        self.client = client
+        self.project_id = project_id
+        self.dataset_id = dataset_id
+        self.table_id = table_id
+        self.timeout_seconds = timeout_seconds
+        self.sql_dir = Path("sql/tables")
+        self.executor = get_query_executor(client)
+        self._table_ready = False
+
+    @property
+    def summary_ref(self) -> str:
+        """Fully qualified summary table ID."""
+        return f"{self.project_id}.{self.dataset_id}.{SUMMARY_TABLE_ID}"
+
+    def load_sql(self, name: str) -> str:
+        """Load a SQL file from sql/tables and substitute placeholders.
+
+        Args:
+            name: SQL filename without extension
+
+        Returns:
+            SQL query string with placeholders replaced
+
+        Raises:
+            FileNotFoundError: If SQL file doesn't exist
+        """
+        sql_file = self.sql_dir / f"{name}.sql"
+        if not sql_file.exists():
+            raise FileNotFoundError(f"SQL file not found: {sql_file}")
+
+        with open(sql_file, 'r') as f:
+            sql_template = f.read()
+
+        return sql_template.format(
+            project_id=self.project_id,
+            dataset_id=self.dataset_id,
+            table_id=self.table_id
+        )
+
+    def ensure_table(self) -> bool:
+        """Create the summary table if missing and backfill it from all history.
+
+        Returns:
+            True if the table was created by this call, False if it already existed
+        """
+        if self._table_ready:
+            return False
+
+        created = False
+        try:
+            self.client.get_table(self.summary_ref)
+        except Exception:
+            logger.info(f"Creating summary table: {self.summary_ref}")
+            self.executor.run(self.load_sql(SUMMARY_TABLE_ID), label='daily_summary:create',
+                              timeout=self.timeout_seconds)
+            self._merge([], full_refresh=True)
+            created = True
+
+        self._table_ready = True
+        return created
+
+    def refresh_dates(self, dates: Iterable[date]) -> Dict[str, Any]:
+        """Recompute the summary rows for the given workout dates.
+
+        Args:
+            dates: Workout dates touched by an upload
+
+        Returns:
+            Dictionary with refresh statistics
+        """
+        dates = sorted(set(dates))
+        if not dates:
+            return {'success': True, 'dates_refreshed': 0, 'rows_affected': 0}
+
+        try:
+            if self.ensure_table():
+                # The backfill already covered every date
+                return {'success': True, 'dates_refreshed': len(dates), 'rows_affected': 0,
+                        'backfilled': True}
+
+            rows_affected = self._merge(dates, full_refresh=False)
+            logger.info(f"Refreshed {SUMMARY_TABLE_ID} for {len(dates)} date(s)")
+            return {'success': True, 'dates_refreshed': len(dates), 'rows_affected': rows_affected}
+        except Exception as e:
+            logger.error(f"Failed to refresh {SUMMARY_TABLE_ID}: {str(e)}")
+            return {'success': False, 'error': str(e), 'dates_refreshed': 0, 'rows_affected': 0}
+
+    def rebuild(self) -> Dict[str, Any]:
+        """Recompute the summary for every date, e.g. after the exercise mapping changes.
+
+        Returns:
+            Dictionary with refresh statistics
+        """
+        try:
+            if self.ensure_table():
+                return {'success': True, 'rows_affected': 0, 'backfilled': True}
+
+            rows_affected = self._merge([], full_refresh=True)
+            logger.info(f"Rebuilt {SUMMARY_TABLE_ID}")
+            return {'success': True, 'rows_affected': rows_affected}
+        except Exception as e:
+            logger.error(f"Failed to rebuild {SUMMARY_TABLE_ID}: {str(e)}")
+            return {'success': False, 'error': str(e), 'rows_affected': 0}
+
+    def _merge(self, dates: List[date], full_refresh: bool) -> int:
+        """Run the summary MERGE for a set of dates.
+
+        Args:
+            dates: Dates to recompute (ignored when full_refresh is set)
+            full_refresh: Recompute every date
+
+        Returns:
+            Number of summary rows inserted, updated or deleted
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ArrayQueryParameter("dates", "DATE", list(dates)),
+                bigquery.ScalarQueryParameter("full_refresh", "BOOL", full_refresh)
+            ]
+        )
+        job = self.executor.run_job(self.load_sql(f"{SUMMARY_TABLE_ID}_merge"),
+                                    job_config=job_config, label='daily_summary:merge',
+                                    timeout=self.timeout_seconds)
+        return job.num_dml_affected_rows or 0
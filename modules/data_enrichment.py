@@ -1,23 +1,43 @@
 """Data enrichment module for exercise-to-muscle group mapping."""
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, List, Optional, Tuple
+
+from modules.keyword_matcher import KeywordMatcher
 
 
 class DataEnrichment:
     """Enrich workout data with muscle group mappings."""
     
-    def __init__(self, mapping_config: Dict[str, Any]):
+    def __init__(self, mapping_config: Dict[str, Any], cache_size: int = 10000):
         """Initialize data enrichment with exercise mapping configuration.
         
         Args:
             mapping_config: Dictionary containing exercise mapping configuration
+            cache_size: Maximum number of normalized names kept in the LRU cache
         """
         self.config = mapping_config
-        self.unmapped_exercises: List[str] = []
-        self.exercise_cache: Dict[str, Tuple[str, str]] = {}
+        self.cache_size = cache_size
+        
+        # Unmapped exercise names with occurrence counts for the last enrichment
+        self.unmapped_exercises: Counter = Counter()
+        
+        # LRU cache of normalized name -> (level1, level2, matched); the
+        # instance is shared across Streamlit sessions, so access is locked
+        self._cache_lock = threading.Lock()
+        self.exercise_cache: OrderedDict[str, Tuple[str, str, bool]] = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._cache_evictions = 0
         
         # Build exercise lookup dictionary for faster matching
         self._build_exercise_lookup()
+        
+        # Compile fuzzy rules into a single keyword automaton
+        self._build_fuzzy_matcher()
     
     def _build_exercise_lookup(self):
         """Build a dictionary for fast exercise name lookup."""
@@ -33,6 +53,29 @@ class DataEnrichment:
                 normalized = self._normalize_name(name)
                 self.exercise_lookup[normalized] = (level1, level2)
     
+    def _build_fuzzy_matcher(self):
+        """Compile fuzzy rule keywords and exclusions into a KeywordMatcher."""
+        fuzzy_rules = self.config.get('fuzzy_rules', [])
+        
+        keywords = [rule['keyword'].lower() for rule in fuzzy_rules]
+        excludes = [[term.lower() for term in rule.get('exclude', [])] for rule in fuzzy_rules]
+        self.fuzzy_matcher = KeywordMatcher(
+            keywords + [term for terms in excludes for term in terms]
+        )
+        
+        # Rule indices per keyword id, kept in config order for first-rule-wins
+        self._fuzzy_rules_by_keyword: Dict[int, List[int]] = {}
+        self._fuzzy_rule_excludes: List[FrozenSet[int]] = []
+        self._fuzzy_rule_results: List[Tuple[str, str]] = []
+        
+        for index, rule in enumerate(fuzzy_rules):
+            keyword_id = self.fuzzy_matcher.keyword_id(keywords[index])
+            self._fuzzy_rules_by_keyword.setdefault(keyword_id, []).append(index)
+            self._fuzzy_rule_excludes.append(
+                frozenset(self.fuzzy_matcher.keyword_id(term) for term in excludes[index])
+            )
+            self._fuzzy_rule_results.append((rule['level1'], rule['level2']))
+    
     def _normalize_name(self, name: str) -> str:
         """Normalize exercise name for matching.
         
@@ -53,17 +96,28 @@ class DataEnrichment:
         Returns:
             DataFrame with added muscle_group_level1 and muscle_group_level2 columns
         """
-        self.unmapped_exercises = []
+        self.unmapped_exercises = Counter()
         
         if 'exercise_name' not in df.columns:
             raise ValueError("DataFrame must have 'exercise_name' column")
         
-        # Apply mapping to each exercise
-        muscle_mappings = df['exercise_name'].apply(self._map_exercise_to_muscles)
+        # Resolve each unique exercise name once; missing names get code -1
+        codes, unique_names = pd.factorize(df['exercise_name'])
+        mappings = [self._resolve_exercise(name) for name in unique_names]
+        
+        # Count occurrences of names that fell back to the default mapping
+        occurrences = np.bincount(codes[codes >= 0], minlength=len(unique_names))
+        for name, mapping, count in zip(unique_names, mappings, occurrences):
+            if not mapping[2]:
+                self.unmapped_exercises[name] += int(count)
+        
+        # Trailing 'unknown' entry is selected by the -1 code of missing names
+        level1 = np.array([m[0] for m in mappings] + ['unknown'], dtype=object)
+        level2 = np.array([m[1] for m in mappings] + ['unknown'], dtype=object)
         
-        # Split tuple into two columns
-        df['muscle_group_level1'] = muscle_mappings.apply(lambda x: x[0])
-        df['muscle_group_level2'] = muscle_mappings.apply(lambda x: x[1])
+        # Broadcast back to rows with array indexing
+        df['muscle_group_level1'] = pd.Series(level1[codes], index=df.index)
+        df['muscle_group_level2'] = pd.Series(level2[codes], index=df.index)
         
         return df
     
@@ -76,33 +130,50 @@ class DataEnrichment:
         Returns:
             Tuple of (level1, level2) muscle groups
         """
-        if pd.isna(exercise_name) or exercise_name == '':
-            return ('unknown', 'unknown')
+        level1, level2, matched = self._resolve_exercise(exercise_name)
+        if not matched:
+            self.unmapped_exercises[exercise_name] += 1
+        return (level1, level2)
+    
+    def _resolve_exercise(self, exercise_name: str) -> Tuple[str, str, bool]:
+        """Resolve an exercise name through the LRU cache, exact and fuzzy matching.
         
-        # Check cache first
-        if exercise_name in self.exercise_cache:
-            return self.exercise_cache[exercise_name]
+        Args:
+            exercise_name: Name of the exercise
+            
+        Returns:
+            Tuple of (level1, level2, matched) where matched is False for default mappings
+        """
+        if pd.isna(exercise_name) or exercise_name == '':
+            return ('unknown', 'unknown', True)
         
         normalized = self._normalize_name(str(exercise_name))
         
-        # Try exact match
-        result = self._exact_match(normalized)
-        if result:
-            self.exercise_cache[exercise_name] = result
-            return result
+        # Check cache first
+        with self._cache_lock:
+            cached = self.exercise_cache.get(normalized)
+            if cached is not None:
+                self._cache_hits += 1
+                self.exercise_cache.move_to_end(normalized)
+                return cached
+            self._cache_misses += 1
         
-        # Try fuzzy match
-        result = self._fuzzy_match(normalized)
+        # Try exact match, then fuzzy match, then apply default mapping
+        result = self._exact_match(normalized) or self._fuzzy_match(normalized)
         if result:
-            self.exercise_cache[exercise_name] = result
-            return result
+            resolved = (result[0], result[1], True)
+        else:
+            default = self._apply_default_mapping()
+            resolved = (default[0], default[1], False)
         
-        # Apply default mapping
-        result = self._apply_default_mapping()
-        self.unmapped_exercises.append(exercise_name)
-        self.exercise_cache[exercise_name] = result
+        with self._cache_lock:
+            self.exercise_cache[normalized] = resolved
+            self.exercise_cache.move_to_end(normalized)
+            while len(self.exercise_cache) > self.cache_size:
+                self.exercise_cache.popitem(last=False)
+                self._cache_evictions += 1
         
-        return result
+        return resolved
     
     def _exact_match(self, normalized_name: str) -> Optional[Tuple[str, str]]:
         """Try exact match against configured exercises.
@@ -124,23 +195,19 @@ class DataEnrichment:
         Returns:
             Tuple of (level1, level2) if match found, None otherwise
         """
-        fuzzy_rules = self.config.get('fuzzy_rules', [])
+        # Single pass over the name finds every keyword and exclude term present
+        matched = self.fuzzy_matcher.find_all(normalized_name)
         
-        for rule in fuzzy_rules:
-            keyword = rule['keyword'].lower()
-            exclude = rule.get('exclude', [])
-            
-            # Check if keyword is in exercise name
-            if keyword in normalized_name:
-                # Check exclusions
-                excluded = False
-                for exclude_term in exclude:
-                    if exclude_term.lower() in normalized_name:
-                        excluded = True
-                        break
-                
-                if not excluded:
-                    return (rule['level1'], rule['level2'])
+        candidate_rules = sorted(
+            index
+            for keyword_id in matched
+            for index in self._fuzzy_rules_by_keyword.get(keyword_id, ())
+        )
+        
+        # First rule in config order whose exclusions are all absent wins
+        for index in candidate_rules:
+            if not self._fuzzy_rule_excludes[index] & matched:
+                return self._fuzzy_rule_results[index]
         
         return None
     
@@ -162,8 +229,34 @@ class DataEnrichment:
         Returns:
             List of unmapped exercise names
         """
-        # Return unique unmapped exercises
-        return list(set(self.unmapped_exercises))
+        return list(self.unmapped_exercises)
+    
+    def get_unmapped_counts(self) -> Dict[str, int]:
+        """Get occurrence counts of exercises that couldn't be mapped exactly.
+        
+        Returns:
+            Dictionary mapping unmapped exercise names to row counts
+        """
+        return dict(self.unmapped_exercises)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Get exercise cache statistics.
+        
+        Returns:
+            Dictionary with hits, misses, evictions, size and max_size
+        """
+        with self._cache_lock:
+            hits, misses = self._cache_hits, self._cache_misses
+            evictions, size = self._cache_evictions, len(self.exercise_cache)
+        lookups = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'evictions': evictions,
+            'size': size,
+            'max_size': self.cache_size,
+            'hit_rate': hits / lookups if lookups else 0.0
+        }
     
     def get_mapping_summary(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Get summary of muscle group mappings in the dataset.
@@ -181,6 +274,7 @@ class DataEnrichment:
             'total_exercises': len(df),
             'unique_exercises': df['exercise_name'].nunique(),
             'unmapped_count': len(self.unmapped_exercises),
+            'unmapped_occurrences': sum(self.unmapped_exercises.values()),
             'unmapped_exercises': self.get_unmapped_exercises(),
             'level1_distribution': df['muscle_group_level1'].value_counts().to_dict(),
             'level2_distribution': df['muscle_group_level2'].value_counts().to_dict()
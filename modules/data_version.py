@@ -0,0 +1,91 @@
+"""Cheap, rate-limited data versions for cache invalidation."""
+import threading
+import time
+from typing import Dict, Optional
+
+from google.cloud import bigquery
+
+# Per-table counters bumped by uploads in this process
+_local_versions: Dict[str, int] = {}
+_local_versions_lock = threading.Lock()
+
+
+def bump_data_version(table_ref: str) -> int:
+    """Mark a table's data as changed by this process (e.g. after an upload).
+
+    Trackers for the table re-read its metadata on their next call instead of
+    waiting for the rate limit, so the upload shows up in their version
+    immediately.
+
+    Args:
+        table_ref: Fully qualified table ID
+
+    Returns:
+        New local version counter for the table
+    """
+    with _local_versions_lock:
+        _local_versions[table_ref] = _local_versions.get(table_ref, 0) + 1
+        return _local_versions[table_ref]
+
+
+def get_local_version(table_ref: str) -> int:
+    """Get how many times this process has bumped a table's version.
+
+    Args:
+        table_ref: Fully qualified table ID
+
+    Returns:
+        Local version counter (0 if never bumped)
+    """
+    with _local_versions_lock:
+        return _local_versions.get(table_ref, 0)
+
+
+class DataVersionTracker:
+    """Derive a version string for a BigQuery table from its metadata.
+
+    The version combines the table's last-modified time and its row count, so
+    every process sees the same string for the same data and can share cache
+    entries keyed on it. Metadata comes from a tables.get call, which scans
+    no data, and is re-read at most once per min_check_interval seconds unless
+    a local upload bumped the table.
+    """
+
+    def __init__(self, client: bigquery.Client, table_ref: str, min_check_interval: float = 30.0):
+        """Initialize the tracker.
+
+        Args:
+            client: BigQuery client instance
+            table_ref: Fully qualified table ID
+            min_check_interval: Minimum seconds between metadata reads
+        """
+        self.client = client
+        self.table_ref = table_ref
+        self.min_check_interval = min_check_interval
+        self.checks = 0
+
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+        self._seen_local = -1
+        self._lock = threading.Lock()
+
+    def current(self, force: bool = False) -> str:
+        """Get the current data version, re-reading table metadata if due.
+
+        Args:
+            force: Re-read table metadata regardless of the rate limit
+
+        Returns:
+            Version string '<modified>:<num_rows>'
+        """
+        local = get_local_version(self.table_ref)
+        with self._lock:
+            due = force or time.monotonic() - self._checked_at >= self.min_check_interval
+            if self._version is None or due or local != self._seen_local:
+                table = self.client.get_table(self.table_ref)
+                modified = table.modified.isoformat() if table.modified else ''
+                self._version = f"{modified}:{table.num_rows}"
+                self._checked_at = time.monotonic()
+                self._seen_local = local
+                self.checks += 1
+            return self._version
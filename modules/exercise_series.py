@@ -0,0 +1,362 @@
+"""Precomputed per-exercise performance series for the exercise charts."""
+import hashlib
+import logging
+import os
+import uuid
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from google.cloud import bigquery
+
+from modules.data_version import DataVersionTracker
+from modules.query_executor import get_query_executor
+
+logger = logging.getLogger(__name__)
+
+SESSION_COLUMNS = ['exercise_name', 'workout_date', 'max_weight', 'total_volume', 'estimated_1rm']
+
+# Same columns as the exercise_performance_metrics view
+SERIES_COLUMNS = [
+    'exercise_name', 'workout_date', 'week_number', 'month_number', 'year', 'session_index',
+    'max_weight', 'total_volume', 'estimated_1rm', 'pct_change_1rm', 'pct_change_volume'
+]
+
+# Chart x-axis modes served from pre-bucketed rows, and the column each buckets on
+PERIOD_COLUMNS = {'week': 'week_number', 'month': 'month_number', 'year': 'year'}
+
+# Bucket semantics of create_exercise_performance_chart: peak KPI, average change
+BUCKET_AGGREGATIONS = {
+    'exercise_name': 'first',
+    'workout_date': 'max',
+    'max_weight': 'max',
+    'total_volume': 'max',
+    'estimated_1rm': 'max',
+    'pct_change_1rm': 'mean',
+    'pct_change_volume': 'mean',
+    'session_index': 'count'
+}
+
+
+def _pct_change(values: pd.Series) -> pd.Series:
+    """Percentage change from the previous session, rounded like the view (NULL on a zero base)."""
+    previous = values.shift(1)
+    return (100.0 * (values - previous) / previous.where(previous != 0)).round(2)
+
+
+def compute_series(sessions: pd.DataFrame) -> pd.DataFrame:
+    """Derive the chart columns for one exercise from its per-day session aggregates.
+
+    Args:
+        sessions: Rows with SESSION_COLUMNS for a single exercise
+
+    Returns:
+        DataFrame with SERIES_COLUMNS ordered by workout_date
+    """
+    df = sessions[SESSION_COLUMNS].sort_values('workout_date').reset_index(drop=True)
+    dates = pd.to_datetime(df['workout_date'])
+    # BigQuery's EXTRACT(WEEK) counts Sunday-started weeks, like %U
+    df['week_number'] = dates.dt.strftime('%U').astype('int64')
+    df['month_number'] = dates.dt.month.astype('int64')
+    df['year'] = dates.dt.year.astype('int64')
+    df['session_index'] = pd.Series(range(1, len(df) + 1), dtype='int64')
+    df['pct_change_1rm'] = _pct_change(df['estimated_1rm'])
+    df['pct_change_volume'] = _pct_change(df['total_volume'])
+    return df[SERIES_COLUMNS]
+
+
+def aggregate_series(series: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Bucket a series by week, month or year the way the performance chart does.
+
+    KPI columns take the maximum over the bucket and pct_change columns the
+    mean, so the chart's own groupby over these rows is a no-op.
+
+    Args:
+        series: DataFrame with SERIES_COLUMNS for a single exercise
+        period: 'week', 'month' or 'year'
+
+    Returns:
+        One row per bucket, with the bucket column, the aggregated KPIs and
+        the number of sessions in 'sessions'
+    """
+    x_col = PERIOD_COLUMNS[period]
+    buckets = series.groupby(x_col).agg(BUCKET_AGGREGATIONS).reset_index()
+    return buckets.rename(columns={'session_index': 'sessions'})
+
+
+class ExerciseSeriesStore:
+    """Keep one Parquet file per exercise with its ready-to-plot performance series.
+
+    Reading an exercise's series is a single file read instead of a windowed
+    scan over the workouts table, and week, month and year buckets are stored
+    next to it so bucketed chart modes read one row per bucket. After an
+    upload only the (exercise, date) sessions it touched are re-aggregated in
+    BigQuery, which the table's exercise_name clustering keeps cheap, and the
+    affected series are rewritten locally. An exercise that has no file yet
+    is built on first lookup.
+
+    Each series file records the data version it was built from, and the
+    store records the version it is fully synced to: every stored series is
+    current as of that version. A lookup that passes the reader's current
+    data version rebuilds a series only if neither matches, so changes made
+    without a refresh (deletes, migrations, uploads from elsewhere) are
+    picked up. A refresh advances the synced version past its own upload
+    when the store was synced to the version the upload started from, so
+    exercises the upload did not touch stay current without being rewritten.
+    """
+
+    def __init__(self, client: bigquery.Client, project_id: str, dataset_id: str,
+                 table_id: str = "workouts", store_dir: str = ".series_store"):
+        """Initialize the store.
+
+        Args:
+            client: BigQuery client instance
+            project_id: GCP project ID
+            dataset_id: BigQuery dataset ID
+            table_id: Source workouts table ID
+            store_dir: Local directory holding the series files
+        """
+        self.client = client
+        self.project_id = project_id
+        self.dataset_id = dataset_id
+        self.table_id = table_id
+        self.store_dir = Path(store_dir)
+        self.synced_path = self.store_dir / "synced_version"
+        self.sql_dir = Path("sql/tables")
+        self.executor = get_query_executor(client)
+        self.version_tracker = DataVersionTracker(client, f"{project_id}.{dataset_id}.{table_id}")
+
+    def _path(self, exercise_name: str, period: str = 'index') -> Path:
+        """Series file for an exercise (names are hashed to stay filesystem-safe)."""
+        digest = hashlib.sha1(exercise_name.encode('utf-8')).hexdigest()[:20]
+        if period == 'index':
+            return self.store_dir / f"{digest}.parquet"
+        return self.store_dir / period / f"{digest}.parquet"
+
+    def _read(self, exercise_name: str, period: str = 'index') -> Optional[pd.DataFrame]:
+        """Read a stored series or bucket file, or None if the exercise has none."""
+        try:
+            return pd.read_parquet(self._path(exercise_name, period))
+        except FileNotFoundError:
+            return None
+
+    def _stored_version(self, exercise_name: str) -> Optional[str]:
+        """Data version a stored series was built from, or None if there is none."""
+        try:
+            metadata = pq.read_schema(self._path(exercise_name)).metadata or {}
+        except FileNotFoundError:
+            return None
+        version = metadata.get(b'data_version')
+        return version.decode('utf-8') if version is not None else None
+
+    def _synced_version(self) -> Optional[str]:
+        """Data version every stored series is current as of, or None if unknown."""
+        try:
+            return self.synced_path.read_text(encoding='utf-8')
+        except FileNotFoundError:
+            return None
+
+    def _set_synced_version(self, data_version: str):
+        """Atomically record the data version the whole store is current as of."""
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.store_dir / f".{self.synced_path.name}.{uuid.uuid4().hex}.tmp"
+        try:
+            tmp_path.write_text(data_version, encoding='utf-8')
+            os.replace(tmp_path, self.synced_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _is_synced_to(self, data_version: Optional[str]) -> bool:
+        """Whether every stored series is known to be current as of a data version."""
+        if data_version is None:
+            return False
+        synced = self._synced_version()
+        if synced is None:
+            # An empty store is trivially current
+            return not any(self.store_dir.glob('*.parquet'))
+        return synced == data_version
+
+    def _write(self, exercise_name: str, sessions: pd.DataFrame,
+               data_version: Optional[str] = None):
+        """Compute and atomically store an exercise's series and buckets.
+
+        An exercise without sessions has its files removed instead.
+        """
+        periods = ['index', *PERIOD_COLUMNS]
+        if sessions.empty:
+            for period in periods:
+                self._path(exercise_name, period).unlink(missing_ok=True)
+            return
+
+        series = compute_series(sessions)
+        # Buckets first: a series file without up-to-date buckets is never visible
+        for period in reversed(periods):
+            frame = series if period == 'index' else aggregate_series(series, period)
+            path = self._path(exercise_name, period)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.parent / f".{path.name}.{uuid.uuid4().hex}.tmp"
+            try:
+                table = pa.Table.from_pandas(frame, preserve_index=False)
+                if data_version is not None:
+                    table = table.replace_schema_metadata(
+                        {**(table.schema.metadata or {}),
+                         b'data_version': data_version.encode('utf-8')}
+                    )
+                pq.write_table(table, tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                tmp_path.unlink(missing_ok=True)
+
+    def _load_sessions(self, exercises: List[str], dates: List[date]) -> pd.DataFrame:
+        """Aggregate workouts into per-exercise, per-day sessions in BigQuery.
+
+        Args:
+            exercises: Exercise names to read (empty = all)
+            dates: Workout dates to read (empty = all)
+
+        Returns:
+            DataFrame with SESSION_COLUMNS
+        """
+        with open(self.sql_dir / "exercise_series_sessions.sql", 'r') as f:
+            query = f.read().format(
+                project_id=self.project_id, dataset_id=self.dataset_id, table_id=self.table_id
+            )
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ArrayQueryParameter("exercises", "STRING", list(exercises)),
+                bigquery.ArrayQueryParameter("dates", "DATE", list(dates))
+            ]
+        )
+        df = self.executor.to_dataframe(query, job_config=job_config,
+                                        label='exercise_series:sessions')
+        df['workout_date'] = pd.to_datetime(df['workout_date']).dt.date
+        return df
+
+    def get_series(self, exercise_name: str, period: str = 'index',
+                   data_version: Optional[str] = None) -> pd.DataFrame:
+        """Get an exercise's performance series, building it on first use.
+
+        Args:
+            exercise_name: Name of the exercise
+            period: 'index' for one row per session, or 'week', 'month' or
+                'year' for one row per bucket (see aggregate_series)
+            data_version: Caller's current data version; a series built from
+                another version is rebuilt first, unless the store is synced
+                to it
+
+        Returns:
+            DataFrame shaped like exercise_performance_metrics, or its buckets
+
+        Raises:
+            ValueError: If period is not a supported chart mode
+        """
+        if period != 'index' and period not in PERIOD_COLUMNS:
+            raise ValueError(f"Unsupported series period: {period}")
+
+        rebuilt = (
+            data_version is not None
+            and self._stored_version(exercise_name) != data_version
+            and self._synced_version() != data_version
+        )
+        if rebuilt:
+            self._write(exercise_name, self._load_sessions([exercise_name], []), data_version)
+
+        result = self._read(exercise_name, period)
+        if result is None and not rebuilt:
+            series = self._read(exercise_name)
+            if series is None:
+                self._write(exercise_name, self._load_sessions([exercise_name], []), data_version)
+            elif period != 'index':
+                # Stored before buckets were kept
+                self._write(exercise_name, series, self._stored_version(exercise_name))
+            result = self._read(exercise_name, period)
+        if result is None:
+            if period == 'index':
+                return pd.DataFrame(columns=SERIES_COLUMNS)
+            return pd.DataFrame(columns=[PERIOD_COLUMNS[period], *BUCKET_AGGREGATIONS])
+        return result
+
+    def refresh(self, df: pd.DataFrame, base_version: Optional[str] = None) -> Dict[str, Any]:
+        """Update the series of the exercises and dates in an uploaded frame.
+
+        Sessions are re-read rather than added to, so re-uploaded or
+        deduplicated rows cannot be double counted.
+
+        Args:
+            df: Rows that were just uploaded
+            base_version: Data version observed before the upload started; if
+                the store was synced to it, the store is synced to the
+                post-upload version once the touched exercises are rewritten
+
+        Returns:
+            Dictionary with refresh statistics
+        """
+        if df.empty:
+            return {'success': True, 'exercises_refreshed': 0, 'sessions_loaded': 0}
+
+        try:
+            uploaded_dates = pd.to_datetime(df['date'], errors='coerce', utc=True).dt.date
+            exercises = sorted(df['exercise_name'].dropna().unique())
+            dates = sorted(set(uploaded_dates.dropna()))
+            # Observed before reading, so a later change still shows up as a mismatch
+            data_version = self.version_tracker.current()
+            advance = self._is_synced_to(base_version)
+            sessions = self._load_sessions(exercises, dates)
+
+            for exercise_name in exercises:
+                fresh = sessions[sessions['exercise_name'] == exercise_name]
+                stored = self._read(exercise_name)
+                if stored is not None:
+                    # Keep stored sessions outside the re-read dates, replace the rest
+                    stored = stored[~stored['workout_date'].isin(dates)][SESSION_COLUMNS]
+                    fresh = pd.concat([stored, fresh], ignore_index=True)
+                self._write(exercise_name, fresh, data_version)
+            if advance:
+                # Only this upload changed the table since the store was synced
+                self._set_synced_version(data_version)
+
+            logger.info(f"Refreshed exercise series for {len(exercises)} exercise(s)")
+            return {'success': True, 'exercises_refreshed': len(exercises),
+                    'sessions_loaded': len(sessions)}
+        except Exception as e:
+            logger.error(f"Failed to refresh exercise series: {str(e)}")
+            return {'success': False, 'error': str(e), 'exercises_refreshed': 0,
+                    'sessions_loaded': 0}
+
+    def rebuild(self, exercises: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Recompute series from all history.
+
+        Args:
+            exercises: Exercise names to rebuild (default: every exercise, and
+                files of exercises no longer in the table are removed)
+
+        Returns:
+            Dictionary with rebuild statistics
+        """
+        try:
+            names = sorted(set(exercises)) if exercises is not None else []
+            data_version = self.version_tracker.current()
+            sessions = self._load_sessions(names, [])
+            keep = set()
+            for exercise_name, group in sessions.groupby('exercise_name'):
+                self._write(exercise_name, group, data_version)
+                keep.add(self._path(exercise_name).name)
+            for exercise_name in names:
+                if self._path(exercise_name).name not in keep:
+                    self._write(exercise_name, sessions.iloc[0:0])
+            if exercises is None and self.store_dir.exists():
+                for path in self.store_dir.glob('**/*.parquet'):
+                    if path.name not in keep:
+                        path.unlink()
+                self._set_synced_version(data_version)
+
+            logger.info(f"Rebuilt exercise series for {len(keep)} exercise(s)")
+            return {'success': True, 'exercises_refreshed': len(keep),
+                    'sessions_loaded': len(sessions)}
+        except Exception as e:
+            logger.error(f"Failed to rebuild exercise series: {str(e)}")
+            return {'success': False, 'error': str(e), 'exercises_refreshed': 0,
+                    'sessions_loaded': 0}
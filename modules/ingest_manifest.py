@@ -0,0 +1,179 @@
+"""Local manifest of ingested files and row fingerprints for idempotent uploads."""
+import hashlib
+import io
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+
+def compute_row_fingerprints(df: pd.DataFrame, columns: List[str]) -> np.ndarray:
+    """Compute a deterministic 64-bit content fingerprint for each row.
+
+    Args:
+        df: DataFrame to fingerprint
+        columns: Columns that define row identity, hashed in this order
+
+    Returns:
+        Array of signed 64-bit fingerprints (BigQuery INTEGER compatible)
+    """
+    hashes = pd.util.hash_pandas_object(df[columns], index=False)
+    return hashes.to_numpy().view(np.int64)
+
+
+def hash_file(file: Union[str, os.PathLike, io.IOBase], block_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 digest of a file's contents.
+
+    Args:
+        file: File path or binary file-like object (rewound afterwards)
+        block_size: Bytes read per block
+
+    Returns:
+        Hex digest string
+    """
+    digest = hashlib.sha256()
+
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, 'rb') as f:
+            for block in iter(lambda: f.read(block_size), b''):
+                digest.update(block)
+    else:
+        file.seek(0)
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+        file.seek(0)
+
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """Track already-ingested file hashes and row fingerprints on local disk.
+
+    The manifest is a best-effort guard for a single host. Fingerprints live
+    in a local file that is read, updated and rewritten by this process, so
+    uploads from other hosts, or other processes writing at the same time,
+    are not seen. It is not updated when rows are deleted from BigQuery or a
+    table is migrated, and fingerprints come from hash_pandas_object, so they
+    change with column dtypes and across pandas versions. Use the 'merge'
+    dedup strategy when BigQuery has to be the source of truth.
+    """
+
+    def __init__(self, manifest_dir: str = ".ingest_manifest"):
+        """Initialize the manifest, loading any existing state.
+
+        Args:
+            manifest_dir: Directory holding files.json and fingerprints.npy
+        """
+        self.manifest_dir = Path(manifest_dir)
+        self.files_path = self.manifest_dir / "files.json"
+        self.fingerprints_path = self.manifest_dir / "fingerprints.npy"
+        self._lock = threading.Lock()
+
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.fingerprints = np.empty(0, dtype=np.int64)  # Sorted, unique
+        self._load()
+
+    def _load(self):
+        """Load manifest state from disk if present."""
+        if self.files_path.exists():
+            with open(self.files_path, 'r') as f:
+                self.files = json.load(f)
+        if self.fingerprints_path.exists():
+            self.fingerprints = np.load(self.fingerprints_path)
+
+    def _write_atomic(self, path: Path, write_fn):
+        """Write a file via a temporary file and atomic rename.
+
+        Args:
+            path: Destination path
+            write_fn: Callable receiving an open binary file handle
+        """
+        self.manifest_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            write_fn(f)
+        os.replace(tmp_path, path)
+
+    def has_file(self, file_hash: str) -> bool:
+        """Check whether a file with this content hash was already ingested.
+
+        Args:
+            file_hash: SHA-256 hex digest from hash_file
+
+        Returns:
+            True if the file is recorded in the manifest
+        """
+        return file_hash in self.files
+
+    def record_file(self, file_hash: str, name: Optional[str] = None, rows: int = 0):
+        """Record a successfully ingested file.
+
+        Args:
+            file_hash: SHA-256 hex digest from hash_file
+            name: Original file name
+            rows: Number of rows uploaded from the file
+        """
+        with self._lock:
+            self.files[file_hash] = {
+                'name': name,
+                'rows': rows,
+                'ingested_at': datetime.now().isoformat()
+            }
+            self._write_atomic(
+                self.files_path,
+                lambda f: f.write(json.dumps(self.files, indent=2).encode('utf-8'))
+            )
+
+    def filter_new(self, fingerprints: np.ndarray) -> np.ndarray:
+        """Get a mask of fingerprints not yet ingested.
+
+        Args:
+            fingerprints: Row fingerprints from compute_row_fingerprints
+
+        Returns:
+            Boolean array, True where the row is new
+        """
+        known = self.fingerprints
+        if len(known) == 0:
+            return np.ones(len(fingerprints), dtype=bool)
+
+        positions = np.searchsorted(known, fingerprints)
+        positions[positions == len(known)] = 0
+        return known[positions] != fingerprints
+
+    def add_fingerprints(self, fingerprints: np.ndarray):
+        """Record fingerprints of successfully uploaded rows and persist them.
+
+        Args:
+            fingerprints: Row fingerprints to add
+        """
+        with self._lock:
+            new = np.asarray(fingerprints, dtype=np.int64)
+            self.fingerprints = np.union1d(self.fingerprints, new)
+            self._write_atomic(self.fingerprints_path, lambda f: np.save(f, self.fingerprints))
+
+    def replace_fingerprints(self, fingerprints: np.ndarray):
+        """Reset the recorded fingerprints, e.g. after a load replaced the whole table.
+
+        Args:
+            fingerprints: Row fingerprints now in the table
+        """
+        with self._lock:
+            self.fingerprints = np.unique(np.asarray(fingerprints, dtype=np.int64))
+            self._write_atomic(self.fingerprints_path, lambda f: np.save(f, self.fingerprints))
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Get manifest summary.
+
+        Returns:
+            Dictionary with file and fingerprint counts
+        """
+        return {
+            'files': len(self.files),
+            'fingerprints': len(self.fingerprints)
+        }
@@ -0,0 +1,330 @@
+"""Pipelined parse -> enrich -> upload driver for large workout CSV files."""
+import io
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+
+from modules.bigquery_uploader import BigQueryUploader
+from modules.csv_parser import DEFAULT_CHUNKSIZE, CSVParser
+from modules.data_enrichment import DataEnrichment
+
+logger = logging.getLogger(__name__)
+
+# Marker passed downstream when a stage has no more chunks
+_END_OF_STREAM = object()
+
+
+class PipelineCancelled(Exception):  # noqa: N818
+    """Raised inside a stage when the pipeline has been cancelled."""
+
+
+class IngestPipeline:
+    """Run CSV parsing, enrichment and upload concurrently on chunks.
+
+    Each stage runs on its own thread and hands chunks to the next stage
+    through a bounded queue, so chunk N+1 is parsed while chunk N is enriched
+    and chunk N-1 is uploaded. A full queue blocks the producing stage, which
+    bounds memory to roughly (queue_size * 2 + 3) chunks.
+
+    The chunks are one upload: only the first uses the configured write
+    disposition and the rest append, and the derived tables (daily summary,
+    exercise series) are refreshed once for everything that landed, after
+    the stream ends.
+
+    Validation errors only stop the pipeline in the parser's strict mode, as
+    with parse_csv. A strict upload that replaces the table validates the
+    whole file in a first pass, so an error in a later chunk cannot leave the
+    table holding only the chunks before it.
+    """
+
+    STAGES = ('parse', 'enrich', 'upload')
+
+    def __init__(
+        self,
+        parser: CSVParser,
+        uploader: BigQueryUploader,
+        enrichment: Optional[DataEnrichment] = None,
+        chunksize: int = DEFAULT_CHUNKSIZE,
+        queue_size: int = 2,
+        poll_interval: float = 0.1
+    ):
+        """Initialize the pipeline with its stage components.
+
+        Args:
+            parser: CSVParser used for the parse stage
+            uploader: Initialized BigQueryUploader used for the upload stage
+            enrichment: Optional DataEnrichment; chunks pass through unchanged if None
+            chunksize: Number of CSV rows per chunk
+            queue_size: Maximum number of chunks buffered between two stages
+            poll_interval: Seconds between cancellation checks while blocked
+        """
+        self.parser = parser
+        self.uploader = uploader
+        self.enrichment = enrichment
+        self.chunksize = chunksize
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+
+        self._cancel_event = threading.Event()
+        self._errors: List[str] = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Request cancellation; all stages stop after their current chunk."""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        """Whether cancellation has been requested."""
+        return self._cancel_event.is_set()
+
+    def run(
+        self,
+        file: Union[str, io.BytesIO],
+        write_disposition: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Run the pipeline over a CSV file and wait for all stages to finish.
+
+        Args:
+            file: File path or seekable file-like object
+            write_disposition: Overrides upload.write_disposition for the first chunk
+
+        Returns:
+            Dictionary with upload outcome, row counts and per-stage timing
+        """
+        self._cancel_event.clear()
+        self._errors = []
+        write_disposition = write_disposition or self.uploader.upload_settings.get(
+            'write_disposition', 'WRITE_APPEND'
+        )
+
+        parsed_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        enriched_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+
+        timings = {
+            stage: {'busy_seconds': 0.0, 'wait_seconds': 0.0, 'chunks': 0, 'rows': 0}
+            for stage in self.STAGES
+        }
+        unmapped: Dict[str, None] = {}
+        upload_results: List[Dict[str, Any]] = []
+        uploaded_keys: List[pd.DataFrame] = []
+
+        def parse_stage():
+            chunks = self.parser.iter_parse_csv(file, chunksize=self.chunksize)
+            while not self.cancelled:
+                start = time.perf_counter()
+                try:
+                    chunk = next(chunks)
+                except StopIteration:
+                    break
+                finally:
+                    timings['parse']['busy_seconds'] += time.perf_counter() - start
+
+                self._record(timings['parse'], chunk)
+                self._put(parsed_queue, chunk, timings['parse'])
+
+        def enrich_stage():
+            while True:
+                chunk = self._get(parsed_queue, timings['enrich'])
+                if chunk is _END_OF_STREAM:
+                    break
+
+                start = time.perf_counter()
+                if self.enrichment is not None:
+                    chunk = self.enrichment.enrich_dataframe(chunk)
+                    unmapped.update(dict.fromkeys(self.enrichment.get_unmapped_exercises()))
+                timings['enrich']['busy_seconds'] += time.perf_counter() - start
+
+                self._record(timings['enrich'], chunk)
+                self._put(enriched_queue, chunk, timings['enrich'])
+
+        def upload_stage():
+            # A truncating disposition must not wipe the chunks uploaded before
+            disposition = write_disposition
+            while True:
+                chunk = self._get(enriched_queue, timings['upload'])
+                if chunk is _END_OF_STREAM:
+                    break
+
+                start = time.perf_counter()
+                result = self.uploader.upload_dataframe(chunk, write_disposition=disposition,
+                                                        refresh=False)
+                disposition = 'WRITE_APPEND'
+                timings['upload']['busy_seconds'] += time.perf_counter() - start
+                upload_results.append(result)
+                if result.get('rows_uploaded'):
+                    uploaded_keys.append(chunk[['date', 'exercise_name']].drop_duplicates())
+
+                if not result.get('success'):
+                    raise RuntimeError(f"Upload failed: {result.get('error', 'Unknown error')}")
+                self._record(timings['upload'], chunk)
+
+        start_time = time.perf_counter()
+        workers = [
+            threading.Thread(
+                target=self._run_stage,
+                args=('parse', parse_stage, parsed_queue),
+                name='ingest-parse',
+                daemon=True
+            ),
+            threading.Thread(
+                target=self._run_stage,
+                args=('enrich', enrich_stage, enriched_queue),
+                name='ingest-enrich',
+                daemon=True
+            ),
+            threading.Thread(
+                target=self._run_stage,
+                args=('upload', upload_stage, None),
+                name='ingest-upload',
+                daemon=True
+            )
+        ]
+
+        if write_disposition != 'WRITE_APPEND' and self.parser.schema.get('strict_mode', False):
+            self._validate_file(file)
+
+        if not self._errors:
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        # Rows that landed before a failure or cancellation still need their summaries
+        refresh_results = {}
+        if uploaded_keys:
+            refresh_results = self.uploader.refresh_derived_data(
+                pd.concat(uploaded_keys, ignore_index=True)
+            )
+
+        duration = time.perf_counter() - start_time
+        rows_uploaded = sum(result.get('rows_uploaded', 0) for result in upload_results)
+        success = not self._errors and not self.cancelled
+
+        return {
+            **refresh_results,
+            'success': success,
+            'cancelled': self.cancelled and not self._errors,
+            'error': '; '.join(self._errors) if self._errors else None,
+            'rows_parsed': timings['parse']['rows'],
+            'rows_uploaded': rows_uploaded,
+            'rows_skipped': sum(result.get('rows_skipped', 0) for result in upload_results),
+            'chunks': timings['upload']['chunks'],
+            'duration_seconds': duration,
+            'stage_timings': timings,
+            'validation_summary': self.parser.get_summary(),
+            'unmapped_exercises': list(unmapped),
+            'table': upload_results[-1].get('table') if upload_results else None
+        }
+
+    def _validate_file(self, file: Union[str, io.BytesIO]):
+        """Parse the whole file once without uploading, recording a validation failure.
+
+        Args:
+            file: File path or seekable file-like object, rewound afterwards
+        """
+        try:
+            for _ in self.parser.iter_parse_csv(file, chunksize=self.chunksize):
+                pass
+        except ValueError as e:
+            self._errors.append(f"parse: {e}")
+        finally:
+            if hasattr(file, 'seek'):
+                file.seek(0)
+
+    def _run_stage(self, name: str, stage_fn, output_queue: Optional[queue.Queue]):
+        """Run a stage body, converting failures into pipeline cancellation.
+
+        Args:
+            name: Stage name used in error messages
+            stage_fn: Callable implementing the stage loop
+            output_queue: Downstream queue that receives the end-of-stream marker
+        """
+        try:
+            stage_fn()
+        except PipelineCancelled:
+            pass
+        except Exception as e:
+            logger.error(f"Ingest pipeline stage '{name}' failed: {e}")
+            with self._lock:
+                self._errors.append(f"{name}: {e}")
+            self.cancel()
+        finally:
+            if output_queue is not None:
+                self._put_end_of_stream(output_queue)
+
+    def _put(self, target: queue.Queue, item: Any, timing: Dict[str, Any]):
+        """Put an item on a bounded queue, blocking until there is room or cancel.
+
+        Args:
+            target: Destination queue
+            item: Chunk to enqueue
+            timing: Stage timing dict updated with time spent blocked
+        """
+        start = time.perf_counter()
+        try:
+            while True:
+                if self.cancelled:
+                    raise PipelineCancelled()
+                try:
+                    target.put(item, timeout=self.poll_interval)
+                    return
+                except queue.Full:
+                    continue
+        finally:
+            timing['wait_seconds'] += time.perf_counter() - start
+
+    def _get(self, source: queue.Queue, timing: Dict[str, Any]) -> Any:
+        """Get the next item from a queue, blocking until available or cancel.
+
+        Args:
+            source: Queue to read from
+            timing: Stage timing dict updated with time spent blocked
+
+        Returns:
+            Next chunk or the end-of-stream marker
+        """
+        start = time.perf_counter()
+        try:
+            while True:
+                if self.cancelled:
+                    raise PipelineCancelled()
+                try:
+                    return source.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    continue
+        finally:
+            timing['wait_seconds'] += time.perf_counter() - start
+
+    def _put_end_of_stream(self, target: queue.Queue):
+        """Signal end of stream downstream without blocking on a cancelled consumer.
+
+        Args:
+            target: Destination queue
+        """
+        while True:
+            try:
+                target.put(_END_OF_STREAM, timeout=self.poll_interval)
+                return
+            except queue.Full:
+                if self.cancelled:
+                    # Consumer is draining or gone; drop a buffered chunk to make room
+                    try:
+                        target.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    @staticmethod
+    def _record(timing: Dict[str, Any], chunk):
+        """Update chunk and row counters for a stage.
+
+        Args:
+            timing: Stage timing dict
+            chunk: Processed DataFrame chunk
+        """
+        timing['chunks'] += 1
+        timing['rows'] += len(chunk)
@@ -0,0 +1,106 @@
+"""Multi-pattern substring matching using an Aho-Corasick automaton."""
+from collections import deque
+from typing import Dict, Iterable, List, Set
+
+
+class KeywordMatcher:
+    """Find which of many keywords occur in a text in a single pass.
+
+    The automaton is built once from the keyword list; each search then costs
+    time linear in the length of the text plus the number of matches,
+    independent of how many keywords were compiled.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        """Compile keywords into the automaton.
+
+        Args:
+            keywords: Keywords to match; duplicates share one id
+        """
+        self.keywords: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+        # Trie transitions, failure links and keyword ids ending at each state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[int]] = [[]]
+
+        for keyword in keywords:
+            self._add_keyword(keyword)
+        self._build_failure_links()
+
+    def keyword_id(self, keyword: str) -> int:
+        """Get the id assigned to a compiled keyword.
+
+        Args:
+            keyword: Keyword passed at construction
+
+        Returns:
+            Integer id used in find_all results
+        """
+        return self._ids[keyword]
+
+    def _add_keyword(self, keyword: str):
+        """Insert a keyword into the trie.
+
+        Args:
+            keyword: Keyword to insert
+        """
+        if keyword in self._ids:
+            return
+
+        keyword_id = len(self.keywords)
+        self._ids[keyword] = keyword_id
+        self.keywords.append(keyword)
+
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._output[state].append(keyword_id)
+
+    def _build_failure_links(self):
+        """Compute failure links breadth-first and merge inherited outputs."""
+        pending = deque(self._goto[0].values())
+
+        while pending:
+            state = pending.popleft()
+            for char, next_state in self._goto[state].items():
+                pending.append(next_state)
+
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state].extend(self._output[self._fail[next_state]])
+
+    def find_all(self, text: str) -> Set[int]:
+        """Find ids of all keywords that occur as substrings of text.
+
+        Args:
+            text: Text to search
+
+        Returns:
+            Set of matched keyword ids
+        """
+        matched = set(self._output[0])  # Empty keyword matches everything
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                matched.update(output[state])
+
+        return matched
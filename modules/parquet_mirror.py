@@ -0,0 +1,363 @@
+"""Incrementally synced local Parquet mirror of the BigQuery workout tables."""
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+from google.cloud import bigquery
+
+from modules.query_executor import get_query_executor
+
+logger = logging.getLogger(__name__)
+
+MAPPING_TABLE_ID = "exercise_muscle_mapping"
+STATE_FILE = "_sync_state.json"
+
+# Rows newer than the settled watermark, rewritten on every upload-range sync
+TAIL_FILE = "part-tail.parquet"
+
+
+def _month_key(values: pd.Series) -> pd.Series:
+    """Get the 'YYYY-MM' mirror partition of each workout timestamp (UTC)."""
+    return pd.to_datetime(values, utc=True).dt.strftime('%Y-%m')
+
+
+class ParquetMirror:
+    """Keep a local Parquet copy of the workouts and exercise mapping tables.
+
+    Workouts are stored as ``<mirror_dir>/workouts/month=YYYY-MM/*.parquet``,
+    which LocalParquetBackend reads directly. A sync only downloads what
+    changed since the last one:
+
+    - If the table is date-partitioned, partitions whose last-modified time
+      differs from the recorded one are re-read, and the months they fall in
+      are rewritten whole. Late commits and deletes are picked up this way.
+    - Otherwise rows with an upload_timestamp at or after the settled
+      watermark are re-read; see _sync_upload_range for how late commits
+      are handled.
+
+    Appends are the only changes an upload-range sync can follow. If the
+    table was recreated (a newer creation time, e.g. after a migration or a
+    WRITE_TRUNCATE upload) or its row count dropped, the mirror is
+    rebuilt from scratch.
+
+    The mapping table is small and re-downloaded whenever it was modified.
+    Sync state and watermarks live in ``<mirror_dir>/_sync_state.json``.
+    """
+
+    def __init__(self, client: bigquery.Client, project_id: str, dataset_id: str,
+                 mirror_dir: str = ".mirror", table_id: str = "workouts",
+                 watermark_lag_seconds: float = 3600):
+        """Initialize the mirror.
+
+        Args:
+            client: BigQuery client instance
+            project_id: GCP project ID
+            dataset_id: BigQuery dataset ID
+            mirror_dir: Local directory holding the mirror
+            table_id: Workouts table ID
+            watermark_lag_seconds: How long rows stay in the re-read tail
+                before they are settled (upload-range syncs only)
+        """
+        self.client = client
+        self.project_id = project_id
+        self.dataset_id = dataset_id
+        self.mirror_dir = Path(mirror_dir)
+        self.table_id = table_id
+        self.watermark_lag_seconds = watermark_lag_seconds
+        self.executor = get_query_executor(client)
+
+    @property
+    def table_ref(self) -> str:
+        """Fully qualified workouts table ID."""
+        return f"{self.project_id}.{self.dataset_id}.{self.table_id}"
+
+    @property
+    def workouts_dir(self) -> Path:
+        """Directory of the mirrored workouts dataset."""
+        return self.mirror_dir / self.table_id
+
+    @property
+    def state_path(self) -> Path:
+        """Path of the sync state file."""
+        return self.mirror_dir / STATE_FILE
+
+    def load_state(self) -> Dict[str, Any]:
+        """Load the sync state, or an empty state if the mirror was never synced.
+
+        Returns:
+            State dictionary with per-table watermarks
+        """
+        if not self.state_path.exists():
+            return {}
+        with open(self.state_path, 'r') as f:
+            return json.load(f)
+
+    def _save_state(self, state: Dict[str, Any]):
+        """Write the sync state atomically."""
+        tmp_path = self.mirror_dir / f".{STATE_FILE}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def _write_parquet(df: pd.DataFrame, path: Path):
+        """Write a Parquet file via a hidden temporary file and rename it into place."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.parent / f".{path.name}.{uuid.uuid4().hex}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def sync(self, full: bool = False) -> Dict[str, Any]:
+        """Bring the mirror up to date with BigQuery.
+
+        Args:
+            full: Ignore the recorded watermarks and download everything
+
+        Returns:
+            Dictionary with sync statistics
+        """
+        try:
+            self.mirror_dir.mkdir(parents=True, exist_ok=True)
+            state = {} if full else self.load_state()
+            if full and self.workouts_dir.exists():
+                shutil.rmtree(self.workouts_dir)
+
+            table = self.client.get_table(self.table_ref)
+            table_state = state.get(self.table_id, {})
+            resync = self._table_replaced(table, table_state)
+            if resync:
+                logger.info(f"{self.table_ref} was replaced or shrank, rebuilding the mirror")
+                table_state = {}
+                shutil.rmtree(self.workouts_dir, ignore_errors=True)
+
+            if table.time_partitioning is not None:
+                workouts = self._sync_partitions(table_state)
+            else:
+                workouts = self._sync_upload_range(table_state)
+            workouts['full_resync'] = full or resync
+            state[self.table_id] = {
+                **workouts.pop('state'),
+                'created': table.created.isoformat() if table.created else None,
+                'num_rows': table.num_rows
+            }
+
+            mapping = self._sync_mapping(state.get(MAPPING_TABLE_ID, {}))
+            state[MAPPING_TABLE_ID] = mapping.pop('state')
+
+            state['synced_at'] = datetime.now(timezone.utc).isoformat()
+            self._save_state(state)
+
+            logger.info(f"Synced mirror {self.mirror_dir}: "
+                        f"{workouts['rows_downloaded']} workout rows")
+            return {'success': True, 'workouts': workouts, 'mapping': mapping}
+        except Exception as e:
+            logger.error(f"Failed to sync mirror {self.mirror_dir}: {str(e)}")
+            return {'success': False, 'error': str(e)}
+
+    @staticmethod
+    def _table_replaced(table: bigquery.Table, table_state: Dict[str, Any]) -> bool:
+        """Check whether the table changed in a way an incremental sync cannot follow.
+
+        Args:
+            table: Current table metadata
+            table_state: Workouts state recorded by the previous sync
+
+        Returns:
+            True if the table was recreated, or (for upload-range syncs) lost rows
+        """
+        if not table_state:
+            return False
+        created = table.created.isoformat() if table.created else None
+        if table_state.get('created') and created != table_state['created']:
+            return True
+        previous_rows = table_state.get('num_rows')
+        return (table_state.get('mode') == 'upload_timestamp' and previous_rows is not None
+                and table.num_rows is not None and table.num_rows < previous_rows)
+
+    def _sync_partitions(self, table_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Re-download the months containing partitions modified since the last sync.
+
+        Args:
+            table_state: Previous workouts state ({'mode', 'partitions', 'watermark'})
+
+        Returns:
+            Statistics plus the new table state under 'state'
+        """
+        previous = (table_state.get('partitions', {})
+                    if table_state.get('mode') == 'partitions' else {})
+        partitions_sql = f"""
+        SELECT partition_id, UNIX_MILLIS(last_modified_time) AS last_modified
+        FROM `{self.project_id}.{self.dataset_id}.INFORMATION_SCHEMA.PARTITIONS`
+        WHERE table_name = @table_name AND NOT STARTS_WITH(partition_id, '__')
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ScalarQueryParameter("table_name", "STRING", self.table_id)]
+        )
+        df = self.executor.to_dataframe(partitions_sql, job_config=job_config,
+                                        label='mirror:partitions')
+        current = {row.partition_id: int(row.last_modified) for row in df.itertuples()}
+
+        changed = {pid for pid, modified in current.items() if previous.get(pid) != modified}
+        removed = set(previous) - set(current)
+        months = sorted({f"{pid[:4]}-{pid[4:6]}" for pid in changed | removed})
+
+        rows = 0
+        if months:
+            rows = self._rewrite_months(months)
+        if not previous:
+            # First sync in this mode: drop months that no longer exist upstream
+            self._remove_stale_months({f"{pid[:4]}-{pid[4:6]}" for pid in current})
+
+        return {
+            'mode': 'partitions',
+            'partitions_changed': len(changed),
+            'months_rewritten': len(months),
+            'rows_downloaded': rows,
+            'state': {
+                'mode': 'partitions',
+                'partitions': current,
+                'watermark': max(current.values(), default=None)
+            }
+        }
+
+    def _rewrite_months(self, months: List[str]) -> int:
+        """Download whole months of workouts and replace their mirror files.
+
+        Args:
+            months: Months as 'YYYY-MM'
+
+        Returns:
+            Number of rows downloaded
+        """
+        # The range filter on the partition column prunes; the month list filters within it
+        query = f"""
+        SELECT *
+        FROM `{self.table_ref}`
+        WHERE date >= TIMESTAMP(@first_month)
+          AND date < TIMESTAMP(DATE_ADD(@last_month, INTERVAL 1 MONTH))
+          AND DATE_TRUNC(DATE(date), MONTH) IN UNNEST(@months)
+        """
+        month_starts = [datetime.strptime(month, '%Y-%m').date() for month in months]
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("first_month", "DATE", month_starts[0]),
+                bigquery.ScalarQueryParameter("last_month", "DATE", month_starts[-1]),
+                bigquery.ArrayQueryParameter("months", "DATE", month_starts)
+            ]
+        )
+        df = self.executor.to_dataframe(query, job_config=job_config, label='mirror:workouts')
+
+        keys = _month_key(df['date']) if len(df) else pd.Series(dtype='str')
+        for month in months:
+            month_dir = self.workouts_dir / f"month={month}"
+            month_rows = df[keys == month]
+            if month_rows.empty:
+                shutil.rmtree(month_dir, ignore_errors=True)
+                continue
+            self._write_parquet(month_rows, month_dir / "data.parquet")
+            # Appended parts from upload-range syncs are superseded by the full month
+            for part in month_dir.glob('part-*.parquet'):
+                part.unlink()
+        return len(df)
+
+    def _remove_stale_months(self, months: set):
+        """Delete mirrored months that are not in the given set."""
+        if not self.workouts_dir.exists():
+            return
+        for month_dir in self.workouts_dir.glob('month=*'):
+            if month_dir.name.split('=', 1)[1] not in months:
+                shutil.rmtree(month_dir)
+
+    def _sync_upload_range(self, table_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Download rows uploaded since the settled upload_timestamp watermark.
+
+        One upload stamps the same upload_timestamp on all its load jobs, and
+        concurrent uploads can commit out of order, so rows may appear with a
+        timestamp older than ones already seen. Rows are therefore only
+        settled (appended as immutable part files) once they are
+        watermark_lag_seconds older than the newest row seen. Newer rows form
+        a tail that is re-read and rewritten on every sync, so the overlap is
+        never duplicated.
+
+        Args:
+            table_state: Previous workouts state ({'mode', 'watermark'})
+
+        Returns:
+            Statistics plus the new table state under 'state'
+        """
+        watermark: Optional[str] = None
+        if table_state.get('mode') == 'upload_timestamp':
+            watermark = table_state.get('watermark')
+        elif self.workouts_dir.exists():
+            shutil.rmtree(self.workouts_dir)
+
+        query = f"SELECT * FROM `{self.table_ref}`"
+        job_config = None
+        if watermark:
+            query += " WHERE upload_timestamp >= @watermark"
+            job_config = bigquery.QueryJobConfig(
+                query_parameters=[bigquery.ScalarQueryParameter(
+                    "watermark", "TIMESTAMP", datetime.fromisoformat(watermark)
+                )]
+            )
+        df = self.executor.to_dataframe(query, job_config=job_config, label='mirror:workouts')
+
+        uploaded = pd.to_datetime(df['upload_timestamp'], utc=True)
+        cutoff = watermark
+        if len(df):
+            newest = uploaded.max() - pd.Timedelta(seconds=self.watermark_lag_seconds)
+            if watermark is None or newest > pd.Timestamp(watermark):
+                cutoff = newest.isoformat()
+        settled = uploaded < pd.Timestamp(cutoff) if cutoff else pd.Series(False, index=df.index)
+
+        # Named after the watermark it continues from, so a retried sync overwrites it
+        part_name = f"part-{(watermark or 'initial').replace(':', '')}.parquet"
+        for tail in self.workouts_dir.glob(f"month=*/{TAIL_FILE}"):
+            tail.unlink()
+        for name, rows in ((part_name, df[settled]), (TAIL_FILE, df[~settled])):
+            if rows.empty:
+                continue
+            for month, month_rows in rows.groupby(_month_key(rows['date'])):
+                self._write_parquet(month_rows, self.workouts_dir / f"month={month}" / name)
+
+        return {
+            'mode': 'upload_timestamp',
+            'rows_downloaded': len(df),
+            'rows_settled': int(settled.sum()),
+            'state': {'mode': 'upload_timestamp', 'watermark': cutoff}
+        }
+
+    def _sync_mapping(self, table_state: Dict[str, Any]) -> Dict[str, Any]:
+        """Re-download the exercise mapping table if it changed.
+
+        Args:
+            table_state: Previous mapping state ({'modified'})
+
+        Returns:
+            Statistics plus the new table state under 'state'
+        """
+        mapping_ref = f"{self.project_id}.{self.dataset_id}.{MAPPING_TABLE_ID}"
+        mapping_path = self.mirror_dir / f"{MAPPING_TABLE_ID}.parquet"
+        try:
+            table = self.client.get_table(mapping_ref)
+        except Exception:
+            logger.info(f"Mapping table {mapping_ref} not found, skipping")
+            return {'rows_downloaded': 0, 'state': table_state}
+
+        modified = table.modified.isoformat() if table.modified else None
+        unchanged = modified is not None and modified == table_state.get('modified')
+        if unchanged and mapping_path.exists():
+            return {'rows_downloaded': 0, 'state': table_state}
+
+        df = self.executor.to_dataframe(f"SELECT * FROM `{mapping_ref}`", label='mirror:mapping')
+        self._write_parquet(df, mapping_path)
+        return {'rows_downloaded': len(df), 'state': {'modified': modified}}
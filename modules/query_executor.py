@@ -0,0 +1,489 @@
+"""Central BigQuery query execution with per-query cost and latency stats."""
+import copy
+import json
+import logging
+import threading
+import time
+import weakref
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import db_dtypes
+import pandas as pd
+import pyarrow as pa
+from google.cloud import bigquery
+
+from modules.single_flight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):  # noqa: N818
+    """Raised when a query would bill more bytes than the configured budget."""
+
+    def __init__(self, message: str, estimated_bytes: Optional[int] = None):
+        super().__init__(message)
+        self.estimated_bytes = estimated_bytes
+
+
+def _number(value: Any) -> Optional[float]:
+    """Return value if it is a plain number, else None (job stats may be unset)."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value
+
+
+def _rest_dtype(arrow_type: pa.DataType) -> Optional[Any]:
+    """Map Arrow types to the dtypes RowIterator.to_dataframe returns by default.
+
+    INT64 and BOOL become the nullable Int64 and boolean dtypes, so NULLs do
+    not turn them into float64 and object, and DATE and TIME become the
+    db-dtypes extension types.
+    """
+    if pa.types.is_boolean(arrow_type):
+        return pd.BooleanDtype()
+    if pa.types.is_integer(arrow_type):
+        return pd.Int64Dtype()
+    if pa.types.is_date32(arrow_type):
+        return db_dtypes.DateDtype()
+    if pa.types.is_time64(arrow_type):
+        return db_dtypes.TimeDtype()
+    return None
+
+
+def arrow_to_dataframe(table: pa.Table) -> pd.DataFrame:
+    """Convert an Arrow result to pandas without per-value Python objects.
+
+    Columns get the same dtypes as RowIterator's own to_dataframe (Int64,
+    boolean, dbdate and dbtime; timestamps become datetime64 columns), so
+    frames are the same whichever path fetched them. The Arrow buffers are released
+    column by column while converting to keep peak memory near one copy of
+    the result.
+
+    Args:
+        table: Query result as an Arrow table
+
+    Returns:
+        Result DataFrame
+    """
+    return table.to_pandas(types_mapper=_rest_dtype, split_blocks=True, self_destruct=True)
+
+
+class QueryExecutor:
+    """Run BigQuery queries for one client and record what each one cost.
+
+    Every query records its job id, wall time, bytes processed and billed,
+    cache hit and slot milliseconds. Records are kept in a bounded history
+    for the in-app profiler and emitted as one JSON log line each.
+
+    With max_bytes_billed set, every query carries that limit as
+    maximum_bytes_billed, so BigQuery refuses to run anything larger and
+    QueryBudgetExceeded is raised instead.
+
+    With dry_run_max_bytes set, queries that opt in with precheck=True are
+    first dry-run to estimate bytes scanned and rejected before submission
+    if the estimate is over budget. Estimates are cached per query text and
+    parameter values for estimate_ttl_seconds, so a query is only dry-run
+    once in a while; the least recently used of more than
+    estimate_cache_size estimates are dropped.
+
+    Identical concurrent to_dataframe calls (same SQL text and parameter
+    values) share one BigQuery job: the first caller runs it and the others
+    wait for its result. The number of avoided calls is kept as 'coalesced'.
+
+    With use_storage_api set, to_dataframe downloads results as Arrow record
+    batches through the BigQuery Storage Read API (when
+    google-cloud-bigquery-storage is installed, else Arrow over REST) and
+    converts them with arrow_to_dataframe, which is much faster for large
+    results than the default row-by-row decode.
+    """
+
+    def __init__(self, client: bigquery.Client, max_bytes_billed: Optional[int] = None,
+                 history_size: int = 200, dry_run_max_bytes: Optional[int] = None,
+                 estimate_ttl_seconds: float = 3600, use_storage_api: bool = False,
+                 estimate_cache_size: int = 256):
+        """Initialize the executor.
+
+        Args:
+            client: BigQuery client instance
+            max_bytes_billed: Optional per-query byte budget
+            history_size: Number of recent query records kept
+            dry_run_max_bytes: Optional estimated-bytes budget for prechecked queries
+            estimate_ttl_seconds: Seconds a dry-run estimate is reused
+            use_storage_api: Fetch DataFrame results as Arrow (Storage Read API)
+            estimate_cache_size: Maximum number of cached dry-run estimates
+        """
+        self.client = client
+        self.use_storage_api = use_storage_api
+        self.max_bytes_billed = max_bytes_billed
+        self.dry_run_max_bytes = dry_run_max_bytes
+        self.estimate_ttl_seconds = estimate_ttl_seconds
+        self.estimate_cache_size = estimate_cache_size
+        # (query text, params) -> (bytes, monotonic time), least recently used first
+        self._estimates: OrderedDict = OrderedDict()
+        self.history: deque = deque(maxlen=history_size)
+        self.totals = {
+            'queries': 0,
+            'errors': 0,
+            'cache_hits': 0,
+            'wall_seconds': 0.0,
+            'bytes_processed': 0,
+            'bytes_billed': 0,
+            'slot_ms': 0,
+            'dry_runs': 0,
+            'rejected': 0,
+            'coalesced': 0
+        }
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    @staticmethod
+    def _params_key(job_config: Optional[bigquery.QueryJobConfig]) -> str:
+        """Serialize a job config's query parameters for use in a coalescing key."""
+        if job_config is None or not job_config.query_parameters:
+            return ''
+        return json.dumps([param.to_api_repr() for param in job_config.query_parameters],
+                          sort_keys=True, default=str)
+
+    def _job_config(self, job_config: Optional[bigquery.QueryJobConfig]
+                    ) -> Optional[bigquery.QueryJobConfig]:
+        """Apply the byte budget to a job config.
+
+        Args:
+            job_config: Caller's job config, if any
+
+        Returns:
+            Copy of the job config with maximum_bytes_billed set to the tighter
+            of both limits (the caller's config is never modified)
+        """
+        if not self.max_bytes_billed:
+            return job_config
+
+        job_config = copy.deepcopy(job_config) if job_config else bigquery.QueryJobConfig()
+        current = job_config.maximum_bytes_billed
+        job_config.maximum_bytes_billed = (min(current, self.max_bytes_billed) if current
+                                           else self.max_bytes_billed)
+        return job_config
+
+    def estimate_bytes(self, sql: str, job_config: Optional[bigquery.QueryJobConfig] = None) -> int:
+        """Estimate bytes a query would scan with a (cached) dry run.
+
+        Estimates are cached per query text and parameter values: the
+        workouts table is partitioned by date, so a wider date range scans
+        more partitions. The cache is an LRU bounded by estimate_cache_size.
+
+        Args:
+            sql: Query text
+            job_config: Optional job config whose parameters are used for the dry run
+
+        Returns:
+            Estimated bytes processed
+        """
+        key = (sql, self._params_key(job_config))
+        now = time.monotonic()
+        with self._lock:
+            cached = self._estimates.get(key)
+            if cached and now - cached[1] < self.estimate_ttl_seconds:
+                self._estimates.move_to_end(key)
+                return cached[0]
+
+        dry_run_config = bigquery.QueryJobConfig(
+            dry_run=True,
+            use_query_cache=False,
+            query_parameters=list(job_config.query_parameters) if job_config else []
+        )
+        job = self.client.query(sql, job_config=dry_run_config)
+        estimate = int(_number(getattr(job, 'total_bytes_processed', None)) or 0)
+
+        with self._lock:
+            self._estimates[key] = (estimate, now)
+            self._estimates.move_to_end(key)
+            while len(self._estimates) > max(1, self.estimate_cache_size):
+                self._estimates.popitem(last=False)
+            self.totals['dry_runs'] += 1
+        return estimate
+
+    def check_budget(self, sql: str, job_config: Optional[bigquery.QueryJobConfig] = None,
+                     label: str = "query") -> Optional[int]:
+        """Reject a query whose dry-run estimate exceeds dry_run_max_bytes.
+
+        Args:
+            sql: Query text
+            job_config: Optional job config (parameters etc.)
+            label: Short name identifying the call site
+
+        Returns:
+            Estimated bytes, or None when no dry-run budget is configured
+
+        Raises:
+            QueryBudgetExceeded: If the estimate is over budget
+        """
+        if not self.dry_run_max_bytes:
+            return None
+
+        estimate = self.estimate_bytes(sql, job_config)
+        if estimate > self.dry_run_max_bytes:
+            with self._lock:
+                self.totals['rejected'] += 1
+            logger.warning(json.dumps({
+                'event': 'bigquery_query_rejected',
+                'label': label,
+                'estimated_bytes': estimate,
+                'dry_run_max_bytes': self.dry_run_max_bytes
+            }))
+            raise QueryBudgetExceeded(
+                f"Query '{label}' would scan ~{estimate:,} bytes, over the budget of "
+                f"{self.dry_run_max_bytes:,} bytes",
+                estimated_bytes=estimate
+            )
+        return estimate
+
+    def _execute(self, sql: str, job_config: Optional[bigquery.QueryJobConfig], label: str,
+                 fetch: Callable[[Any], Any], precheck: bool = False) -> Any:
+        """Run a query, fetch its result and record stats.
+
+        Args:
+            sql: Query text
+            job_config: Optional job config
+            label: Short name identifying the call site
+            fetch: Callable turning the query job into the returned result
+            precheck: Dry-run the query against dry_run_max_bytes first
+
+        Returns:
+            Result of fetch(job)
+
+        Raises:
+            QueryBudgetExceeded: If the query is over the dry-run or billed byte budget
+        """
+        if precheck:
+            self.check_budget(sql, job_config, label)
+
+        job_config = self._job_config(job_config)
+        start = time.perf_counter()
+        job = None
+        error = None
+
+        try:
+            job = self.client.query(sql, job_config=job_config)
+            result = fetch(job)
+            return result
+        except Exception as e:
+            error = str(e)
+            if 'bytesBilledLimitExceeded' in error or 'billing limit' in error.lower():
+                limit = job_config.maximum_bytes_billed if job_config else None
+                raise QueryBudgetExceeded(
+                    f"Query '{label}' exceeds the budget of {limit or 0:,} bytes billed"
+                ) from e
+            raise
+        finally:
+            self._record(label, sql, job, time.perf_counter() - start, error)
+
+    def run(self, sql: str, job_config: Optional[bigquery.QueryJobConfig] = None,
+            label: str = "query", timeout: Optional[float] = None, precheck: bool = False):
+        """Run a query and wait for its rows.
+
+        Args:
+            sql: Query text
+            job_config: Optional job config (parameters etc.)
+            label: Short name identifying the call site
+            timeout: Optional seconds to wait for the result
+            precheck: Dry-run the query against dry_run_max_bytes first
+
+        Returns:
+            Row iterator from QueryJob.result()
+        """
+        return self._execute(sql, job_config, label, lambda job: job.result(timeout=timeout),
+                             precheck)
+
+    def run_job(self, sql: str, job_config: Optional[bigquery.QueryJobConfig] = None,
+                label: str = "query", timeout: Optional[float] = None) -> bigquery.QueryJob:
+        """Run a statement to completion and return its job (e.g. for DML row counts).
+
+        Args:
+            sql: Query or DML/DDL text
+            job_config: Optional job config (parameters etc.)
+            label: Short name identifying the call site
+            timeout: Optional seconds to wait for completion
+
+        Returns:
+            The finished QueryJob
+        """
+        def fetch(job):
+            job.result(timeout=timeout)
+            return job
+
+        return self._execute(sql, job_config, label, fetch)
+
+    def _fetch_dataframe(self, job: bigquery.QueryJob, use_storage_api: bool) -> pd.DataFrame:
+        """Download a finished query's result as a DataFrame.
+
+        Args:
+            job: Query job
+            use_storage_api: Download Arrow record batches instead of decoding rows
+
+        Returns:
+            Query result DataFrame
+        """
+        if use_storage_api:
+            return arrow_to_dataframe(job.to_arrow(create_bqstorage_client=True))
+        return job.to_dataframe()
+
+    def to_dataframe(self, sql: str, job_config: Optional[bigquery.QueryJobConfig] = None,
+                     label: str = "query", precheck: bool = False,
+                     use_storage_api: Optional[bool] = None) -> pd.DataFrame:
+        """Run a query and return its result as a DataFrame.
+
+        Args:
+            sql: Query text
+            job_config: Optional job config (parameters etc.)
+            label: Short name identifying the call site
+            precheck: Dry-run the query against dry_run_max_bytes first
+            use_storage_api: Override the executor's use_storage_api for this call
+
+        Returns:
+            Query result DataFrame (a copy when it was shared with a concurrent caller)
+        """
+        if use_storage_api is None:
+            use_storage_api = self.use_storage_api
+        led = []
+
+        def execute():
+            led.append(True)
+            return self._execute(sql, job_config, label,
+                                 lambda job: self._fetch_dataframe(job, use_storage_api), precheck)
+
+        df = self._flights.do((sql, self._params_key(job_config)), execute)
+        if led:
+            return df
+
+        with self._lock:
+            self.totals['coalesced'] += 1
+        return df.copy()
+
+    def _record(self, label: str, sql: str, job: Any, wall_seconds: float, error: Optional[str]):
+        """Store and log the stats of a finished query.
+
+        Args:
+            label: Short name identifying the call site
+            sql: Query text
+            job: Query job, or None if submission failed
+            wall_seconds: Elapsed wall time
+            error: Error message if the query failed
+        """
+        job_id = getattr(job, 'job_id', None)
+        cache_hit = getattr(job, 'cache_hit', None)
+        record = {
+            'label': label,
+            'job_id': job_id if isinstance(job_id, str) else None,
+            'timestamp': datetime.now().isoformat(),
+            'wall_seconds': round(wall_seconds, 4),
+            'bytes_processed': _number(getattr(job, 'total_bytes_processed', None)),
+            'bytes_billed': _number(getattr(job, 'total_bytes_billed', None)),
+            'cache_hit': cache_hit if isinstance(cache_hit, bool) else None,
+            'slot_ms': _number(getattr(job, 'slot_millis', None)),
+            'error': error,
+            'sql': ' '.join(sql.split())[:500]
+        }
+
+        with self._lock:
+            self.history.append(record)
+            totals = self.totals
+            totals['queries'] += 1
+            totals['errors'] += 1 if error else 0
+            totals['cache_hits'] += 1 if record['cache_hit'] else 0
+            totals['wall_seconds'] += wall_seconds
+            totals['bytes_processed'] += record['bytes_processed'] or 0
+            totals['bytes_billed'] += record['bytes_billed'] or 0
+            totals['slot_ms'] += record['slot_ms'] or 0
+
+        log_record = {key: value for key, value in record.items() if key != 'sql'}
+        if error:
+            logger.warning(json.dumps({'event': 'bigquery_query', **log_record}))
+        else:
+            logger.info(json.dumps({'event': 'bigquery_query', **log_record}))
+
+    def get_history(self) -> List[Dict[str, Any]]:
+        """Get recent query records, oldest first.
+
+        Returns:
+            List of query stat dictionaries
+        """
+        with self._lock:
+            return list(self.history)
+
+    def get_summary(self) -> Dict[str, Any]:
+        """Get cumulative stats over all queries run by this executor.
+
+        Returns:
+            Dictionary with query, error and cache hit counts, wall time, bytes and slot-ms
+        """
+        with self._lock:
+            return dict(self.totals)
+
+    def clear_history(self):
+        """Forget recent query records (cumulative totals are kept)."""
+        with self._lock:
+            self.history.clear()
+
+
+# One executor per client so every module shares the same stats and budget
+# Each executor lives on its client, so both are freed together; this only lists them
+_EXECUTOR_ATTR = '_query_executor'
+_executors: 'weakref.WeakSet[QueryExecutor]' = weakref.WeakSet()
+_executors_lock = threading.Lock()
+
+
+def get_query_executor(client: bigquery.Client) -> QueryExecutor:
+    """Get the shared QueryExecutor for a client, creating it on first use.
+
+    Args:
+        client: BigQuery client instance
+
+    Returns:
+        QueryExecutor bound to the client
+    """
+    with _executors_lock:
+        executor = vars(client).get(_EXECUTOR_ATTR)
+        if executor is None:
+            executor = QueryExecutor(client)
+            setattr(client, _EXECUTOR_ATTR, executor)
+            _executors.add(executor)
+        return executor
+
+
+def configure_query_executor(client: bigquery.Client,
+                             query_settings: Dict[str, Any]) -> QueryExecutor:
+    """Apply the `query` section of bigquery_config.yaml to a client's executor.
+
+    Args:
+        client: BigQuery client instance
+        query_settings: Settings with optional max_bytes_billed, dry_run_max_bytes,
+            estimate_ttl_seconds, estimate_cache_size, use_storage_api and history_size
+
+    Returns:
+        The configured QueryExecutor
+    """
+    executor = get_query_executor(client)
+    executor.max_bytes_billed = query_settings.get('max_bytes_billed')
+    executor.dry_run_max_bytes = query_settings.get('dry_run_max_bytes')
+    executor.estimate_ttl_seconds = query_settings.get('estimate_ttl_seconds',
+                                                       executor.estimate_ttl_seconds)
+    executor.estimate_cache_size = query_settings.get('estimate_cache_size',
+                                                      executor.estimate_cache_size)
+    executor.use_storage_api = query_settings.get('use_storage_api', False)
+    history_size = query_settings.get('history_size')
+    if history_size and history_size != executor.history.maxlen:
+        with executor._lock:
+            executor.history = deque(executor.history, maxlen=history_size)
+    return executor
+
+
+def get_query_executors() -> List[QueryExecutor]:
+    """Get all executors created so far (for the query profiler).
+
+    Returns:
+        List of QueryExecutor instances
+    """
+    with _executors_lock:
+        return list(_executors)
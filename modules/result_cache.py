@@ -0,0 +1,185 @@
+"""Disk-backed cache of query result DataFrames shared across processes."""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(query: str, params: Optional[Dict[str, Any]] = None,
+                   version: Optional[str] = None) -> str:
+    """Build a cache key from query text, parameter values and data version.
+
+    Args:
+        query: Query text
+        params: Query parameter values by name
+        version: Data version the result was computed from
+
+    Returns:
+        Hex digest identifying the result
+    """
+    payload = json.dumps(
+        {'query': ' '.join(query.split()), 'params': params or {}, 'version': version},
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Store query results as Parquet files with a SQLite index.
+
+    Any number of processes may share one cache directory: files are written
+    to a temporary name and renamed into place, and the index lives in SQLite,
+    which serializes writers across processes. When the total size exceeds
+    max_bytes, least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir: str = ".query_cache", max_bytes: int = 256 * 1024 * 1024):
+        """Initialize the cache, creating its directory and index if needed.
+
+        Args:
+            cache_dir: Directory holding result files and index.sqlite
+            max_bytes: Total size of result files kept before evicting
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.index_path = self.cache_dir / "index.sqlite"
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+        self._lock = threading.Lock()
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    file TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Open a short-lived autocommit connection to the index."""
+        conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Get a cached result.
+
+        Args:
+            key: Key from make_cache_key
+
+        Returns:
+            Cached DataFrame, or None on a miss
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT file FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._count('misses')
+                return None
+
+            try:
+                df = pd.read_parquet(self.cache_dir / row[0])
+            except (FileNotFoundError, OSError):
+                # Evicted by another process between lookup and read
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._count('misses')
+                return None
+
+            conn.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key))
+
+        self._count('hits')
+        return df
+
+    def set(self, key: str, df: pd.DataFrame):
+        """Store a result and evict old entries if over the size limit.
+
+        Args:
+            key: Key from make_cache_key
+            df: Result DataFrame
+        """
+        file_name = f"{key}.parquet"
+        tmp_path = self.cache_dir / f"{key}.{uuid.uuid4().hex}.tmp"
+        try:
+            df.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, self.cache_dir / file_name)
+        except Exception as e:
+            logger.warning(f"Failed to write cached result {key}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+
+        now = time.time()
+        size = (self.cache_dir / file_name).stat().st_size
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, file, size, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, file_name, size, now, now)
+            )
+        self._count('writes')
+        self._evict()
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            evicted = []
+            if total > self.max_bytes:
+                for key, file_name, size in conn.execute(
+                    "SELECT key, file, size FROM entries ORDER BY last_access"
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    evicted.append(file_name)
+                    total -= size
+            conn.execute("COMMIT")
+
+        for file_name in evicted:
+            (self.cache_dir / file_name).unlink(missing_ok=True)
+        if evicted:
+            self._count('evictions', len(evicted))
+
+    def clear(self):
+        """Remove all cached results."""
+        with self._connect() as conn:
+            files = [row[0] for row in conn.execute("SELECT file FROM entries").fetchall()]
+            conn.execute("DELETE FROM entries")
+        for file_name in files:
+            (self.cache_dir / file_name).unlink(missing_ok=True)
+
+    def _count(self, stat: str, amount: int = 1):
+        """Increment a hit/miss/write/eviction counter."""
+        with self._lock:
+            self.stats[stat] += amount
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics for this process plus the shared index size.
+
+        Returns:
+            Dictionary with hits, misses, writes, evictions, entries and bytes
+        """
+        with self._connect() as conn:
+            entries, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        with self._lock:
+            return {**self.stats, 'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes}
@@ -0,0 +1,98 @@
+"""Coalesce concurrent calls for the same key into one execution."""
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class _Call:
+    """An in-flight call that followers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """Run at most one call per key at a time and share its outcome.
+
+    The first caller for a key (the leader) runs the function; callers
+    arriving while it runs wait and receive the same result or exception.
+    """
+
+    def __init__(self):
+        """Initialize an empty set of in-flight calls."""
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'shared': 0, 'background': 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn for key, or wait for the call already in flight.
+
+        Args:
+            key: Identity of the call
+            fn: Function computing the result
+
+        Returns:
+            Result of the (possibly shared) call
+        """
+        with self._lock:
+            self.stats['calls'] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+            else:
+                self.stats['shared'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def do_background(self, key: Hashable, fn: Callable[[], Any]) -> bool:
+        """Start fn for key on a daemon thread unless a call is already in flight.
+
+        Failures are logged; the caller keeps whatever result it already has.
+
+        Args:
+            key: Identity of the call
+            fn: Function computing the result
+
+        Returns:
+            True if a new background call was started
+        """
+        with self._lock:
+            if key in self._calls:
+                self.stats['shared'] += 1
+                return False
+            self.stats['background'] += 1
+
+        def run():
+            try:
+                self.do(key, fn)
+            except Exception as e:
+                logger.warning(f"Background refresh of {key!r} failed: {e}")
+
+        threading.Thread(target=run, name=f"refresh-{key!r}"[:64], daemon=True).start()
+        return True
+
+    def in_flight(self, key: Hashable) -> bool:
+        """Check whether a call for key is currently running."""
+        with self._lock:
+            return key in self._calls
@@ -17,7 +17,8 @@ def create_exercise_performance_chart(
     """Create interactive exercise performance chart.
     
     Args:
-        df: DataFrame from exercise_performance_metrics view
+        df: DataFrame from exercise_performance_metrics view, or for week/month/year
+            the matching buckets from WorkoutAnalytics.get_exercise_series
         kpi: KPI to display (1rm, total_volume, max_weight)
         x_axis: X-axis grouping (index, week, month, year)
         show_trend: Whether to show percentage change trend line
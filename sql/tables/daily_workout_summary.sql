@@ -0,0 +1,14 @@
+-- Daily Workout Summary Table
+-- Persisted per-day aggregates feeding the kpi_workouts view
+-- Columns: workout_date, workout_category, exercise_count, total_volume, updated_at
+--
+-- Maintained incrementally by daily_workout_summary_merge.sql after each upload
+
+CREATE TABLE IF NOT EXISTS `{project_id}.{dataset_id}.daily_workout_summary` (
+  workout_date DATE NOT NULL,
+  workout_category STRING NOT NULL,
+  exercise_count INT64,
+  total_volume FLOAT64,
+  updated_at TIMESTAMP
+)
+CLUSTER BY workout_date, workout_category;
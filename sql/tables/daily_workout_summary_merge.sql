@@ -0,0 +1,39 @@
+-- Daily Workout Summary Incremental Refresh
+-- Recomputes daily aggregates for the given dates only and upserts them
+-- Parameters:
+--   @dates: ARRAY<DATE> of workout dates touched by the upload
+--   @full_refresh: BOOL, recompute every date (e.g. after a mapping change)
+
+MERGE `{project_id}.{dataset_id}.daily_workout_summary` T
+USING (
+  SELECT
+    DATE(w.date) as workout_date,
+    CASE
+      WHEN COALESCE(e.muscle_group_level2, 'unknown') = 'legs' THEN 'legs'
+      WHEN COALESCE(e.muscle_group_level2, 'unknown') = 'push' THEN 'push'
+      WHEN COALESCE(e.muscle_group_level2, 'unknown') = 'pull' THEN 'pull'
+      WHEN COALESCE(e.muscle_group_level1, 'unknown') = 'upper' THEN 'upper'
+      WHEN COALESCE(e.muscle_group_level1, 'unknown') = 'lower' THEN 'lower'
+      ELSE 'other'
+    END as workout_category,
+    COUNT(*) as exercise_count,
+    SUM(w.weight_kg * w.reps) as total_volume
+  FROM `{project_id}.{dataset_id}.{table_id}` w
+  LEFT JOIN `{project_id}.{dataset_id}.exercise_muscle_mapping` e
+    ON TRIM(LOWER(w.exercise_name)) = TRIM(LOWER(e.exercise_name))
+  WHERE @full_refresh OR DATE(w.date) IN UNNEST(@dates)
+  GROUP BY workout_date, workout_category
+) S
+ON T.workout_date = S.workout_date
+  AND T.workout_category = S.workout_category
+WHEN MATCHED THEN
+  UPDATE SET
+    exercise_count = S.exercise_count,
+    total_volume = S.total_volume,
+    updated_at = CURRENT_TIMESTAMP()
+WHEN NOT MATCHED BY TARGET THEN
+  INSERT (workout_date, workout_category, exercise_count, total_volume, updated_at)
+  VALUES (S.workout_date, S.workout_category, S.exercise_count, S.total_volume, CURRENT_TIMESTAMP())
+WHEN NOT MATCHED BY SOURCE
+  AND (@full_refresh OR T.workout_date IN UNNEST(@dates)) THEN
+  DELETE;
@@ -0,0 +1,23 @@
+-- Exercise Series Sessions
+-- Per-exercise, per-day aggregates behind the local exercise series store
+-- Parameters:
+--   @exercises: ARRAY<STRING> of exercise names to read (empty = all exercises)
+--   @dates: ARRAY<DATE> of workout dates to read (empty = all dates)
+
+SELECT
+  exercise_name,
+  DATE(date) as workout_date,
+  MAX(weight_kg) as max_weight,
+  SUM(weight_kg * reps) as total_volume,
+  -- Estimated 1RM using the Brzycki formula
+  MAX(
+    CASE
+      WHEN reps >= 1 AND reps < 36
+      THEN weight_kg * (36.0 / (37.0 - reps))
+      ELSE weight_kg
+    END
+  ) as estimated_1rm
+FROM `{project_id}.{dataset_id}.{table_id}`
+WHERE (ARRAY_LENGTH(@exercises) = 0 OR exercise_name IN UNNEST(@exercises))
+  AND (ARRAY_LENGTH(@dates) = 0 OR DATE(date) IN UNNEST(@dates))
+GROUP BY exercise_name, workout_date
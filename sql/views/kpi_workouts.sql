@@ -6,6 +6,8 @@
 -- KPIs: visits, legs, push, pull, upper, lower, rest_days
 -- Date Periods: 7D, 14D, 30D, 2MO, 3MO, 6MO, 1Y
 -- Metrics: count, average, total, min, max
+--
+-- Reads the daily_workout_summary table rather than raw workout rows
 
 WITH 
 time_periods AS (
@@ -18,147 +20,70 @@ time_periods AS (
   SELECT '1Y', DATE_SUB(CURRENT_DATE(), INTERVAL 1 YEAR)
 ),
 
-enriched_workouts AS (
-  SELECT 
-    w.*,
-    COALESCE(e.muscle_group_level1, 'unknown') as muscle_group_level1,
-    COALESCE(e.muscle_group_level2, 'unknown') as muscle_group_level2,
-    e.muscle_group_level3,
-    e.is_compound
-  FROM `streamlit-dashboard-venleevi.workout_data.workouts` w
-  LEFT JOIN `streamlit-dashboard-venleevi.workout_data.exercise_muscle_mapping` e
-    ON TRIM(LOWER(w.exercise_name)) = TRIM(LOWER(e.exercise_name))
-),
-
--- Daily workout aggregations by date and muscle group
+-- Daily workout aggregations by date and muscle group, maintained
+-- incrementally on upload (see sql/tables/daily_workout_summary_merge.sql)
 daily_workouts AS (
   SELECT 
-    DATE(date) as workout_date,
-    CASE 
-      WHEN muscle_group_level2 = 'legs' THEN 'legs'
-      WHEN muscle_group_level2 = 'push' THEN 'push'
-      WHEN muscle_group_level2 = 'pull' THEN 'pull'
-      WHEN muscle_group_level1 = 'upper' THEN 'upper'
-      WHEN muscle_group_level1 = 'lower' THEN 'lower'
-      ELSE 'other'
-    END as workout_category,
-    COUNT(*) as exercise_count,
-    SUM(weight_kg * reps) as total_volume
-  FROM enriched_workouts
-  GROUP BY workout_date, workout_category
-),
-
--- KPI: Total workout visits (unique workout days)
-visits_kpi AS (
-  SELECT 
-    'workouts' as type,
-    'visits' as kpi,
-    tp.period as date,
-    'count' as metric,
-    CAST(COUNT(DISTINCT dw.workout_date) AS FLOAT64) as value
-  FROM time_periods tp
-  CROSS JOIN daily_workouts dw
-  WHERE dw.workout_date >= tp.start_date
-  GROUP BY tp.period
-),
-
--- KPI: Rest days
-rest_days_kpi AS (
-  SELECT 
-    'workouts' as type,
-    'rest_days' as kpi,
-    tp.period as date,
-    'count' as metric,
-    CAST(DATE_DIFF(CURRENT_DATE(), tp.start_date, DAY) - COUNT(DISTINCT dw.workout_date) AS FLOAT64) as value
-  FROM time_periods tp
-  CROSS JOIN daily_workouts dw
-  WHERE dw.workout_date >= tp.start_date
-  GROUP BY tp.period, tp.start_date
-),
-
--- KPI: Muscle group specific workouts - count of workout days
-muscle_group_count AS (
-  SELECT 
-    'workouts' as type,
-    dw.workout_category as kpi,
-    tp.period as date,
-    'count' as metric,
-    CAST(COUNT(DISTINCT dw.workout_date) AS FLOAT64) as value
-  FROM time_periods tp
-  CROSS JOIN daily_workouts dw
-  WHERE dw.workout_date >= tp.start_date
-    AND dw.workout_category IN ('legs', 'push', 'pull', 'upper', 'lower')
-  GROUP BY tp.period, dw.workout_category
-),
-
--- KPI: Average number of exercises per workout
-muscle_group_avg_exercises AS (
-  SELECT 
-    'workouts' as type,
-    dw.workout_category as kpi,
-    tp.period as date,
-    'average' as metric,
-    ROUND(AVG(dw.exercise_count), 2) as value
-  FROM time_periods tp
-  CROSS JOIN daily_workouts dw
-  WHERE dw.workout_date >= tp.start_date
-    AND dw.workout_category IN ('legs', 'push', 'pull', 'upper', 'lower')
-  GROUP BY tp.period, dw.workout_category
-),
-
--- KPI: Total volume (weight * reps) for muscle group
-muscle_group_total_volume AS (
-  SELECT 
-    'workouts' as type,
-    dw.workout_category as kpi,
-    tp.period as date,
-    'total' as metric,
-    CAST(ROUND(SUM(dw.total_volume), 2) AS FLOAT64) as value
-  FROM time_periods tp
-  CROSS JOIN daily_workouts dw
-  WHERE dw.workout_date >= tp.start_date
-    AND dw.workout_category IN ('legs', 'push', 'pull', 'upper', 'lower')
-  GROUP BY tp.period, dw.workout_category
+    workout_date,
+    workout_category,
+    exercise_count,
+    total_volume
+  FROM `{project_id}.{dataset_id}.daily_workout_summary`
+  WHERE workout_date >= DATE_SUB(CURRENT_DATE(), INTERVAL 1 YEAR)
 ),
 
--- KPI: Minimum exercises in a single workout
-muscle_group_min_exercises AS (
+-- Tag each daily row once with every period it falls into
+tagged_days AS (
   SELECT 
-    'workouts' as type,
-    dw.workout_category as kpi,
-    tp.period as date,
-    'min' as metric,
-    CAST(MIN(dw.exercise_count) AS FLOAT64) as value
-  FROM time_periods tp
-  CROSS JOIN daily_workouts dw
-  WHERE dw.workout_date >= tp.start_date
-    AND dw.workout_category IN ('legs', 'push', 'pull', 'upper', 'lower')
-  GROUP BY tp.period, dw.workout_category
+    tp.period,
+    tp.start_date,
+    dw.workout_date,
+    dw.workout_category,
+    dw.exercise_count,
+    dw.total_volume
+  FROM daily_workouts dw
+  JOIN time_periods tp
+    ON dw.workout_date >= tp.start_date
 ),
 
--- KPI: Maximum exercises in a single workout
-muscle_group_max_exercises AS (
+-- All metrics in one pass: per period (visits, rest days) and per period and category
+period_metrics AS (
   SELECT 
-    'workouts' as type,
-    dw.workout_category as kpi,
-    tp.period as date,
-    'max' as metric,
-    CAST(MAX(dw.exercise_count) AS FLOAT64) as value
-  FROM time_periods tp
-  CROSS JOIN daily_workouts dw
-  WHERE dw.workout_date >= tp.start_date
-    AND dw.workout_category IN ('legs', 'push', 'pull', 'upper', 'lower')
-  GROUP BY tp.period, dw.workout_category
+    period,
+    start_date,
+    workout_category,
+    GROUPING(workout_category) = 1 as is_period_total,
+    COUNT(DISTINCT workout_date) as workout_days,
+    AVG(exercise_count) as avg_exercises,
+    SUM(total_volume) as total_volume,
+    MIN(exercise_count) as min_exercises,
+    MAX(exercise_count) as max_exercises
+  FROM tagged_days
+  GROUP BY GROUPING SETS (
+    (period, start_date),
+    (period, start_date, workout_category)
+  )
 )
 
--- Combine all KPIs
-SELECT * FROM visits_kpi
-UNION ALL SELECT * FROM rest_days_kpi
-UNION ALL SELECT * FROM muscle_group_count
-UNION ALL SELECT * FROM muscle_group_avg_exercises
-UNION ALL SELECT * FROM muscle_group_total_volume
-UNION ALL SELECT * FROM muscle_group_min_exercises
-UNION ALL SELECT * FROM muscle_group_max_exercises
+-- Unpivot each aggregate row into its (kpi, metric, value) rows
+SELECT 
+  'workouts' as type,
+  m.kpi,
+  pm.period as date,
+  m.metric,
+  m.value
+FROM period_metrics pm
+CROSS JOIN UNNEST([
+  STRUCT('visits' as kpi, 'count' as metric, CAST(pm.workout_days AS FLOAT64) as value, pm.is_period_total as keep),
+  STRUCT('rest_days', 'count', CAST(DATE_DIFF(CURRENT_DATE(), pm.start_date, DAY) - pm.workout_days AS FLOAT64), pm.is_period_total),
+  STRUCT(pm.workout_category, 'count', CAST(pm.workout_days AS FLOAT64), NOT pm.is_period_total),
+  STRUCT(pm.workout_category, 'average', ROUND(pm.avg_exercises, 2), NOT pm.is_period_total),
+  STRUCT(pm.workout_category, 'total', CAST(ROUND(pm.total_volume, 2) AS FLOAT64), NOT pm.is_period_total),
+  STRUCT(pm.workout_category, 'min', CAST(pm.min_exercises AS FLOAT64), NOT pm.is_period_total),
+  STRUCT(pm.workout_category, 'max', CAST(pm.max_exercises AS FLOAT64), NOT pm.is_period_total)
+]) m
+WHERE m.keep
+  AND (pm.is_period_total OR pm.workout_category IN ('legs', 'push', 'pull', 'upper', 'lower'))
 
 ORDER BY 
   kpi,
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Sync the local Parquet mirror of the workouts and exercise mapping tables."""
+
+import argparse
+import sys
+
+from modules.cli_common import create_uploader
+from modules.config_loader import ConfigLoader
+from modules.parquet_mirror import ParquetMirror
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Download workouts changed since the last sync into the local Parquet mirror."
+    )
+    parser.add_argument('--mirror-dir', default=None,
+                        help="Mirror directory "
+                             "(default: mirror.mirror_dir in bigquery_config.yaml)")
+    parser.add_argument('--full', action='store_true',
+                        help="Ignore the recorded watermark and download everything")
+    return parser.parse_args()
+
+
+def main():
+    """Sync the mirror once."""
+    args = parse_args()
+
+    print("🏋️  Syncing Parquet Mirror...")
+    print("-" * 50)
+
+    try:
+        config_loader = ConfigLoader()
+        mirror_settings = config_loader.get_bigquery_config().get('mirror', {})
+        mirror_dir = args.mirror_dir or mirror_settings.get('mirror_dir', '.mirror')
+
+        uploader = create_uploader(config_loader)
+        mirror = ParquetMirror(
+            uploader.client, uploader.project_id, uploader.dataset_id,
+            mirror_dir=mirror_dir, table_id=uploader.table_id,
+            watermark_lag_seconds=mirror_settings.get('watermark_lag_seconds', 3600)
+        )
+        print(f"📁 Mirror: {mirror.mirror_dir}")
+        print()
+
+        print("☁️  Downloading changes...")
+        result = mirror.sync(full=args.full)
+
+        if not result.get('success'):
+            print("❌ Sync failed!")
+            print(f"Error: {result.get('error', 'Unknown error')}")
+            sys.exit(1)
+
+        workouts = result['workouts']
+        print("✅ Sync successful!")
+        print(f"🗂️  Mode: {workouts['mode']}")
+        if workouts.get('full_resync'):
+            print("🔁 Full resync (table was replaced or --full)")
+        if workouts['mode'] == 'partitions':
+            print(f"🔄 Partitions changed: {workouts['partitions_changed']:,}")
+            print(f"🔄 Months rewritten: {workouts['months_rewritten']:,}")
+        print(f"📊 Workout rows downloaded: {workouts['rows_downloaded']:,}")
+        print(f"📊 Mapping rows downloaded: {result['mapping']['rows_downloaded']:,}")
+
+    except FileNotFoundError as e:
+        print(f"❌ Configuration file not found: {e}")
+        sys.exit(1)
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+    print()
+    print("🎉 Done!")
+
+
+if __name__ == "__main__":
+    main()
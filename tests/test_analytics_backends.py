@@ -0,0 +1,217 @@
+"""Unit tests for analytics query backends."""
+import threading
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+import yaml
+
+from modules.analytics import WorkoutAnalytics
+from modules.analytics_backends import (
+    MAX_REST_DAYS,
+    MAX_TOP_EXERCISES,
+    BigQueryBackend,
+    LocalParquetBackend,
+)
+from modules.csv_parser import CSVParser
+from modules.data_enrichment import DataEnrichment
+
+
+@pytest.fixture
+def workouts():
+    """Parse and enrich the sample workout CSV."""
+    with open('config/csv_schema.yaml') as f:
+        df = CSVParser(yaml.safe_load(f)).parse_csv('tests/sample_workout_data.csv')
+    with open('config/exercise_mapping.yaml') as f:
+        return DataEnrichment(yaml.safe_load(f)).enrich_dataframe(df)
+
+
+@pytest.fixture
+def mirror_dir(tmp_path, workouts):
+    """Write the workouts frame as a Parquet mirror."""
+    workouts.to_parquet(tmp_path / 'workouts.parquet', index=False)
+    return tmp_path
+
+
+def test_local_backend_overview(mirror_dir, workouts):
+    """Test overview metrics computed from the Parquet mirror."""
+    backend = LocalParquetBackend(str(mirror_dir))
+
+    overview = backend.get_workout_overview()
+
+    assert overview['total_exercises'] == len(workouts)
+    assert overview['total_workouts'] == workouts['date'].dt.date.nunique()
+    assert overview['unique_exercises'] == workouts['exercise_name'].nunique()
+    volume = (workouts['weight_kg'] * workouts['reps']).sum()
+    assert overview['total_volume_kg'] == pytest.approx(volume)
+
+
+def test_local_backend_result_schemas(mirror_dir, workouts):
+    """Test local results use the same columns as the BigQuery queries."""
+    backend = LocalParquetBackend(str(mirror_dir))
+
+    frequency = backend.get_workout_frequency_by_date()
+    assert list(frequency.columns) == ['date', 'workout_count']
+    assert frequency['date'].is_monotonic_increasing
+
+    distribution = backend.get_muscle_group_distribution()
+    assert list(distribution.columns) == ['level', 'muscle_group', 'exercise_count']
+    assert distribution.groupby('level')['exercise_count'].sum().tolist() == [len(workouts)] * 2
+
+    top = backend.get_top_exercises(limit=3)
+    assert list(top.columns) == [
+        'exercise_name', 'total_sets', 'avg_weight', 'max_weight', 'total_volume'
+    ]
+    assert len(top) == 3
+    assert top['total_sets'].is_monotonic_decreasing
+
+    exercises = backend.get_all_exercises()
+    assert exercises['exercise_name'].tolist() == sorted(workouts['exercise_name'].unique())
+
+    name = workouts['exercise_name'].iloc[0]
+    performance = backend.get_exercise_performance(name)
+    assert list(performance.columns) == [
+        'date', 'max_weight', 'avg_weight', 'total_volume', 'total_sets'
+    ]
+    assert performance['total_sets'].sum() == (workouts['exercise_name'] == name).sum()
+
+
+def test_local_backend_rest_days(tmp_path):
+    """Test rest days mark dates with workouts in the last N days."""
+    today = datetime.now(timezone.utc).date()
+    pd.DataFrame({
+        'date': pd.to_datetime([today - timedelta(days=1), today - timedelta(days=3)]),
+        'workout_name': ['a', 'b'],
+        'exercise_name': ['Squat', 'Squat'],
+        'weight_kg': [100.0, 100.0],
+        'reps': [5, 5],
+    }).to_parquet(tmp_path / 'workouts.parquet', index=False)
+
+    rest_days = LocalParquetBackend(str(tmp_path)).get_rest_days(days=5)
+
+    assert list(rest_days['day_type']) == ['Rest', 'Workout', 'Rest', 'Workout', 'Rest']
+    assert rest_days['date'].iloc[0] == today
+
+
+@pytest.mark.parametrize('requested, expected', [(0, 1), (-5, 1), (30, 30), (10000, MAX_REST_DAYS)])
+def test_rest_days_clamped_alike_on_both_backends(mirror_dir, requested, expected):
+    """Test both backends clamp days to 1..MAX_REST_DAYS."""
+    bigquery_backend = BigQueryBackend(Mock(), 'p', 'd')
+    bigquery_backend._query = Mock(return_value=pd.DataFrame())
+
+    bigquery_backend.get_rest_days(days=requested)
+    local = LocalParquetBackend(str(mirror_dir)).get_rest_days(days=requested)
+
+    job_config = bigquery_backend._query.call_args.args[2]
+    assert job_config.query_parameters[0].value == expected
+    assert len(local) == expected
+
+
+@pytest.mark.parametrize('requested, expected',
+                         [(0, 1), (-5, 1), (3, 3), (10000, MAX_TOP_EXERCISES)])
+def test_top_exercises_limit_clamped_alike_on_both_backends(mirror_dir, workouts,
+                                                            requested, expected):
+    """Test both backends clamp the top exercises limit to 1..MAX_TOP_EXERCISES."""
+    bigquery_backend = BigQueryBackend(Mock(), 'p', 'd')
+    bigquery_backend._query = Mock(return_value=pd.DataFrame())
+
+    bigquery_backend.get_top_exercises(limit=requested)
+    local = LocalParquetBackend(str(mirror_dir)).get_top_exercises(limit=requested)
+
+    job_config = bigquery_backend._query.call_args.args[2]
+    assert job_config.query_parameters[0].value == expected
+    assert len(local) == min(expected, workouts['exercise_name'].nunique())
+
+
+def test_workout_analytics_uses_backend(mirror_dir, workouts):
+    """Test WorkoutAnalytics runs offline with the local backend."""
+    analytics = WorkoutAnalytics(None, 'project', 'dataset',
+                                 backend=LocalParquetBackend(str(mirror_dir)))
+
+    assert analytics.check_table_exists() is True
+    assert analytics.backend.get_workout_overview()['total_exercises'] == len(workouts)
+
+
+def test_local_backend_missing_mirror(tmp_path):
+    """Test a missing mirror reports no table."""
+    assert LocalParquetBackend(str(tmp_path)).check_table_exists() is False
+
+
+class DuckDBQueryClient:
+    """Fake BigQuery client running transpiled BigQuery SQL on DuckDB."""
+
+    def __init__(self, tables):
+        duckdb = pytest.importorskip('duckdb')
+        self.sqlglot = pytest.importorskip('sqlglot')
+        self.connection = duckdb.connect()
+        self.queries = []
+        for name, df in tables.items():
+            self.connection.register(name, df)
+
+    def query(self, sql, job_config=None):
+        self.queries.append(sql)
+        sql = sql.replace('`p.d.workouts`', 'workouts')
+        transpiled = self.sqlglot.transpile(sql, read='bigquery', write='duckdb')[0]
+        result = self.connection.execute(transpiled).df()
+        job = type('Job', (), {})()
+        job.to_dataframe = lambda: result
+        return job
+
+
+def test_dashboard_bundle_single_query_matches_local(mirror_dir, workouts):
+    """Test the GROUPING SETS bundle matches the per-method results in one query."""
+    client = DuckDBQueryClient({'workouts': workouts})
+    bundle = BigQueryBackend(client, 'p', 'd').get_dashboard_bundle(limit=5)
+    expected = LocalParquetBackend(str(mirror_dir)).get_dashboard_bundle(limit=5)
+
+    assert len(client.queries) == 1
+    assert bundle['overview'] == expected['overview']
+
+    def same(part, name):
+        return bundle[part][name].tolist() == expected[part][name].tolist()
+
+    assert same('frequency', 'workout_count')
+    assert ([str(d) for d in bundle['frequency']['date'].dt.date]
+            == [str(d) for d in expected['frequency']['date']])
+    assert same('all_exercises', 'exercise_name')
+
+    def by_key(df, keys):
+        return df.sort_values(keys).reset_index(drop=True)
+
+    pd.testing.assert_frame_equal(
+        by_key(bundle['distribution'], ['level', 'muscle_group']),
+        by_key(expected['distribution'], ['level', 'muscle_group']),
+        check_dtype=False
+    )
+    assert same('top_exercises', 'total_sets')
+
+
+def test_fetch_many_runs_queries_concurrently():
+    """Test fetch_many submits every query before waiting on any of them."""
+    barrier = threading.Barrier(3, timeout=5)
+
+    def slow(result):
+        def fetch(*args):
+            barrier.wait()  # Breaks unless all three queries are in flight together
+            return result
+        return fetch
+
+    backend = Mock()
+    backend.get_data_version.return_value = 'v1'
+    backend.get_workout_overview.side_effect = slow({'total_workouts': 3})
+    backend.get_top_exercises.side_effect = slow(pd.DataFrame({'exercise_name': ['Squat']}))
+    backend.get_rest_days.side_effect = slow(pd.DataFrame({'date': [], 'day_type': []}))
+    analytics = WorkoutAnalytics(None, 'p', 'd', backend=backend)
+
+    results = analytics.fetch_many(
+        ['workout_overview', ('top_exercises', {'limit': 5}), 'rest_days']
+    )
+
+    assert set(results) == {'workout_overview', 'top_exercises', 'rest_days'}
+    assert results['workout_overview'] == {'total_workouts': 3}
+    assert results['top_exercises']['exercise_name'].tolist() == ['Squat']
+    backend.get_top_exercises.assert_called_once_with(5)
+
+    with pytest.raises(ValueError):
+        analytics.fetch_many(['no_such_query'])
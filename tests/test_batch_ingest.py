@@ -0,0 +1,81 @@
+"""Unit tests for batch ingest module."""
+import shutil
+
+import pytest
+import yaml
+
+import modules.batch_ingest
+from modules.batch_ingest import BatchIngestor, discover_files
+
+SAMPLE_CSV = 'tests/sample_workout_data.csv'
+
+
+class FakeUploader:
+    """Uploader stand-in that records load jobs."""
+
+    def __init__(self):
+        self.jobs = []
+
+    def upload_dataframe(self, df):
+        self.jobs.append(df)
+        return {'success': True, 'rows_uploaded': len(df), 'duration_seconds': 0.0}
+
+
+@pytest.fixture
+def configs():
+    with open('config/csv_schema.yaml') as f:
+        csv_schema = yaml.safe_load(f)
+    with open('config/exercise_mapping.yaml') as f:
+        mapping_config = yaml.safe_load(f)
+    return csv_schema, mapping_config
+
+
+def test_batch_ingest_coalesces_and_resumes(tmp_path, configs):
+    """Test files are coalesced into load jobs and skipped on the next run."""
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    for i in range(3):
+        shutil.copy(SAMPLE_CSV, data_dir / f'member_{i}.csv')
+
+    files = discover_files([str(data_dir)])
+    assert len(files) == 3
+
+    state_path = tmp_path / 'state.json'
+    uploader = FakeUploader()
+    ingestor = BatchIngestor(uploader, *configs, state_path=str(state_path),
+                             workers=2, coalesce_rows=100)
+    summary = ingestor.run(files)
+
+    assert summary['success'] is True
+    assert summary['files_uploaded'] == 3
+    assert summary['rows_uploaded'] == 150
+    assert summary['load_jobs'] == 2  # 100 rows, then the 50-row remainder
+
+    resumed = BatchIngestor(FakeUploader(), *configs, state_path=str(state_path), workers=2)
+    summary = resumed.run(files)
+
+    assert summary['files_skipped'] == 3
+    assert summary['load_jobs'] == 0
+
+
+def test_batch_ingest_bounds_files_in_flight(tmp_path, configs, monkeypatch):
+    """Test only a few files per worker are submitted ahead of collection."""
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    for i in range(6):
+        shutil.copy(SAMPLE_CSV, data_dir / f'member_{i}.csv')
+
+    waited = []
+    real_wait = modules.batch_ingest.wait
+
+    def recording_wait(futures, return_when):
+        waited.append(len(futures))
+        return real_wait(futures, return_when=return_when)
+
+    monkeypatch.setattr(modules.batch_ingest, 'wait', recording_wait)
+    ingestor = BatchIngestor(FakeUploader(), *configs, state_path=str(tmp_path / 'state.json'),
+                             workers=1)
+    summary = ingestor.run(discover_files([str(data_dir)]))
+
+    assert summary['files_uploaded'] == 6
+    assert max(waited) == 2
@@ -0,0 +1,369 @@
+"""Unit tests for BigQuery uploader module."""
+import io
+import re
+from unittest.mock import Mock
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+import yaml
+from google.cloud import bigquery
+
+from modules.bigquery_uploader import BigQueryUploader
+from modules.csv_parser import CSVParser
+from modules.data_enrichment import DataEnrichment
+
+
+class FakeLoadClient:
+    """Local stand-in for bigquery.Client that records load payloads."""
+
+    def __init__(self):
+        self.loads = []
+
+    def load_table_from_file(self, file_obj, destination, job_config=None):
+        payload = file_obj.read()
+        self.loads.append({'kind': 'file', 'bytes': len(payload), 'payload': payload,
+                           'job_config': job_config})
+        return Mock()
+
+    def load_table_from_dataframe(self, dataframe, destination, job_config=None):
+        # The real client serializes frames to Parquet before sending
+        buffer = io.BytesIO()
+        dataframe.to_parquet(buffer, index=False)
+        self.loads.append({'kind': 'dataframe', 'bytes': buffer.tell(), 'dataframe': dataframe,
+                           'job_config': job_config})
+        return Mock()
+
+
+@pytest.fixture
+def bq_config(tmp_path):
+    """Load BigQuery configuration, with local state kept under tmp_path."""
+    with open('config/bigquery_config.yaml') as f:
+        config = yaml.safe_load(f)
+    config['upload']['manifest_dir'] = str(tmp_path / 'manifest')
+    config['upload']['series_store_dir'] = str(tmp_path / 'series')
+    return config
+
+
+@pytest.fixture
+def workouts():
+    """Parse the sample workout CSV, repeated to a larger frame."""
+    with open('config/csv_schema.yaml') as f:
+        parser = CSVParser(yaml.safe_load(f))
+    df = parser.parse_csv('tests/sample_workout_data.csv')
+    return pd.concat([df] * 200, ignore_index=True)
+
+
+def make_uploader(bq_config, **settings):
+    upload_settings = {**bq_config['upload'], 'deduplicate': False, 'refresh_daily_summary': False,
+                       'refresh_exercise_series': False, **settings}
+    uploader = BigQueryUploader(bq_config['table_schema'], upload_settings, 'EU')
+    uploader.client = FakeLoadClient()
+    uploader.project_id, uploader.dataset_id, uploader.table_id = 'p', 'd', 'workouts'
+    return uploader
+
+
+def test_parquet_upload_uses_configured_schema(bq_config, workouts):
+    """Test the Parquet load path sends typed columns with an explicit schema."""
+    uploader = make_uploader(bq_config, load_format='parquet', parquet_compression='zstd')
+
+    result = uploader.upload_dataframe(workouts)
+
+    assert result['success'] is True
+    assert result['rows_uploaded'] == len(workouts)
+    load = uploader.client.loads[0]
+    assert load['kind'] == 'file'
+    assert result['bytes_sent'] == load['bytes']
+    assert load['job_config'].source_format == 'PARQUET'
+    loaded_fields = [f.name for f in load['job_config'].schema]
+    assert loaded_fields[:3] == ['date', 'workout_name', 'exercise_name']
+
+    table = pq.read_table(io.BytesIO(load['payload']))
+    assert table.schema.field('date').type == pa.timestamp('us', tz='UTC')
+    assert table.schema.field('reps').type == pa.int64()
+    assert table.column('exercise_name').to_pylist() == list(workouts['exercise_name'])
+    assert table.column('data_source').to_pylist() == ['csv_upload'] * len(workouts)
+    assert 'upload_timestamp' not in workouts.columns  # Source frame left untouched
+
+
+def test_enriched_upload_matches_created_table(bq_config, workouts):
+    """Test enrichment columns are part of the created table and the append load schema."""
+    with open('config/exercise_mapping.yaml') as f:
+        enriched = DataEnrichment(yaml.safe_load(f)).enrich_dataframe(workouts.iloc[:50])
+    uploader = make_uploader(bq_config, load_format='parquet')
+    uploader.client.get_table = Mock(side_effect=Exception("Not found"))
+    uploader.client.create_table = Mock()
+
+    uploader.create_table_if_not_exists()
+    result = uploader.upload_dataframe(enriched)
+
+    assert result['success'] is True
+    created = {field.name for field in uploader.client.create_table.call_args.args[0].schema}
+    job_config = uploader.client.loads[0]['job_config']
+    loaded = {field.name: field for field in job_config.schema}
+    assert set(loaded) <= created
+    assert loaded['muscle_group_level1'].field_type == 'STRING'
+    assert loaded['muscle_group_level2'].mode == 'NULLABLE'
+    assert job_config.create_disposition == 'CREATE_NEVER'
+    # Tables created before the enrichment columns were configured gain them
+    assert job_config.schema_update_options == ['ALLOW_FIELD_ADDITION']
+
+
+def test_parquet_upload_reports_lossy_conversions(bq_config, workouts):
+    """Test values that do not fit their column type fail the batch instead of being truncated."""
+    uploader = make_uploader(bq_config, load_format='parquet', batch_size=100)
+    df = workouts.iloc[:200].assign(reps=1.0)
+    df.loc[150, 'reps'] = 2.5
+
+    result = uploader.upload_dataframe(df)
+
+    assert result['success'] is False
+    assert result['rows_uploaded'] == 100
+    assert [batch['success'] for batch in result['batches']] == [True, False]
+    assert 'Failed to convert batch' in result['error']
+    assert len(uploader.client.loads) == 1
+
+
+def test_parquet_upload_bytes_and_serialization_time(bq_config, workouts):
+    """Test compressed Parquet payloads are smaller than the dataframe path."""
+    dataframe_uploader = make_uploader(bq_config, load_format='dataframe')
+    parquet_uploader = make_uploader(bq_config, load_format='parquet', parquet_compression='zstd')
+    uncompressed_uploader = make_uploader(bq_config, load_format='parquet',
+                                          parquet_compression='none')
+
+    dataframe_uploader.upload_dataframe(workouts)
+    parquet_result = parquet_uploader.upload_dataframe(workouts)
+    uncompressed_result = uncompressed_uploader.upload_dataframe(workouts)
+
+    dataframe_bytes = dataframe_uploader.client.loads[0]['bytes']
+    assert parquet_result['bytes_sent'] < dataframe_bytes
+    assert parquet_result['bytes_sent'] < uncompressed_result['bytes_sent']
+    assert parquet_result['serialize_seconds'] >= 0
+
+
+class FlakyLoadClient(FakeLoadClient):
+    """Fake client whose load job fails once for a chosen batch."""
+
+    def __init__(self, fail_first_row):
+        super().__init__()
+        self.fail_first_row = fail_first_row
+        self.failed = False
+
+    def load_table_from_dataframe(self, dataframe, destination, job_config=None):
+        job = super().load_table_from_dataframe(dataframe, destination, job_config)
+        if dataframe['reps'].iloc[0] == self.fail_first_row and not self.failed:
+            self.failed = True
+            job.result.side_effect = RuntimeError("backend error")
+        return job
+
+
+def test_upload_honors_batch_size_and_retries_failed_batch(bq_config, workouts):
+    """Test frames are split into batches and only the failed batch is resent."""
+    df = workouts.iloc[:250].copy()
+    df['reps'] = range(1, 251)
+    uploader = make_uploader(bq_config, load_format='dataframe', batch_size=100,
+                             max_concurrent_jobs=3, retry_backoff_seconds=0)
+    uploader.client = FlakyLoadClient(fail_first_row=101)
+
+    result = uploader.upload_dataframe(df)
+
+    assert result['success'] is True
+    assert result['rows_uploaded'] == 250
+    assert result['batch_count'] == 3
+    assert result['retries'] == 1
+    assert [batch['retries'] for batch in result['batches']] == [0, 1, 0]
+    assert len(uploader.client.loads) == 4
+    sent_rows = sorted(load['dataframe']['reps'].iloc[0] for load in uploader.client.loads)
+    assert sent_rows == [1, 101, 101, 201]
+
+
+def test_upload_truncate_runs_first_batch_alone(bq_config, workouts):
+    """Test WRITE_TRUNCATE applies to the first batch and the rest append."""
+    uploader = make_uploader(bq_config, load_format='dataframe', batch_size=100,
+                             write_disposition='WRITE_TRUNCATE')
+
+    result = uploader.upload_dataframe(workouts.iloc[:250])
+
+    assert result['success'] is True
+    dispositions = [load['job_config'].write_disposition for load in uploader.client.loads]
+    assert dispositions == ['WRITE_TRUNCATE', 'WRITE_APPEND', 'WRITE_APPEND']
+    creates = {load['job_config'].create_disposition for load in uploader.client.loads}
+    assert creates == {'CREATE_NEVER'}
+
+
+def test_manifest_dedup_skips_reuploaded_rows(bq_config, workouts, tmp_path):
+    """Test re-uploading the same rows sends nothing the second time."""
+    settings = dict(load_format='dataframe', deduplicate=True, dedup_strategy='manifest',
+                    manifest_dir=str(tmp_path / 'manifest'))
+    df = workouts.iloc[:50]
+
+    uploader = make_uploader(bq_config, **settings)
+    first = uploader.upload_dataframe(df)
+    assert first['rows_uploaded'] == 50
+    assert 'row_fingerprint' in uploader.client.loads[0]['dataframe'].columns
+
+    # New process: manifest reloaded from disk, one genuinely new row appended
+    extra = df.iloc[:1].assign(reps=99)
+    uploader = make_uploader(bq_config, **settings)
+    second = uploader.upload_dataframe(pd.concat([df, extra], ignore_index=True))
+
+    assert second['success'] is True
+    assert second['rows_uploaded'] == 1
+    assert second['rows_skipped'] == 50
+    assert uploader.client.loads[0]['dataframe']['reps'].tolist() == [99]
+
+    third = uploader.upload_dataframe(df)
+    assert third['rows_uploaded'] == 0
+    assert len(uploader.client.loads) == 1
+
+
+def test_manifest_records_batches_that_landed(bq_config, workouts, tmp_path):
+    """Test a retry after a partial failure only resends the failed batch."""
+    df = workouts.iloc[:250].copy()
+    df['reps'] = range(1, 251)
+    settings = dict(load_format='dataframe', batch_size=100, deduplicate=True,
+                    dedup_strategy='manifest', manifest_dir=str(tmp_path / 'manifest'),
+                    max_retries=0)
+    uploader = make_uploader(bq_config, **settings)
+    uploader.client = FlakyLoadClient(fail_first_row=101)
+
+    first = uploader.upload_dataframe(df)
+    assert first['success'] is False
+    assert uploader.manifest.get_summary()['fingerprints'] == 150
+
+    uploader = make_uploader(bq_config, **settings)
+    second = uploader.upload_dataframe(df)
+
+    assert second['success'] is True
+    assert second['rows_uploaded'] == 100
+    assert second['rows_skipped'] == 150
+    assert uploader.client.loads[0]['dataframe']['reps'].tolist() == list(range(101, 201))
+
+
+def test_merge_dedup_loads_staging_then_merges(bq_config, workouts, tmp_path):
+    """Test the merge strategy loads into staging and MERGEs on fingerprints."""
+    uploader = make_uploader(bq_config, load_format='dataframe', deduplicate=True,
+                             dedup_strategy='merge', manifest_dir=str(tmp_path / 'manifest'))
+    merge_job = Mock(num_dml_affected_rows=40)
+    uploader.client.query = Mock(return_value=merge_job)
+    # Target created before fingerprinting: no row_fingerprint column yet
+    target = bigquery.Table('p.d.workouts', schema=[
+        field for field in uploader._bigquery_schema() if field.name != 'row_fingerprint'
+    ])
+    staging = bigquery.Table('p.d.staging',
+                             schema=[bigquery.SchemaField('row_fingerprint', 'INTEGER')])
+    uploader.client.get_table = Mock(
+        side_effect=lambda ref: target if ref == 'p.d.workouts' else staging
+    )
+    uploader.client.delete_table = Mock()
+
+    result = uploader.upload_dataframe(workouts.iloc[:50])
+
+    load = uploader.client.loads[0]
+    assert load['job_config'].write_disposition == 'WRITE_TRUNCATE'
+    assert load['job_config'].create_disposition == 'CREATE_IF_NEEDED'  # Staging table is new
+    alter_sql, merge_sql = [c.args[0] for c in uploader.client.query.call_args_list]
+    assert alter_sql == ('ALTER TABLE `p.d.workouts` '
+                         'ADD COLUMN IF NOT EXISTS `row_fingerprint` INT64')
+    assert 'MERGE `p.d.workouts`' in merge_sql
+    staging_ref = re.search(r'USING `(p\.d\.workouts_staging_[0-9a-f]{12})`', merge_sql).group(1)
+    assert 'ON T.row_fingerprint = S.row_fingerprint' in merge_sql
+    uploader.client.delete_table.assert_called_once_with(staging_ref, not_found_ok=True)
+    assert result['rows_uploaded'] == 40
+    assert result['rows_skipped'] == 10
+
+    # Each upload stages into its own table
+    uploader.upload_dataframe(workouts.iloc[:50])
+    assert uploader.client.delete_table.call_args.args[0] != staging_ref
+
+
+@pytest.mark.parametrize('strategy', ['manifest', 'merge'])
+def test_truncating_upload_loads_every_row(bq_config, workouts, tmp_path, strategy):
+    """Test dedup never drops rows from a load that replaces the table."""
+    settings = dict(load_format='dataframe', deduplicate=True,
+                    manifest_dir=str(tmp_path / 'manifest'))
+    df = workouts.iloc[:50]
+    make_uploader(bq_config, dedup_strategy='manifest', **settings).upload_dataframe(df)
+
+    uploader = make_uploader(bq_config, write_disposition='WRITE_TRUNCATE', dedup_strategy=strategy,
+                             **settings)
+    uploader.client.query = Mock()
+    extra = df.iloc[:1].assign(reps=99)
+    result = uploader.upload_dataframe(pd.concat([df, extra], ignore_index=True))
+
+    assert result['success'] is True
+    assert result['rows_uploaded'] == 51
+    assert result['rows_skipped'] == 0
+    load = uploader.client.loads[0]
+    assert load['job_config'].write_disposition == 'WRITE_TRUNCATE'
+    assert len(load['dataframe']) == 51
+    uploader.client.query.assert_not_called()  # No staging MERGE
+    assert uploader.manifest.get_summary()['fingerprints'] == 51
+
+
+def test_create_table_applies_configured_layout(bq_config):
+    uploader = make_uploader(bq_config)
+    uploader.client = Mock()
+    uploader.client.get_table.side_effect = Exception("Not found")
+
+    uploader.create_table_if_not_exists()
+
+    table = uploader.client.create_table.call_args.args[0]
+    assert table.time_partitioning.field == 'date'
+    assert table.time_partitioning.type_ == 'DAY'
+    assert table.clustering_fields == ['exercise_name', 'workout_name']
+
+
+def test_migrate_table_layout_copies_and_swaps(bq_config):
+    uploader = make_uploader(bq_config)
+    uploader.client = Mock()
+    uploader.client.get_table.return_value = bigquery.Table('p.d.workouts',
+                                                            schema=uploader._bigquery_schema())
+    uploader.client.query.return_value.result.return_value = [(42,)]
+
+    result = uploader.migrate_table_layout()
+
+    assert result['success'] and result['migrated']
+    assert result['rows_copied'] == 42
+    new_table = uploader.client.create_table.call_args.args[0]
+    assert new_table.table_id == 'workouts_partitioned'
+    assert new_table.time_partitioning.field == 'date'
+    queries = [c.args[0] for c in uploader.client.query.call_args_list]
+    assert queries[0].startswith('INSERT INTO `p.d.workouts_partitioned`')
+    assert queries[-3:] == [
+        'ALTER TABLE `p.d.workouts` RENAME TO `workouts_unpartitioned_backup`',
+        'SELECT COUNT(*) AS row_count FROM `p.d.workouts_unpartitioned_backup`',
+        'ALTER TABLE `p.d.workouts_partitioned` RENAME TO `workouts`'
+    ]
+
+    # A table that already has the layout is left alone
+    uploader.client.reset_mock()
+    uploader.client.get_table.return_value = new_table
+    assert uploader.migrate_table_layout()['migrated'] is False
+    uploader.client.query.assert_not_called()
+
+
+def test_migrate_table_layout_rolls_back_rows_appended_during_copy(bq_config):
+    uploader = make_uploader(bq_config)
+    uploader.client = Mock()
+    uploader.client.get_table.return_value = bigquery.Table('p.d.workouts',
+                                                            schema=uploader._bigquery_schema())
+    counts = iter([[(42,)], [(42,)], [(43,)]])
+
+    def query(sql, job_config=None):
+        job = Mock()
+        job.result.return_value = next(counts) if sql.startswith('SELECT COUNT') else []
+        return job
+
+    uploader.client.query.side_effect = query
+
+    result = uploader.migrate_table_layout()
+
+    assert result['success'] is False
+    assert '1 rows were appended' in result['error']
+    queries = [c.args[0] for c in uploader.client.query.call_args_list]
+    assert queries[-1] == 'ALTER TABLE `p.d.workouts_unpartitioned_backup` RENAME TO `workouts`'
+    assert 'ALTER TABLE `p.d.workouts_partitioned` RENAME TO `workouts`' not in queries
+    uploader.client.delete_table.assert_called_once_with('p.d.workouts_partitioned',
+                                                         not_found_ok=True)
@@ -0,0 +1,63 @@
+"""Unit tests for CSV parser module."""
+import io
+
+import pandas as pd
+import pytest
+import yaml
+
+from modules.csv_parser import CSVParser
+
+SAMPLE_CSV = 'tests/sample_workout_data.csv'
+
+
+@pytest.fixture
+def schema_config():
+    """Load CSV schema configuration."""
+    with open('config/csv_schema.yaml') as f:
+        return yaml.safe_load(f)
+
+
+def test_iter_parse_csv_matches_parse_csv(schema_config):
+    """Test chunked parsing produces the same data and summary as a full parse."""
+    parser = CSVParser(schema_config)
+    expected = parser.parse_csv(SAMPLE_CSV)
+    expected_summary = parser.get_summary()
+    expected_warnings = parser.get_warnings()
+
+    chunked_parser = CSVParser(schema_config)
+    chunks = list(chunked_parser.iter_parse_csv(SAMPLE_CSV, chunksize=7))
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 7 for chunk in chunks)
+    result = pd.concat(chunks, ignore_index=True)
+    pd.testing.assert_frame_equal(result, expected)
+    assert chunked_parser.get_summary() == expected_summary
+    assert chunked_parser.get_warnings() == expected_warnings
+
+
+def test_iter_parse_csv_accumulates_errors(schema_config):
+    """Test validation counts are summed across chunks into one message."""
+    csv_data = (
+        "Date,Workout Name,Exercise Name,Reps,Weight (kg)\n"
+        "2024-12-14 18:12:33,Push,Bench Press,0,50.0\n"
+        "2024-12-14 18:15:22,Push,Bench Press,8,50.0\n"
+        "2024-12-15 18:12:33,Pull,Row,0,40.0\n"
+        "2024-12-15 18:15:22,Pull,Row,500,40.0\n"
+    )
+    parser = CSVParser(schema_config)
+    list(parser.iter_parse_csv(io.StringIO(csv_data), chunksize=2))
+
+    errors = parser.get_validation_errors()
+    assert "Column 'reps': 2 values below minimum 1" in errors
+    assert "Column 'reps': 1 values above maximum 100" in errors
+
+    full_parser = CSVParser(schema_config)
+    full_parser.parse_csv(io.StringIO(csv_data))
+    assert errors == full_parser.get_validation_errors()
+
+
+def test_iter_parse_csv_empty_file(schema_config):
+    """Test a header-only CSV is rejected."""
+    parser = CSVParser(schema_config)
+    with pytest.raises(ValueError, match="empty"):
+        list(parser.iter_parse_csv(io.StringIO("Date,Exercise Name\n")))
@@ -0,0 +1,69 @@
+"""Unit tests for the daily workout summary manager."""
+from datetime import date
+from unittest.mock import Mock
+
+import pandas as pd
+
+from modules.daily_summary import DailySummaryManager, dates_in_dataframe
+
+
+def make_client(table_exists=True):
+    client = Mock()
+    if not table_exists:
+        client.get_table.side_effect = Exception("Not found")
+    client.query.return_value.num_dml_affected_rows = 3
+    return client
+
+
+def query_parameters(call):
+    job_config = call.kwargs['job_config']
+    return {param.name: param for param in job_config.query_parameters}
+
+
+def test_dates_in_dataframe_uses_utc_dates():
+    df = pd.DataFrame({'date': pd.to_datetime([
+        '2024-01-01 07:00', '2024-01-01 19:00', '2024-01-03 12:00'
+    ])})
+
+    assert dates_in_dataframe(df) == [date(2024, 1, 1), date(2024, 1, 3)]
+    assert dates_in_dataframe(df.iloc[0:0]) == []
+
+
+def test_refresh_dates_merges_only_given_dates():
+    client = make_client()
+    manager = DailySummaryManager(client, 'p', 'd')
+
+    result = manager.refresh_dates([date(2024, 1, 3), date(2024, 1, 1), date(2024, 1, 3)])
+
+    assert result == {'success': True, 'dates_refreshed': 2, 'rows_affected': 3}
+    sql = client.query.call_args.args[0]
+    assert 'MERGE `p.d.daily_workout_summary`' in sql
+    assert '`p.d.workouts`' in sql
+    params = query_parameters(client.query.call_args)
+    assert params['dates'].values == [date(2024, 1, 1), date(2024, 1, 3)]
+    assert params['full_refresh'].value is False
+
+
+def test_missing_table_is_created_and_backfilled_once():
+    client = make_client(table_exists=False)
+    manager = DailySummaryManager(client, 'p', 'd')
+
+    result = manager.refresh_dates([date(2024, 1, 1)])
+
+    assert result['backfilled'] is True
+    create_sql, merge_call = client.query.call_args_list[0].args[0], client.query.call_args_list[1]
+    assert 'CREATE TABLE IF NOT EXISTS `p.d.daily_workout_summary`' in create_sql
+    assert query_parameters(merge_call)['full_refresh'].value is True
+
+    manager.refresh_dates([date(2024, 1, 2)])
+    assert client.query.call_count == 3
+
+
+def test_refresh_failure_is_reported():
+    client = make_client()
+    client.query.side_effect = Exception("quota exceeded")
+
+    result = DailySummaryManager(client, 'p', 'd').refresh_dates([date(2024, 1, 1)])
+
+    assert result['success'] is False
+    assert 'quota exceeded' in result['error']
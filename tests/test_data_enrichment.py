@@ -0,0 +1,157 @@
+"""Unit tests for data enrichment module."""
+import threading
+
+import pandas as pd
+import pytest
+import yaml
+
+from modules.data_enrichment import DataEnrichment
+
+
+@pytest.fixture
+def mapping_config():
+    """Load exercise mapping configuration."""
+    with open('config/exercise_mapping.yaml') as f:
+        return yaml.safe_load(f)
+
+
+def _naive_fuzzy_match(fuzzy_rules, normalized_name):
+    """Reference implementation: linear scan over rules and exclusions."""
+    for rule in fuzzy_rules:
+        if rule['keyword'].lower() in normalized_name:
+            if not any(term.lower() in normalized_name for term in rule.get('exclude', [])):
+                return (rule['level1'], rule['level2'])
+    return None
+
+
+def _reference_mapping(mapping_config, exercise_name):
+    """Reference implementation: the original per-row exact, fuzzy and default lookup."""
+    if pd.isna(exercise_name) or exercise_name == '':
+        return ('unknown', 'unknown')
+    lookup = {
+        ' '.join(name.lower().strip().split()): (exercise['level1'], exercise['level2'])
+        for exercise in mapping_config.get('exercises', []) for name in exercise.get('names', [])
+    }
+    normalized = ' '.join(str(exercise_name).lower().strip().split())
+    if normalized in lookup:
+        return lookup[normalized]
+    fuzzy = _naive_fuzzy_match(mapping_config.get('fuzzy_rules', []), normalized)
+    if fuzzy:
+        return fuzzy
+    default = mapping_config.get('default_mapping', {})
+    return (default.get('level1', 'upper'), default.get('level2', 'unknown'))
+
+
+def test_enrich_dataframe_matches_row_mapping(mapping_config):
+    """Test vectorized enrichment equals the original per-row mapping."""
+    names = ['Bench Press', 'bench press ', 'Cable Curl', 'Mystery Machine', '', None,
+             'Bench Press', 'Mystery Machine', 'Incline Bench Press', 'Single Leg Calf Raise']
+    df = pd.DataFrame({'exercise_name': names, 'reps': range(len(names))})
+
+    expected = [_reference_mapping(mapping_config, name) for name in names]
+
+    enrichment = DataEnrichment(mapping_config)
+    result = enrichment.enrich_dataframe(df)
+
+    assert list(zip(result['muscle_group_level1'], result['muscle_group_level2'])) == expected
+    assert result.loc[5, 'muscle_group_level1'] == 'unknown'
+    assert enrichment.get_unmapped_exercises() == ['Mystery Machine']
+
+
+def test_enrich_dataframe_requires_exercise_name(mapping_config):
+    """Test enrichment rejects frames without an exercise_name column."""
+    enrichment = DataEnrichment(mapping_config)
+    with pytest.raises(ValueError):
+        enrichment.enrich_dataframe(pd.DataFrame({'reps': [1]}))
+
+
+def test_fuzzy_match_preserves_rule_order_and_exclusions():
+    """Test compiled fuzzy matching keeps first-rule-wins and exclusion semantics."""
+    config = {
+        'exercises': [],
+        'fuzzy_rules': [
+            {'keyword': 'press', 'exclude': ['leg press', 'calf'],
+             'level1': 'upper', 'level2': 'push'},
+            {'keyword': 'leg', 'level1': 'lower', 'level2': 'legs'},
+            {'keyword': 'calf', 'level1': 'lower', 'level2': 'calves'},
+            {'keyword': 'ss', 'exclude': ['press'], 'level1': 'x', 'level2': 'y'},
+            {'keyword': 'Row', 'level1': 'upper', 'level2': 'pull'},
+        ]
+    }
+    enrichment = DataEnrichment(config)
+
+    names = ['bench press', 'leg press', 'seated calf press', 'cable row', 'crossover',
+             'narrow grip', 'plank', 'pressss', 'single leg curl']
+    for name in names:
+        assert enrichment._fuzzy_match(name) == _naive_fuzzy_match(config['fuzzy_rules'], name)
+
+
+def test_fuzzy_match_matches_reference_on_config(mapping_config):
+    """Test compiled fuzzy matching agrees with a linear scan on the shipped rules."""
+    enrichment = DataEnrichment(mapping_config)
+    names = [
+        enrichment._normalize_name(name)
+        for exercise in mapping_config['exercises'] for name in exercise['names']
+    ] + ['leg press machine', 'standing calf press', 'hammer curl row', 'front squat press']
+
+    for name in names:
+        assert enrichment._fuzzy_match(name) == _naive_fuzzy_match(
+            mapping_config['fuzzy_rules'], name
+        )
+
+
+def test_exercise_cache_is_bounded_lru(mapping_config):
+    """Test the exercise cache evicts least recently used normalized names."""
+    enrichment = DataEnrichment(mapping_config, cache_size=2)
+
+    enrichment._map_exercise_to_muscles('Bench Press')
+    enrichment._map_exercise_to_muscles('  bench   press')  # Same normalized key
+    enrichment._map_exercise_to_muscles('Squat')
+    enrichment._map_exercise_to_muscles('Bench Press')  # Refresh recency
+    enrichment._map_exercise_to_muscles('Deadlift')  # Evicts squat
+
+    stats = enrichment.cache_stats()
+    assert stats['hits'] == 2
+    assert stats['misses'] == 3
+    assert stats['evictions'] == 1
+    assert stats['size'] == 2
+    assert list(enrichment.exercise_cache) == ['bench press', 'deadlift']
+
+
+def test_exercise_cache_is_thread_safe(mapping_config):
+    """Test concurrent lookups on a shared instance keep the LRU consistent."""
+    enrichment = DataEnrichment(mapping_config, cache_size=8)
+    names = [f'Exercise {i}' for i in range(32)] + ['Bench Press', 'Squat']
+    errors = []
+
+    def worker(offset):
+        try:
+            for i in range(500):
+                enrichment._map_exercise_to_muscles(names[(i + offset) % len(names)])
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(offset,)) for offset in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = enrichment.cache_stats()
+    assert errors == []
+    assert stats['hits'] + stats['misses'] == 8 * 500
+    assert stats['size'] == 8
+
+
+def test_unmapped_exercises_counted(mapping_config):
+    """Test unmapped names are tracked once with occurrence counts across calls."""
+    enrichment = DataEnrichment(mapping_config)
+    df = pd.DataFrame({'exercise_name': ['Mystery Machine', 'Bench Press', 'Mystery Machine']})
+
+    enrichment.enrich_dataframe(df.copy())
+    # Second pass resolves from cache but still reports the unmapped name
+    summary = enrichment.get_mapping_summary(enrichment.enrich_dataframe(df.copy()))
+
+    assert enrichment.get_unmapped_counts() == {'Mystery Machine': 2}
+    assert summary['unmapped_count'] == 1
+    assert summary['unmapped_occurrences'] == 2
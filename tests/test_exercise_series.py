@@ -0,0 +1,193 @@
+"""Unit tests for the precomputed per-exercise performance series."""
+from datetime import date
+from unittest.mock import Mock
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+import yaml
+
+from modules.bigquery_uploader import BigQueryUploader
+from modules.exercise_series import SERIES_COLUMNS, ExerciseSeriesStore, compute_series
+
+
+class FakeSessionsClient:
+    """Aggregate an in-memory workouts frame like exercise_series_sessions.sql."""
+
+    def __init__(self, workouts):
+        self.workouts = workouts
+        self.calls = []
+
+    def get_table(self, table_ref):
+        return Mock(modified=None, num_rows=len(self.workouts))
+
+    def query(self, sql, job_config=None):
+        params = {p.name: p.values for p in job_config.query_parameters}
+        self.calls.append(params)
+        df = self.workouts.assign(workout_date=self.workouts['date'].dt.date)
+        if params['exercises']:
+            df = df[df['exercise_name'].isin(params['exercises'])]
+        if params['dates']:
+            df = df[df['workout_date'].isin(params['dates'])]
+        one_rm = df['weight_kg'].where(
+            (df['reps'] < 1) | (df['reps'] >= 36), df['weight_kg'] * 36.0 / (37.0 - df['reps'])
+        )
+        sessions = df.assign(volume=df['weight_kg'] * df['reps'], one_rm=one_rm).groupby(
+            ['exercise_name', 'workout_date'], as_index=False
+        ).agg(max_weight=('weight_kg', 'max'), total_volume=('volume', 'sum'),
+              estimated_1rm=('one_rm', 'max'))
+        job = Mock()
+        job.to_dataframe.return_value = sessions
+        return job
+
+
+class FakeWarehouseClient(FakeSessionsClient):
+    """Sessions client whose Parquet load jobs append to the in-memory workouts."""
+
+    def load_table_from_file(self, file_obj, destination, job_config=None):
+        loaded = pq.read_table(file_obj).to_pandas()
+        self.workouts = pd.concat([self.workouts, loaded[self.workouts.columns]], ignore_index=True)
+        return Mock()
+
+
+def sets(rows):
+    return pd.DataFrame(rows, columns=['date', 'exercise_name', 'weight_kg', 'reps']).assign(
+        date=lambda df: pd.to_datetime(df['date'], utc=True)
+    )
+
+
+def test_compute_series_matches_view_columns():
+    sessions = pd.DataFrame({
+        'exercise_name': 'Squat',
+        'workout_date': [date(2024, 1, 8), date(2024, 1, 1), date(2024, 1, 15)],
+        'max_weight': [110.0, 100.0, 0.0],
+        'total_volume': [1100.0, 1000.0, 0.0],
+        'estimated_1rm': [120.0, 100.0, 0.0],
+    })
+
+    series = compute_series(sessions)
+
+    assert list(series.columns) == SERIES_COLUMNS
+    assert series['session_index'].tolist() == [1, 2, 3]
+    assert series['week_number'].tolist() == [0, 1, 2]
+    assert pd.isna(series['pct_change_1rm'].iloc[0])
+    assert series['pct_change_1rm'].iloc[1] == 20.0
+    assert series['pct_change_volume'].iloc[2] == -100.0
+
+
+def test_store_refresh_replaces_uploaded_sessions(tmp_path):
+    workouts = sets([
+        ('2024-01-01', 'Squat', 100.0, 5),
+        ('2024-01-03', 'Squat', 105.0, 5),
+        ('2024-01-03', 'Bench Press', 80.0, 8),
+    ])
+    client = FakeSessionsClient(workouts)
+    store = ExerciseSeriesStore(client, 'p', 'd', store_dir=str(tmp_path))
+
+    first = store.get_series('Squat')
+    assert first['session_index'].tolist() == [1, 2]
+    assert first['estimated_1rm'].iloc[0] == pytest.approx(100.0 * 36 / 32)
+    assert len(client.calls) == 1
+    store.get_series('Squat')
+    assert len(client.calls) == 1  # Served from the stored file
+
+    # New session plus a set added to an existing day
+    upload = sets([('2024-01-03', 'Squat', 110.0, 3), ('2024-01-05', 'Squat', 110.0, 5)])
+    client.workouts = pd.concat([workouts, upload], ignore_index=True)
+    result = store.refresh(upload)
+
+    assert result['success'] is True
+    assert client.calls[-1]['exercises'] == ['Squat']
+    assert client.calls[-1]['dates'] == [date(2024, 1, 3), date(2024, 1, 5)]
+    series = store.get_series('Squat')
+    assert series['session_index'].tolist() == [1, 2, 3]
+    assert series['total_volume'].tolist() == [500.0, 855.0, 550.0]
+    assert series['max_weight'].tolist() == [100.0, 110.0, 110.0]
+
+    # Refreshing the same upload again does not double count
+    store.refresh(upload)
+    assert store.get_series('Squat')['total_volume'].tolist() == [500.0, 855.0, 550.0]
+
+
+def test_series_rebuilt_when_data_version_changes(tmp_path):
+    workouts = sets([('2024-01-01', 'Squat', 100.0, 5)])
+    client = FakeSessionsClient(workouts)
+    store = ExerciseSeriesStore(client, 'p', 'd', store_dir=str(tmp_path))
+
+    assert len(store.get_series('Squat', data_version='v1')) == 1
+    store.get_series('Squat', 'week', data_version='v1')
+    assert len(client.calls) == 1
+
+    # Rows changed without a refresh, e.g. deleted or uploaded from another host
+    client.workouts = sets([('2024-01-01', 'Squat', 100.0, 5), ('2024-01-02', 'Squat', 100.0, 5)])
+    assert len(store.get_series('Squat', data_version='v2')) == 2
+    assert store.get_series('Squat', 'week', data_version='v2')['sessions'].sum() == 2
+    assert len(client.calls) == 2
+
+    # A refresh records the table's version as seen by the store
+    store.refresh(sets([('2024-01-02', 'Squat', 100.0, 5)]))
+    current = store.version_tracker.current()
+    store.get_series('Squat', data_version=current)
+    assert len(client.calls) == 3
+
+
+def test_upload_keeps_untouched_series_current(tmp_path):
+    """Test uploading one exercise does not make every other exercise's series stale."""
+    workouts = sets([
+        ('2024-01-01', 'Squat', 100.0, 5),
+        ('2024-01-01', 'Bench Press', 80.0, 8),
+        ('2024-01-03', 'Bench Press', 82.5, 8),
+    ]).assign(workout_name='Full Body')
+    client = FakeWarehouseClient(workouts)
+    with open('config/bigquery_config.yaml') as f:
+        bq_config = yaml.safe_load(f)
+    settings = {**bq_config['upload'], 'load_format': 'parquet', 'deduplicate': False,
+                'refresh_daily_summary': False, 'refresh_exercise_series': True,
+                'series_store_dir': str(tmp_path)}
+    uploader = BigQueryUploader(bq_config['table_schema'], settings, 'EU')
+    uploader.client = client
+    uploader.project_id, uploader.dataset_id, uploader.table_id = 'p', 'd', 'workouts'
+    store = uploader._exercise_series_store()
+    store.rebuild()
+
+    upload = sets([('2024-01-05', 'Squat', 105.0, 5)]).assign(workout_name='Full Body')
+    result = uploader.upload_dataframe(upload)
+
+    assert result['exercise_series']['exercises_refreshed'] == 1
+    current = store.version_tracker.current()
+    calls = len(client.calls)
+    assert len(store.get_series('Bench Press', data_version=current)) == 2
+    assert len(store.get_series('Squat', data_version=current)) == 2
+    assert len(client.calls) == calls  # Neither series is rebuilt
+
+    # A change the store did not see still rebuilds the series it is looked up for
+    client.workouts = client.workouts.iloc[:-2]
+    changed = store.version_tracker.current(force=True)
+    assert len(store.get_series('Bench Press', data_version=changed)) == 1
+    assert len(client.calls) == calls + 1
+
+
+def test_bucketed_series_match_chart_aggregation(tmp_path):
+    workouts = sets([
+        ('2023-12-30', 'Squat', 90.0, 5),
+        ('2024-01-02', 'Squat', 100.0, 5),
+        ('2024-01-04', 'Squat', 95.0, 8),
+        ('2024-02-01', 'Squat', 105.0, 3),
+    ])
+    store = ExerciseSeriesStore(FakeSessionsClient(workouts), 'p', 'd', store_dir=str(tmp_path))
+    series = store.get_series('Squat')
+
+    for period, x_col in [('week', 'week_number'), ('month', 'month_number'), ('year', 'year')]:
+        buckets = store.get_series('Squat', period)
+        # What create_exercise_performance_chart computes from the session rows
+        expected = series.groupby(x_col).agg({
+            'estimated_1rm': 'max', 'total_volume': 'max', 'workout_date': 'max',
+            'pct_change_1rm': 'mean', 'pct_change_volume': 'mean'
+        }).reset_index()
+
+        assert len(buckets) == series[x_col].nunique() < len(series)
+        pd.testing.assert_frame_equal(buckets[expected.columns], expected)
+        assert buckets['sessions'].sum() == len(series)
+
+    with pytest.raises(ValueError):
+        store.get_series('Squat', 'day')
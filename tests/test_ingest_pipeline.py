@@ -0,0 +1,192 @@
+"""Unit tests for the pipelined ingest driver."""
+import io
+import threading
+from unittest.mock import Mock
+
+import pandas as pd
+import pytest
+import yaml
+
+from modules.bigquery_uploader import BigQueryUploader
+from modules.csv_parser import CSVParser
+from modules.data_enrichment import DataEnrichment
+from modules.ingest_pipeline import IngestPipeline
+
+SAMPLE_CSV = 'tests/sample_workout_data.csv'
+
+
+class FakeUploader:
+    """Uploader stand-in that records uploaded chunks."""
+
+    def __init__(self, fail_on_chunk=None, block_event=None, write_disposition='WRITE_APPEND'):
+        self.upload_settings = {'write_disposition': write_disposition}
+        self.chunks = []
+        self.dispositions = []
+        self.refreshed = []
+        self.fail_on_chunk = fail_on_chunk
+        self.block_event = block_event
+
+    def upload_dataframe(self, df, write_disposition=None, refresh=True):
+        assert refresh is False
+        if self.block_event is not None:
+            self.block_event.wait(timeout=5)
+        if self.fail_on_chunk is not None and len(self.chunks) == self.fail_on_chunk:
+            return {'success': False, 'error': 'boom', 'rows_uploaded': 0}
+        self.chunks.append(df)
+        self.dispositions.append(write_disposition)
+        return {'success': True, 'rows_uploaded': len(df), 'table': 'p.d.workouts'}
+
+    def refresh_derived_data(self, df):
+        self.refreshed.append(df)
+        return {'daily_summary': {'success': True}}
+
+
+@pytest.fixture
+def parser():
+    with open('config/csv_schema.yaml') as f:
+        return CSVParser(yaml.safe_load(f))
+
+
+@pytest.fixture
+def enrichment():
+    with open('config/exercise_mapping.yaml') as f:
+        return DataEnrichment(yaml.safe_load(f))
+
+
+@pytest.fixture
+def invalid_csv(tmp_path):
+    """Sample CSV with an out-of-range reps value near the end of the file."""
+    df = pd.read_csv(SAMPLE_CSV)
+    df.loc[len(df) - 3, 'Reps'] = 0
+    path = tmp_path / 'invalid.csv'
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_pipeline_uploads_all_chunks(parser, enrichment):
+    """Test all rows flow through the three stages in order."""
+    uploader = FakeUploader()
+    pipeline = IngestPipeline(parser, uploader, enrichment, chunksize=5, queue_size=1)
+
+    result = pipeline.run(SAMPLE_CSV)
+
+    expected = pd.read_csv(SAMPLE_CSV)
+    assert result['success'] is True
+    assert result['rows_uploaded'] == len(expected)
+    assert result['chunks'] == len(uploader.chunks)
+    uploaded = pd.concat(uploader.chunks, ignore_index=True)
+    assert 'muscle_group_level1' in uploaded.columns
+    assert list(uploaded['exercise_name']) == list(expected['Exercise Name'])
+    assert set(result['stage_timings']) == {'parse', 'enrich', 'upload'}
+
+
+def test_pipeline_appends_chunks_and_refreshes_once(parser):
+    """Test later chunks never truncate and derived tables refresh once at the end."""
+    uploader = FakeUploader(write_disposition='WRITE_TRUNCATE')
+    pipeline = IngestPipeline(parser, uploader, chunksize=5, queue_size=1)
+
+    result = pipeline.run(SAMPLE_CSV)
+
+    assert len(uploader.chunks) > 1
+    appends = ['WRITE_APPEND'] * (len(uploader.chunks) - 1)
+    assert uploader.dispositions == ['WRITE_TRUNCATE'] + appends
+    assert len(uploader.refreshed) == 1
+    uploaded = pd.concat(uploader.chunks, ignore_index=True)
+    assert set(uploader.refreshed[0]['exercise_name']) == set(uploaded['exercise_name'])
+    assert result['daily_summary'] == {'success': True}
+
+
+def test_pipeline_stops_on_upload_failure(parser):
+    """Test a failed upload cancels the upstream stages."""
+    uploader = FakeUploader(fail_on_chunk=1)
+    pipeline = IngestPipeline(parser, uploader, chunksize=2, queue_size=1)
+
+    result = pipeline.run(SAMPLE_CSV)
+
+    assert result['success'] is False
+    assert 'boom' in result['error']
+    assert len(uploader.chunks) == 1
+    # The chunk that landed still gets its derived rows refreshed
+    landed_keys = uploader.chunks[0][['date', 'exercise_name']].drop_duplicates()
+    assert len(uploader.refreshed[0]) == len(landed_keys)
+
+
+def test_pipeline_cancel(parser):
+    """Test cancel stops the pipeline without an error."""
+    release = threading.Event()
+    uploader = FakeUploader(block_event=release)
+    pipeline = IngestPipeline(parser, uploader, chunksize=2, queue_size=1)
+
+    def cancel_then_release():
+        pipeline.cancel()
+        release.set()
+
+    timer = threading.Timer(0.2, cancel_then_release)
+    timer.start()
+    result = pipeline.run(SAMPLE_CSV)
+    timer.join()
+
+    assert result['success'] is False
+    assert result['cancelled'] is True
+    # Backpressure keeps the parser only a few chunks ahead of the blocked upload
+    assert result['rows_uploaded'] <= 2
+    assert result['rows_parsed'] < len(pd.read_csv(SAMPLE_CSV))
+
+
+def test_pipeline_keeps_going_on_validation_errors_when_not_strict(parser, invalid_csv):
+    """Test validation errors are reported but do not stop a non-strict upload."""
+    uploader = FakeUploader()
+    pipeline = IngestPipeline(parser, uploader, chunksize=5, queue_size=1)
+
+    result = pipeline.run(invalid_csv)
+
+    assert result['success'] is True
+    assert result['rows_uploaded'] == len(pd.read_csv(invalid_csv))
+    assert result['validation_summary']['has_errors'] is True
+
+
+def test_strict_replacing_upload_validates_before_first_load(parser, invalid_csv):
+    """Test a strict truncating upload fails before any chunk replaces the table."""
+    parser.schema['strict_mode'] = True
+    uploader = FakeUploader(write_disposition='WRITE_TRUNCATE')
+    pipeline = IngestPipeline(parser, uploader, chunksize=5, queue_size=1)
+
+    with open(invalid_csv, 'rb') as f:
+        result = pipeline.run(io.BytesIO(f.read()))
+
+    assert result['success'] is False
+    assert 'Validation failed' in result['error']
+    assert uploader.chunks == []
+    assert uploader.refreshed == []
+
+    # A valid file streams through after the validation pass rewinds it
+    with open(SAMPLE_CSV, 'rb') as f:
+        result = pipeline.run(io.BytesIO(f.read()))
+    assert result['success'] is True
+    assert result['rows_uploaded'] == len(pd.read_csv(SAMPLE_CSV))
+
+
+def test_pipeline_load_jobs_match_table_schema(parser, enrichment, tmp_path):
+    """Test enriched chunks reach the real load job config with the enrichment columns."""
+    with open('config/bigquery_config.yaml') as f:
+        bq_config = yaml.safe_load(f)
+    settings = {**bq_config['upload'], 'write_disposition': 'WRITE_TRUNCATE',
+                'refresh_daily_summary': False, 'refresh_exercise_series': False,
+                'manifest_dir': str(tmp_path / 'manifest')}
+    uploader = BigQueryUploader(bq_config['table_schema'], settings, 'EU')
+    uploader.client = Mock()
+    uploader.project_id, uploader.dataset_id, uploader.table_id = 'p', 'd', 'workouts'
+    pipeline = IngestPipeline(parser, uploader, enrichment, chunksize=20, queue_size=1)
+
+    result = pipeline.run(SAMPLE_CSV)
+
+    assert result['success'] is True
+    configs = [c.kwargs['job_config'] for c in uploader.client.load_table_from_file.call_args_list]
+    dispositions = [config.write_disposition for config in configs]
+    assert dispositions == ['WRITE_TRUNCATE', 'WRITE_APPEND', 'WRITE_APPEND']
+    configured = {field['name'] for field in bq_config['table_schema']}
+    for config in configs:
+        loaded = {field.name for field in config.schema}
+        assert {'muscle_group_level1', 'muscle_group_level2'} <= loaded <= configured
+        assert config.create_disposition == 'CREATE_NEVER'
+    assert configs[1].schema_update_options == ['ALLOW_FIELD_ADDITION']
@@ -0,0 +1,51 @@
+"""Regression test for the kpi_workouts view query."""
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+sqlglot = pytest.importorskip("sqlglot")
+
+
+def run_bigquery_sql(path, summary):
+    """Run a BigQuery SQL file against a local daily_workout_summary frame."""
+    with open(path) as f:
+        sql = f.read().format(project_id='p', dataset_id='d', table_id='workouts')
+    sql = sql.replace('`p.d.daily_workout_summary`', 'daily_workout_summary')
+    # DuckDB cannot ORDER BY expressions over a UNION; rows are sorted below instead
+    sql = sql[:sql.rindex('ORDER BY')]
+    con = duckdb.connect()
+    con.register('daily_workout_summary', summary)
+    result = con.execute(sqlglot.transpile(sql, read='bigquery', write='duckdb')[0]).df()
+    return result.sort_values(['kpi', 'metric', 'date']).reset_index(drop=True)
+
+
+@pytest.fixture
+def summary():
+    """Daily summary rows spread over the last ~14 months with all categories."""
+    rng = np.random.default_rng(7)
+    today = date.today()
+    rows = []
+    for offset in rng.choice(420, size=150, replace=False):
+        categories = rng.choice(['legs', 'push', 'pull', 'upper', 'lower', 'other'],
+                                size=rng.integers(1, 4), replace=False)
+        for category in categories:
+            rows.append({
+                'workout_date': today - timedelta(days=int(offset)),
+                'workout_category': category,
+                'exercise_count': int(rng.integers(1, 12)),
+                'total_volume': float(rng.uniform(500, 8000))
+            })
+    return pd.DataFrame(rows)
+
+
+def test_single_pass_matches_reference(summary):
+    """Test the rewritten view returns the same KPI rows as the CROSS JOIN form."""
+    expected = run_bigquery_sql('tests/fixtures/kpi_workouts_reference.sql', summary)
+    actual = run_bigquery_sql('sql/views/kpi_workouts.sql', summary)
+
+    assert list(actual.columns) == ['type', 'kpi', 'date', 'metric', 'value']
+    assert set(expected['kpi']) == {'visits', 'rest_days', 'legs', 'push', 'pull', 'upper', 'lower'}
+    pd.testing.assert_frame_equal(actual, expected)
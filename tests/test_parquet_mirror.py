@@ -0,0 +1,131 @@
+"""Unit tests for the incremental local Parquet mirror."""
+from unittest.mock import Mock
+
+import pandas as pd
+
+from modules.analytics_backends import LocalParquetBackend
+from modules.parquet_mirror import ParquetMirror
+
+
+def workout_rows(dates, uploaded='2024-03-01T00:00:00Z'):
+    return pd.DataFrame({
+        'date': pd.to_datetime(dates, utc=True),
+        'workout_name': 'Push Day',
+        'exercise_name': 'Bench Press',
+        'weight_kg': 80.0,
+        'reps': 5,
+        'upload_timestamp': pd.Timestamp(uploaded),
+    })
+
+
+class FakeBigQuery:
+    """Answer mirror queries from in-memory frames."""
+
+    def __init__(self, workouts, partitions=None):
+        self.workouts = workouts
+        self.partitions = partitions
+        self.created = pd.Timestamp('2023-01-01', tz='UTC')
+        self.queries = []
+
+    def get_table(self, ref):
+        table = Mock()
+        table.time_partitioning = Mock() if self.partitions is not None else None
+        table.modified = pd.Timestamp('2024-01-01', tz='UTC')
+        table.created = self.created
+        table.num_rows = len(self.workouts)
+        return table
+
+    def query(self, sql, job_config=None):
+        params = {p.name: getattr(p, 'value', None) or getattr(p, 'values', None)
+                  for p in (job_config.query_parameters if job_config else [])}
+        self.queries.append((sql, params))
+        job = Mock()
+        if 'INFORMATION_SCHEMA.PARTITIONS' in sql:
+            result = pd.DataFrame(list(self.partitions.items()),
+                                  columns=['partition_id', 'last_modified'])
+        elif 'exercise_muscle_mapping' in sql:
+            result = pd.DataFrame({'exercise_name': ['Bench Press'],
+                                   'muscle_group_level1': ['Upper Body']})
+        elif 'months' in params:
+            months = {m.strftime('%Y-%m') for m in params['months']}
+            result = self.workouts[self.workouts['date'].dt.strftime('%Y-%m').isin(months)]
+        elif 'watermark' in params:
+            result = self.workouts[self.workouts['upload_timestamp'] >= params['watermark']]
+        else:
+            result = self.workouts
+        job.to_dataframe.return_value = result.reset_index(drop=True)
+        return job
+
+
+def test_partition_sync_rewrites_only_changed_months(tmp_path):
+    workouts = workout_rows(['2024-01-10', '2024-01-20', '2024-02-05'])
+    fake = FakeBigQuery(workouts, partitions={'20240110': 1, '20240120': 1, '20240205': 1})
+    mirror = ParquetMirror(fake, 'p', 'd', mirror_dir=str(tmp_path))
+
+    first = mirror.sync()
+    assert first['success'] is True
+    assert first['workouts']['rows_downloaded'] == 3
+    assert (tmp_path / 'workouts' / 'month=2024-02' / 'data.parquet').exists()
+    assert (tmp_path / 'exercise_muscle_mapping.parquet').exists()
+
+    # A new upload lands in February only
+    fake.workouts = pd.concat([workouts, workout_rows(['2024-02-06'])], ignore_index=True)
+    fake.partitions = {'20240110': 1, '20240120': 1, '20240205': 1, '20240206': 2}
+    fake.queries.clear()
+
+    second = mirror.sync()
+    assert second['workouts']['partitions_changed'] == 1
+    assert second['workouts']['rows_downloaded'] == 2
+    assert second['mapping']['rows_downloaded'] == 0
+    month_queries = [params['months'] for _, params in fake.queries if 'months' in params]
+    assert [[m.strftime('%Y-%m') for m in months] for months in month_queries] == [['2024-02']]
+    assert mirror.load_state()['workouts']['watermark'] == 2
+
+    backend = LocalParquetBackend(str(tmp_path))
+    assert backend.get_workout_overview()['total_exercises'] == 4
+
+
+def test_unpartitioned_sync_catches_late_commits_without_duplicates(tmp_path):
+    workouts = workout_rows(['2024-01-10', '2024-02-05'], uploaded='2024-02-06T00:00:00Z')
+    fake = FakeBigQuery(workouts)
+    mirror = ParquetMirror(fake, 'p', 'd', mirror_dir=str(tmp_path), watermark_lag_seconds=3600)
+
+    first = mirror.sync()['workouts']
+    assert first['rows_downloaded'] == 2 and first['rows_settled'] == 0
+    assert mirror.load_state()['workouts']['watermark'].startswith('2024-02-05T23:00:00')
+
+    # A second load job of the same upload commits late, with the same timestamp
+    late = workout_rows(['2024-02-07'], uploaded='2024-02-06T00:00:00Z')
+    fake.workouts = pd.concat([workouts, late], ignore_index=True)
+    mirror.sync()
+    assert LocalParquetBackend(str(tmp_path)).get_workout_overview()['total_exercises'] == 3
+
+    # A much later upload settles the earlier rows into an immutable part
+    later = workout_rows(['2024-03-01'], uploaded='2024-03-02T00:00:00Z')
+    fake.workouts = pd.concat([fake.workouts, later], ignore_index=True)
+    result = mirror.sync()['workouts']
+
+    assert result['rows_settled'] == 3
+    assert 'upload_timestamp >= @watermark' in fake.queries[-1][0]
+    assert LocalParquetBackend(str(tmp_path)).get_workout_overview()['total_exercises'] == 4
+    assert mirror.sync()['workouts']['rows_downloaded'] == 1  # Only the tail is re-read
+    assert LocalParquetBackend(str(tmp_path)).get_workout_overview()['total_exercises'] == 4
+
+
+def test_unpartitioned_sync_rebuilds_after_table_replaced(tmp_path):
+    fake = FakeBigQuery(workout_rows(['2024-01-10', '2024-02-05', '2024-02-06']))
+    mirror = ParquetMirror(fake, 'p', 'd', mirror_dir=str(tmp_path), watermark_lag_seconds=0)
+    mirror.sync()
+
+    # WRITE_TRUNCATE upload: fewer rows, all older than the watermark
+    fake.workouts = workout_rows(['2024-01-10'], uploaded='2024-01-01T00:00:00Z')
+    result = mirror.sync()['workouts']
+
+    assert result['full_resync'] is True
+    assert LocalParquetBackend(str(tmp_path)).get_workout_overview()['total_exercises'] == 1
+
+    # A recreated table with more rows is caught by its creation time
+    fake.created = pd.Timestamp('2024-06-01', tz='UTC')
+    fake.workouts = workout_rows(['2024-01-10', '2024-01-11'], uploaded='2024-01-01T00:00:00Z')
+    assert mirror.sync()['workouts']['full_resync'] is True
+    assert LocalParquetBackend(str(tmp_path)).get_workout_overview()['total_exercises'] == 2
@@ -0,0 +1,274 @@
+"""Unit tests for the central BigQuery query executor."""
+import gc
+import threading
+import time
+import weakref
+from unittest.mock import Mock
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from google.cloud import bigquery
+from google.cloud.bigquery.table import RowIterator
+
+from modules.query_executor import (
+    QueryBudgetExceeded,
+    QueryExecutor,
+    arrow_to_dataframe,
+    configure_query_executor,
+    get_query_executor,
+    get_query_executors,
+)
+
+
+def make_job(**stats):
+    job = Mock()
+    job.job_id = 'job-1'
+    job.total_bytes_processed = stats.get('processed', 2048)
+    job.total_bytes_billed = stats.get('billed', 10485760)
+    job.cache_hit = stats.get('cache_hit', False)
+    job.slot_millis = stats.get('slot_ms', 120)
+    job.to_dataframe.return_value = pd.DataFrame({'x': [1, 2]})
+    return job
+
+
+def test_executor_records_job_stats():
+    client = Mock()
+    client.query.return_value = make_job()
+    executor = QueryExecutor(client)
+
+    df = executor.to_dataframe("SELECT x FROM t", label='top_exercises')
+
+    assert df['x'].tolist() == [1, 2]
+    record = executor.get_history()[-1]
+    assert record['label'] == 'top_exercises'
+    assert record['job_id'] == 'job-1'
+    assert record['bytes_processed'] == 2048
+    assert record['bytes_billed'] == 10485760
+    assert record['cache_hit'] is False
+    assert record['slot_ms'] == 120
+    assert record['error'] is None
+    assert executor.get_summary()['queries'] == 1
+
+
+def test_executor_budget_sets_limit_and_raises():
+    client = Mock()
+    client.query.return_value = make_job()
+    executor = QueryExecutor(client, max_bytes_billed=1000)
+
+    executor.run("SELECT 1")
+    job_config = client.query.call_args.kwargs['job_config']
+    assert job_config.maximum_bytes_billed == 1000
+
+    # A tighter caller limit is kept
+    executor.run("SELECT 1", job_config=bigquery.QueryJobConfig(maximum_bytes_billed=500))
+    assert client.query.call_args.kwargs['job_config'].maximum_bytes_billed == 500
+
+    client.query.side_effect = Exception(
+        "400 Query exceeded limit for bytes billed: bytesBilledLimitExceeded"
+    )
+    with pytest.raises(QueryBudgetExceeded):
+        executor.run("SELECT * FROM big_table", label='full_scan')
+    assert executor.get_history()[-1]['error']
+    assert executor.get_summary()['errors'] == 1
+
+
+def test_registry_shares_executor_per_client():
+    client = Mock()
+
+    executor = get_query_executor(client)
+    assert get_query_executor(client) is executor
+    assert get_query_executor(Mock()) is not executor
+
+    configure_query_executor(client, {'max_bytes_billed': 10 ** 9, 'history_size': 5})
+    assert executor.max_bytes_billed == 10 ** 9
+    assert executor.history.maxlen == 5
+
+    # The registry does not keep discarded clients alive
+    assert executor in get_query_executors()
+    executor_ref = weakref.ref(executor)
+    del client, executor
+    gc.collect()
+    assert executor_ref() is None
+
+
+def test_byte_budget_does_not_modify_callers_job_config():
+    client = Mock()
+    client.query.return_value = make_job()
+    executor = QueryExecutor(client, max_bytes_billed=500)
+    job_config = bigquery.QueryJobConfig(maximum_bytes_billed=10 ** 6)
+
+    executor.run("SELECT 1", job_config=job_config)
+
+    assert client.query.call_args.kwargs['job_config'].maximum_bytes_billed == 500
+    assert job_config.maximum_bytes_billed == 10 ** 6
+
+
+def test_dry_run_estimates_are_cached_per_query_and_parameters():
+    client = Mock()
+    client.query.return_value = make_job(processed=5000)
+    executor = QueryExecutor(client, dry_run_max_bytes=10000)
+
+    def days(value):
+        return bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ScalarQueryParameter('days', 'INT64', value)]
+        )
+
+    executor.run("SELECT @days", job_config=days(30), precheck=True)
+    executor.run("SELECT @days", job_config=days(30), precheck=True)
+    assert executor.get_summary()['dry_runs'] == 1
+
+    # Wider ranges can scan more partitions, so they get their own estimate
+    executor.run("SELECT @days", job_config=days(3650), precheck=True)
+    configs = [c.kwargs['job_config'] for c in client.query.call_args_list]
+    dry_runs = [config for config in configs if config and config.dry_run]
+    assert len(dry_runs) == 2
+    assert executor.get_summary()['dry_runs'] == 2
+
+    client.query.return_value = make_job(processed=50000)
+    with pytest.raises(QueryBudgetExceeded) as excinfo:
+        executor.run("SELECT * FROM workouts", precheck=True)
+    assert excinfo.value.estimated_bytes == 50000
+    assert executor.get_summary()['rejected'] == 1
+
+
+def test_dry_run_estimate_cache_is_bounded_lru():
+    client = Mock()
+    client.query.return_value = make_job(processed=5000)
+    executor = QueryExecutor(client, dry_run_max_bytes=10000, estimate_cache_size=2)
+
+    executor.estimate_bytes("SELECT 1")
+    executor.estimate_bytes("SELECT 2")
+    executor.estimate_bytes("SELECT 1")  # most recently used again
+    executor.estimate_bytes("SELECT 3")  # evicts SELECT 2
+
+    assert len(executor._estimates) == 2
+    assert executor.get_summary()['dry_runs'] == 3
+    executor.estimate_bytes("SELECT 1")
+    assert executor.get_summary()['dry_runs'] == 3
+    executor.estimate_bytes("SELECT 2")
+    assert executor.get_summary()['dry_runs'] == 4
+
+
+def test_identical_concurrent_queries_share_one_job():
+    release = threading.Event()
+
+    def slow_to_dataframe():
+        release.wait(5)
+        return pd.DataFrame({'x': [1, 2]})
+
+    def limit(value):
+        return bigquery.QueryJobConfig(
+            query_parameters=[bigquery.ScalarQueryParameter("limit", "INT64", value)]
+        )
+
+    job = make_job()
+    job.to_dataframe.side_effect = slow_to_dataframe
+    client = Mock()
+    client.query.return_value = job
+    executor = QueryExecutor(client)
+    config = limit(10)
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(executor.to_dataframe("SELECT x FROM t", config))
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    while client.query.call_count == 0:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert client.query.call_count == 1
+    assert [df['x'].tolist() for df in results] == [[1, 2]] * 4
+    assert len({id(df) for df in results}) == 4
+    assert executor.get_summary()['coalesced'] == 3
+
+    # Different parameter values are separate queries
+    job.to_dataframe.side_effect = None
+    other = limit(20)
+    executor.to_dataframe("SELECT x FROM t", config)
+    executor.to_dataframe("SELECT x FROM t", other)
+    assert client.query.call_count == 3
+
+
+def test_storage_api_fast_path_converts_arrow_batches():
+    batch = pa.record_batch({
+        'date': pa.array([19000, 19001], pa.date32()),
+        'workout_count': pa.array([3, 1], pa.int64()),
+        'avg_weight': pa.array([80.5, 90.0], pa.float64()),
+    })
+    job = make_job()
+    job.to_arrow.return_value = pa.Table.from_batches([batch, batch])
+    client = Mock()
+    client.query.return_value = job
+    executor = QueryExecutor(client, use_storage_api=True)
+
+    df = executor.to_dataframe("SELECT date, workout_count, avg_weight FROM t")
+
+    job.to_dataframe.assert_not_called()
+    job.to_arrow.assert_called_once_with(create_bqstorage_client=True)
+    assert len(df) == 4
+    assert df['date'].dtype == 'dbdate'  # Same as the REST path's DATE columns
+    assert df['workout_count'].dtype == 'Int64'
+    assert df['avg_weight'].dtype == 'float64'
+
+    # Per-call override back to the default REST decode
+    executor.to_dataframe("SELECT 1", use_storage_api=False)
+    job.to_dataframe.assert_called_once()
+
+
+def test_arrow_path_matches_rest_dtypes():
+    """Test the Arrow conversion returns the same frame as the REST to_dataframe."""
+    schema = [
+        bigquery.SchemaField('sets', 'INTEGER'),
+        bigquery.SchemaField('is_pr', 'BOOLEAN'),
+        bigquery.SchemaField('day', 'DATE'),
+        bigquery.SchemaField('start', 'TIME'),
+        bigquery.SchemaField('weight', 'FLOAT'),
+        bigquery.SchemaField('exercise', 'STRING'),
+        bigquery.SchemaField('logged_at', 'TIMESTAMP'),
+    ]
+    values = ['5', 'true', '2024-01-02', '18:12:33', '82.5', 'Squat', '1700000000000000']
+    rows = [{'f': [{'v': value} for value in values]}, {'f': [{'v': None}] * len(values)}]
+
+    def result_rows():
+        # REST pages as tabledata.list returns them
+        return RowIterator(None, lambda *args, **kwargs: {'rows': rows}, '/rows', schema)
+
+    rest = result_rows().to_dataframe(create_bqstorage_client=False)
+    arrow = arrow_to_dataframe(result_rows().to_arrow(create_bqstorage_client=False))
+
+    pd.testing.assert_frame_equal(arrow, rest)
+    assert list(arrow.dtypes.astype(str))[:4] == ['Int64', 'boolean', 'dbdate', 'dbtime']
+
+
+def test_backend_downgrades_rest_days_to_summary_table():
+    from modules.analytics_backends import BigQueryBackend
+
+    def query(sql, job_config=None):
+        # Raw table scans are estimated over budget, the summary table is cheap
+        scans_summary = 'daily_workout_summary' in sql
+        job = make_job(processed=100 if scans_summary else 10 ** 12)
+        job.to_dataframe.return_value = pd.DataFrame({'date': [], 'day_type': []})
+        return job
+
+    client = Mock()
+    client.query.side_effect = query
+    backend = BigQueryBackend(client, 'p', 'd')
+    backend.executor.dry_run_max_bytes = 10 ** 9
+
+    backend.get_rest_days(days=100000)
+
+    executed = [c for c in client.query.call_args_list if not c.kwargs['job_config'].dry_run]
+    assert len(executed) == 1
+    assert '`p.d.daily_workout_summary`' in executed[0].args[0]
+    days = executed[0].kwargs['job_config'].query_parameters[0]
+    assert days.name == 'days' and days.value == 366
+    assert backend.executor.get_history()[-1]['label'] == 'rest_days:downgraded'
@@ -0,0 +1,140 @@
+"""Unit tests for the on-disk query result cache."""
+from datetime import date, datetime, timezone
+from unittest.mock import Mock
+
+import pandas as pd
+
+from modules.analytics_backends import BigQueryBackend
+from modules.query_executor import QueryBudgetExceeded
+from modules.result_cache import ResultCache, make_cache_key
+
+
+def test_cache_round_trip_shared_between_instances(tmp_path):
+    df = pd.DataFrame({'exercise_name': ['Squat', 'Bench'],
+                       'total_sets': pd.array([5, 3], dtype='Int64')})
+    key = make_cache_key("SELECT 1", {'limit': 10}, 'v1')
+
+    ResultCache(str(tmp_path)).set(key, df)
+    # A second instance (e.g. another replica) sees the same entry
+    other = ResultCache(str(tmp_path))
+
+    pd.testing.assert_frame_equal(other.get(key), df)
+    assert other.get(make_cache_key("SELECT 1", {'limit': 10}, 'v2')) is None
+    assert other.get_stats()['hits'] == 1
+    assert other.get_stats()['misses'] == 1
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    df = pd.DataFrame({'x': range(1000)})
+    cache = ResultCache(str(tmp_path))
+    cache.set('a', df)
+    entry_size = cache.get_stats()['bytes']
+    cache.max_bytes = entry_size * 2
+
+    cache.set('b', df)
+    cache.get('a')  # 'b' is now least recently used
+    cache.set('c', df)
+
+    assert cache.get('b') is None
+    assert cache.get('a') is not None and cache.get('c') is not None
+    assert cache.get_stats()['evictions'] == 1
+    assert not (tmp_path / 'b.parquet').exists()
+
+
+def test_backend_serves_cached_results_until_table_changes(tmp_path):
+    client = Mock()
+    client.get_table.return_value.modified = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    client.query.return_value.to_dataframe.return_value = pd.DataFrame({'exercise_name': ['Squat']})
+    backend = BigQueryBackend(client, 'p', 'd', result_cache=ResultCache(str(tmp_path)),
+                              version_check_seconds=0)
+
+    backend.get_all_exercises()
+    backend.get_all_exercises()
+    assert client.query.call_count == 1
+
+    client.get_table.return_value.modified = datetime(2024, 1, 2, tzinfo=timezone.utc)
+    assert backend.get_all_exercises()['exercise_name'].tolist() == ['Squat']
+    assert client.query.call_count == 2
+
+
+def test_backend_keys_date_relative_results_on_today(tmp_path, monkeypatch):
+    client = Mock()
+    client.get_table.return_value.modified = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    client.query.return_value.to_dataframe.return_value = pd.DataFrame({'date': [], 'day_type': []})
+    backend = BigQueryBackend(client, 'p', 'd', result_cache=ResultCache(str(tmp_path)))
+
+    monkeypatch.setattr('modules.analytics_backends.current_utc_date', lambda: date(2024, 1, 1))
+    backend.get_rest_days(30)
+    backend.get_rest_days(30)
+    assert client.query.call_count == 1
+
+    monkeypatch.setattr('modules.analytics_backends.current_utc_date', lambda: date(2024, 1, 2))
+    backend.get_rest_days(30)
+    assert client.query.call_count == 2
+
+
+def test_backend_does_not_store_downgraded_results(tmp_path):
+    client = Mock()
+    client.get_table.return_value.modified = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    backend = BigQueryBackend(client, 'p', 'd', result_cache=ResultCache(str(tmp_path)))
+    sampled = pd.DataFrame({'exercise_name': ['Squat'], 'total_sets': [10]})
+    backend.executor.to_dataframe = Mock(side_effect=[QueryBudgetExceeded("over budget"), sampled])
+
+    pd.testing.assert_frame_equal(backend.get_top_exercises(5), sampled)
+    assert backend.result_cache.get_stats()['writes'] == 0
+
+
+def test_data_version_is_rate_limited_and_bumped_by_uploads():
+    from modules.data_version import DataVersionTracker, bump_data_version
+
+    client = Mock()
+    client.get_table.return_value.modified = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    client.get_table.return_value.num_rows = 10
+    tracker = DataVersionTracker(client, 'p.d.versioned', min_check_interval=3600)
+
+    first = tracker.current()
+    assert tracker.current() == first
+    assert client.get_table.call_count == 1
+
+    client.get_table.return_value.num_rows = 20
+    bump_data_version('p.d.versioned')
+    assert tracker.current() != first
+    assert client.get_table.call_count == 2
+
+    # The version depends only on table metadata, so other processes agree on it
+    other = DataVersionTracker(client, 'p.d.versioned', min_check_interval=3600)
+    assert other.current() == tracker.current() == '2024-01-01T00:00:00+00:00:20'
+
+
+def test_workout_analytics_caches_until_data_version_changes():
+    from modules.analytics import WorkoutAnalytics
+
+    backend = Mock()
+    backend.get_data_version.return_value = 'v1'
+    backend.get_all_exercises.return_value = pd.DataFrame({'exercise_name': ['Squat']})
+    analytics = WorkoutAnalytics(None, 'p', 'd', backend=backend)
+
+    result = analytics.get_all_exercises()
+    result['exercise_name'] = 'mutated'
+    assert analytics.get_all_exercises()['exercise_name'].tolist() == ['Squat']
+    assert backend.get_all_exercises.call_count == 1
+
+    backend.get_data_version.return_value = 'v2'
+    analytics.get_all_exercises()
+    assert backend.get_all_exercises.call_count == 2
+
+
+def test_workout_analytics_keys_rest_days_on_today(monkeypatch):
+    from modules.analytics import WorkoutAnalytics
+
+    backend = Mock()
+    backend.get_data_version.return_value = 'v1'
+    backend.get_rest_days.return_value = pd.DataFrame({'date': [], 'day_type': []})
+    analytics = WorkoutAnalytics(None, 'p', 'd', backend=backend)
+
+    monkeypatch.setattr('modules.analytics.current_utc_date', lambda: date(2024, 1, 1))
+    analytics.get_rest_days(30)
+    analytics.get_rest_days(30)
+    monkeypatch.setattr('modules.analytics.current_utc_date', lambda: date(2024, 1, 2))
+    analytics.get_rest_days(30)
+    assert backend.get_rest_days.call_count == 2
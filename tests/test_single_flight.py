@@ -0,0 +1,65 @@
+"""Unit tests for single-flight call coalescing and stale-while-revalidate."""
+import threading
+import time
+from unittest.mock import Mock
+
+import pandas as pd
+
+from modules.analytics import WorkoutAnalytics
+from modules.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return 42
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('k', slow)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while not flight.in_flight('k'):
+        time.sleep(0.01)
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [42] * 5
+    assert len(calls) == 1
+    assert flight.stats['shared'] == 4
+
+
+def test_stale_result_served_while_refreshing():
+    release = threading.Event()
+    backend = Mock()
+    backend.get_data_version.return_value = 'v1'
+    backend.get_all_exercises.return_value = pd.DataFrame({'exercise_name': ['Squat']})
+    analytics = WorkoutAnalytics(None, 'p', 'd', backend=backend)
+    analytics.get_all_exercises()
+
+    def slow_refresh():
+        release.wait(5)
+        return pd.DataFrame({'exercise_name': ['Squat', 'Deadlift']})
+
+    backend.get_data_version.return_value = 'v2'
+    backend.get_all_exercises.side_effect = slow_refresh
+
+    # Both calls return the stale frame at once; only one refresh runs
+    assert analytics.get_all_exercises()['exercise_name'].tolist() == ['Squat']
+    assert analytics.get_all_exercises()['exercise_name'].tolist() == ['Squat']
+
+    release.set()
+    deadline = time.time() + 5
+    while analytics._refreshes.in_flight(('all_exercises', ())) and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert analytics.get_all_exercises()['exercise_name'].tolist() == ['Squat', 'Deadlift']
+    assert backend.get_all_exercises.call_count == 2
+    assert analytics.get_refresh_stats()['background'] == 1
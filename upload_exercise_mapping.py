@@ -5,6 +5,7 @@ import os
 import sys
 from modules.config_loader import ConfigLoader
 from modules.bigquery_uploader import BigQueryUploader
+from modules.daily_summary import DailySummaryManager
 from google.oauth2 import service_account
 
 def main():
@@ -79,6 +80,18 @@ def main():
             print(f"📊 Rows uploaded: {result.get('rows_uploaded', 0)}")
             if 'job_id' in result:
                 print(f"🔖 Job ID: {result['job_id']}")
+            
+            # Workout categories depend on the mapping, so recompute every day
+            if upload_settings.get('refresh_daily_summary', False):
+                print("🔄 Rebuilding daily workout summary...")
+                summary = DailySummaryManager(
+                    uploader.client, project_id, dataset_id,
+                    os.getenv('BQ_TABLE_ID', 'workouts')
+                ).rebuild()
+                if summary.get('success'):
+                    print("✅ Daily workout summary rebuilt")
+                else:
+                    print(f"⚠️  Daily workout summary rebuild failed: {summary.get('error')}")
         else:
             print("❌ Upload failed!")
             print(f"Error: {result.get('error', 'Unknown error')}")